@@ -2,41 +2,131 @@
 
 The :func:`dispatch_action` function is the single entry point.  It
 selects the correct plugin by *action_type* and delegates execution.
+:func:`dispatch_actions` runs a batch of dispatches concurrently so one
+slow webhook or SMTP server does not serialise the rest.
 """
 
-import json
+import functools
 import logging
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType, ModuleType
+from typing import Callable, Mapping, Optional, Union
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
+#: Worker pool used to overlap blocking action I/O within one alert cycle.
+_DISPATCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="alert-dispatch")
+
+_EMPTY_CONFIG: Mapping = MappingProxyType({})
+
+#: An ``Alert.action_config`` value: already decoded by the ORM's JSON
+#: column, or a legacy JSON string.
+ActionConfig = Union[Mapping, str, None]
+
+#: One queued dispatch: ``(action_type, action_config, message)``.
+PendingAction = tuple[str, ActionConfig, str]
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_config(action_config: str) -> Mapping:
+    """Decode an ``action_config`` JSON string into a read-only mapping.
+
+    Alerts re-send the same config string on every fire, so the parsed
+    result is cached keyed by the raw text.  A change to the stored
+    config produces a new key, so no explicit invalidation is needed.
+
+    Args:
+        action_config: JSON-encoded handler settings.
+
+    Returns:
+        A :class:`types.MappingProxyType` view so callers cannot mutate
+        the shared cached dict.
+    """
+    return MappingProxyType(orjson.loads(action_config))
+
+
+def _get_config(action_config: ActionConfig) -> Mapping:
+    """Return the handler config, parsing only when given a JSON string."""
+    if not action_config:
+        return _EMPTY_CONFIG
+    if isinstance(action_config, Mapping):
+        return action_config
+    return _parse_config(action_config)
+
 
-def dispatch_action(action_type: str, action_config: Optional[str], message: str) -> None:
+def _handler_modules() -> dict[str, tuple[ModuleType, str]]:
+    """Import every action plugin once and map action types to handlers.
+
+    Each entry is ``(module, function_name)``.  The function is looked up
+    on the module at call time so monkeypatched handlers are honoured.
+    """
+    from pingwatcher.alerts.actions import command, email_action, log_file, webhook
+
+    return {
+        "email": (email_action, "send_email_alert"),
+        "webhook": (webhook, "send_webhook"),
+        "log": (log_file, "log_alert"),
+        "command": (command, "run_command"),
+    }
+
+
+_HANDLERS: dict[str, tuple[ModuleType, str]] = {}
+_handlers_lock = threading.Lock()
+
+
+def _get_handler(action_type: str) -> Optional[Callable[[Mapping, str], None]]:
+    """Return the handler for *action_type*, loading the table on first use."""
+    if not _HANDLERS:
+        with _handlers_lock:
+            if not _HANDLERS:
+                _HANDLERS.update(_handler_modules())
+    entry = _HANDLERS.get(action_type)
+    if entry is None:
+        return None
+    module, name = entry
+    return getattr(module, name)
+
+
+def dispatch_action(action_type: str, action_config: ActionConfig, message: str) -> None:
     """Route an alert event to the appropriate action handler.
 
     Args:
         action_type: One of ``"email"``, ``"webhook"``, ``"log"``,
             ``"command"``.
-        action_config: JSON-encoded string of handler-specific settings.
+        action_config: Handler-specific settings, either as the dict
+            decoded by the ORM or as a JSON-encoded string.
         message: Human-readable alert description.
     """
-    config: dict = json.loads(action_config) if action_config else {}
+    handler = _get_handler(action_type)
+    if handler is None:
+        logger.warning("Unknown alert action type: %s", action_type)
+        return
+    handler(_get_config(action_config), message)
 
-    if action_type == "email":
-        from pingwatcher.alerts.actions.email_action import send_email_alert
 
-        send_email_alert(config, message)
-    elif action_type == "webhook":
-        from pingwatcher.alerts.actions.webhook import send_webhook
+def dispatch_actions(actions: list[PendingAction]) -> None:
+    """Dispatch several alert actions concurrently and wait for all.
 
-        send_webhook(config, message)
-    elif action_type == "log":
-        from pingwatcher.alerts.actions.log_file import log_alert
+    A single action runs inline; larger batches are fanned out to a
+    shared thread pool so N slow deliveries cost roughly the slowest
+    one rather than their sum.
 
-        log_alert(config, message)
-    elif action_type == "command":
-        from pingwatcher.alerts.actions.command import run_command
+    Args:
+        actions: ``(action_type, action_config, message)`` tuples, as
+            accepted by :func:`dispatch_action`.
+    """
+    if not actions:
+        return
+    if len(actions) == 1:
+        dispatch_action(*actions[0])
+        return
 
-        run_command(config, message)
-    else:
-        logger.warning("Unknown alert action type: %s", action_type)
+    futures = [_DISPATCH_POOL.submit(dispatch_action, *args) for args in actions]
+    for future, (action_type, _config, _message) in zip(futures, actions):
+        try:
+            future.result()
+        except Exception:
+            logger.exception("Alert action %s failed", action_type)
@@ -6,18 +6,30 @@ Expected ``action_config`` keys::
         "command": "/usr/local/bin/notify-ops --message '{message}'"
     }
 
-The literal ``{message}`` placeholder in the command string is replaced
-with the alert text.
+The command is split into arguments with :func:`shlex.split` (once per
+distinct template) and executed directly, without a shell.  The literal
+``{message}`` placeholder is replaced with the alert text inside each
+argument, so quotes or backticks in the message are never interpreted.
+Shell features such as pipes or redirection are not available; wrap them
+in a script if needed.
 """
 
+import functools
 import logging
+import shlex
 import subprocess
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=128)
+def _parse_template(cmd_template: str) -> tuple[str, ...]:
+    """Split a command template into its argument vector."""
+    return tuple(shlex.split(cmd_template))
+
+
 def run_command(config: dict, message: str) -> None:
-    """Run a shell command, injecting the alert message.
+    """Run the configured command, injecting the alert message.
 
     Args:
         config: Must contain ``command``.
@@ -28,12 +40,19 @@ def run_command(config: dict, message: str) -> None:
         logger.error("Command alert skipped — no 'command' configured")
         return
 
-    cmd = cmd_template.replace("{message}", message)
+    try:
+        argv = [arg.replace("{message}", message) for arg in _parse_template(cmd_template)]
+    except ValueError as exc:
+        logger.error("Command alert skipped — cannot parse %r: %s", cmd_template, exc)
+        return
+    if not argv:
+        logger.error("Command alert skipped — empty 'command' configured")
+        return
 
     try:
         result = subprocess.run(
-            cmd,
-            shell=True,
+            argv,
+            shell=False,
             capture_output=True,
             text=True,
             timeout=30,
@@ -45,6 +64,6 @@ def run_command(config: dict, message: str) -> None:
         else:
             logger.info("Alert command executed successfully")
     except subprocess.TimeoutExpired:
-        logger.error("Alert command timed out: %s", cmd)
+        logger.error("Alert command timed out: %s", shlex.join(argv))
     except Exception:
-        logger.exception("Alert command failed: %s", cmd)
+        logger.exception("Alert command failed: %s", shlex.join(argv))
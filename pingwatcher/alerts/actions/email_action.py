@@ -13,16 +13,139 @@ Expected ``action_config`` keys::
     }
 """
 
+import atexit
+import functools
 import logging
 import smtplib
-from email.mime.text import MIMEText
+import threading
+from email import policy
+from email.message import Message
+from typing import Optional, Union
 
 logger = logging.getLogger(__name__)
 
+_PoolKey = tuple[str, int, Optional[str]]
+
+# Connected + authenticated SMTP sessions keyed by (host, port, user).
+# Each entry has its own lock because an SMTP session is not safe to use
+# from several threads at once; _pool_lock only guards the dicts.
+_smtp_pool: dict[_PoolKey, smtplib.SMTP] = {}
+_smtp_locks: dict[_PoolKey, threading.Lock] = {}
+_pool_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=128)
+def _header_block(subject: str, from_addr: str, to_addr: str) -> bytes:
+    """Render the MIME header block for one subject/sender/recipient.
+
+    Headers are folded and encoded once per distinct combination; the
+    alert body is appended as raw UTF-8 (``8bit``) at send time without
+    going through the :mod:`email` generator again.
+
+    Returns:
+        CRLF-terminated header bytes, including the blank separator line.
+    """
+    headers = Message()
+    headers["Subject"] = subject
+    headers["From"] = from_addr
+    headers["To"] = to_addr
+    headers["MIME-Version"] = "1.0"
+    headers["Content-Type"] = 'text/plain; charset="utf-8"'
+    headers["Content-Transfer-Encoding"] = "8bit"
+    return headers.as_bytes(policy=policy.SMTP)
+
+
+def _build_message(subject: str, from_addr: str, to_addr: str, body: str) -> bytes:
+    """Splice *body* onto the cached header block for this alert."""
+    normalized = "\r\n".join(body.splitlines())
+    return _header_block(subject, from_addr, to_addr) + normalized.encode("utf-8") + b"\r\n"
+
+
+def _connect(host: str, port: int, user: Optional[str], password: Optional[str]) -> smtplib.SMTP:
+    """Open, secure, and authenticate a new SMTP session."""
+    smtp = smtplib.SMTP(host, port, timeout=10)
+    smtp.ehlo()
+    if port != 25:
+        smtp.starttls()
+        smtp.ehlo()
+    if user and password:
+        smtp.login(user, password)
+    return smtp
+
+
+def _discard(key: _PoolKey) -> None:
+    """Drop and close a pooled session, ignoring errors from a dead socket."""
+    smtp = _smtp_pool.pop(key, None)
+    if smtp is None:
+        return
+    try:
+        smtp.close()
+    except Exception:
+        pass
+
+
+def _send_pooled(
+    host: str,
+    port: int,
+    user: Optional[str],
+    password: Optional[str],
+    from_addr: str,
+    to_addrs: list[str],
+    msg: Union[str, bytes],
+) -> None:
+    """Send *msg* over a pooled session, reconnecting once if it went stale."""
+    key = (host, port, user)
+    with _pool_lock:
+        lock = _smtp_locks.setdefault(key, threading.Lock())
+    with lock:
+        smtp = _smtp_pool.get(key)
+        if smtp is not None:
+            try:
+                smtp.sendmail(from_addr, to_addrs, msg)
+                return
+            except smtplib.SMTPServerDisconnected:
+                logger.debug("Pooled SMTP session to %s:%d dropped; reconnecting", host, port)
+                _discard(key)
+            except Exception:
+                _discard(key)
+                raise
+        smtp = _connect(host, port, user, password)
+        _smtp_pool[key] = smtp
+        try:
+            smtp.sendmail(from_addr, to_addrs, msg)
+        except Exception:
+            _discard(key)
+            raise
+
+
+def close_pool() -> None:
+    """Cleanly close every pooled SMTP session.
+
+    Each session is closed under its own lock, so a send still running on
+    another thread finishes before the session is quit.
+    """
+    with _pool_lock:
+        locks = [(key, _smtp_locks.setdefault(key, threading.Lock())) for key in _smtp_pool]
+    for key, lock in locks:
+        with lock:
+            smtp = _smtp_pool.pop(key, None)
+            if smtp is None:
+                continue
+            try:
+                smtp.quit()
+            except Exception:
+                pass
+
+
+atexit.register(close_pool)
+
 
 def send_email_alert(config: dict, message: str) -> None:
     """Compose and send a plain-text alert email.
 
+    The SMTP session is kept open and reused for later alerts to the same
+    server and account.
+
     Args:
         config: SMTP connection and addressing parameters.
         message: The alert body text.
@@ -39,20 +162,10 @@ def send_email_alert(config: dict, message: str) -> None:
         logger.error("Email alert skipped — no 'to_addr' configured")
         return
 
-    msg = MIMEText(message)
-    msg["Subject"] = f"{prefix} Alert Triggered"
-    msg["From"] = from_addr
-    msg["To"] = to_addr
+    msg = _build_message(f"{prefix} Alert Triggered", from_addr, to_addr, message)
 
     try:
-        with smtplib.SMTP(host, port, timeout=10) as smtp:
-            smtp.ehlo()
-            if port != 25:
-                smtp.starttls()
-                smtp.ehlo()
-            if user and password:
-                smtp.login(user, password)
-            smtp.sendmail(from_addr, [to_addr], msg.as_string())
+        _send_pooled(host, port, user, password, from_addr, [to_addr], msg)
         logger.info("Email alert sent to %s", to_addr)
     except Exception:
         logger.exception("Failed to send email alert to %s", to_addr)
@@ -5,18 +5,116 @@ Expected ``action_config`` keys::
     {
         "path": "/var/log/pingwatcher/alerts.log"
     }
+
+Lines are handed to a background writer thread that keeps one open
+handle per path and writes whatever has queued up in a single call, so
+an alert storm costs a few writes instead of an open/write/close per
+alert.
 """
 
+import atexit
 import logging
+import queue
+import threading
 from datetime import datetime, timezone
+from typing import IO, Optional
 
 logger = logging.getLogger(__name__)
 
 _DEFAULT_LOG_PATH = "pingwatcher_alerts.log"
 
+#: Maximum number of queued lines written per batch.
+_MAX_BATCH = 64
+
+
+class _LogWriter:
+    """Daemon thread that drains queued ``(path, line)`` pairs in batches.
+
+    The writer blocks until a line arrives, then takes everything else
+    already queued (up to :data:`_MAX_BATCH`) so light traffic is written
+    immediately while bursts are coalesced.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue[tuple[str, str]]" = queue.Queue()
+        self._handles: dict[str, IO[str]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, path: str, line: str) -> None:
+        """Queue *line* for appending to *path*."""
+        self._ensure_started()
+        self._queue.put((path, line))
+
+    def flush(self) -> None:
+        """Block until every queued line has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Flush pending lines and close all open handles."""
+        self.flush()
+        for fh in self._handles.values():
+            try:
+                fh.close()
+            except Exception:
+                pass
+        self._handles.clear()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="alert-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < _MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: list[tuple[str, str]]) -> None:
+        by_path: dict[str, list[str]] = {}
+        for path, line in batch:
+            by_path.setdefault(path, []).append(line)
+
+        for path, lines in by_path.items():
+            try:
+                fh = self._handles.get(path)
+                if fh is None:
+                    fh = open(path, "a", encoding="utf-8")
+                    self._handles[path] = fh
+                fh.write("".join(lines))
+                fh.flush()
+                logger.info("Alert logged to %s (%d line(s))", path, len(lines))
+            except Exception:
+                logger.exception("Failed to write alert log to %s", path)
+                stale = self._handles.pop(path, None)
+                if stale is not None:
+                    try:
+                        stale.close()
+                    except Exception:
+                        pass
+
+
+_writer = _LogWriter()
+atexit.register(_writer.close)
+
 
 def log_alert(config: dict, message: str) -> None:
-    """Write a timestamped alert line to the configured log file.
+    """Queue a timestamped alert line for the configured log file.
 
     Args:
         config: Must contain ``path`` (defaults to
@@ -26,10 +124,9 @@ def log_alert(config: dict, message: str) -> None:
     path = config.get("path", _DEFAULT_LOG_PATH)
     timestamp = datetime.now(timezone.utc).isoformat()
     line = f"[{timestamp}] {message}\n"
+    _writer.submit(path, line)
+
 
-    try:
-        with open(path, "a", encoding="utf-8") as fh:
-            fh.write(line)
-        logger.info("Alert logged to %s", path)
-    except Exception:
-        logger.exception("Failed to write alert log to %s", path)
+def flush() -> None:
+    """Wait until all queued alert lines have been written to disk."""
+    _writer.flush()
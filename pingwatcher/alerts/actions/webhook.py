@@ -8,12 +8,21 @@ Expected ``action_config`` keys::
     }
 """
 
+import atexit
 import logging
 
 import httpx
 
 logger = logging.getLogger(__name__)
 
+# Shared client so repeated alerts to the same host reuse keep-alive
+# connections (and TLS sessions) instead of handshaking on every POST.
+_CLIENT = httpx.Client(
+    timeout=10,
+    limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+)
+atexit.register(_CLIENT.close)
+
 
 def send_webhook(config: dict, message: str) -> None:
     """Fire an HTTP POST with the alert payload.
@@ -31,7 +40,7 @@ def send_webhook(config: dict, message: str) -> None:
     payload = {"message": message}
 
     try:
-        resp = httpx.post(url, json=payload, headers=headers, timeout=10)
+        resp = _CLIENT.post(url, json=payload, headers=headers)
         resp.raise_for_status()
         logger.info("Webhook alert delivered to %s (status %d)", url, resp.status_code)
     except Exception:
@@ -6,29 +6,62 @@ should fire.  This module provides the logic for checking conditions,
 tracking consecutive breaches, and dispatching configured actions.
 """
 
+import functools
 import logging
 import operator as op
 from datetime import datetime
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional, Sequence
 
+import numpy as np
 from sqlalchemy.orm import Session
 
+from pingwatcher.alerts.actions import PendingAction, dispatch_action, dispatch_actions
 from pingwatcher.db.models import Alert
 from pingwatcher.db.queries import (
     get_active_alerts,
     get_all_hop_stats,
     record_alert_event,
+    record_alert_events,
+    utcnow,
 )
 
 logger = logging.getLogger(__name__)
 
+#: Clock used for alert timestamps when the caller does not supply one;
+#: tests may replace it.
+_time_source: Callable[[], datetime] = utcnow
+
 #: Map of string operators to callables.
-OPERATORS: dict[str, Any] = {
-    ">": op.gt,
-    "<": op.lt,
-    ">=": op.ge,
-    "<=": op.le,
-}
+OPERATORS: Mapping[str, Callable[[Any, Any], bool]] = MappingProxyType(
+    {
+        ">": op.gt,
+        "<": op.lt,
+        ">=": op.ge,
+        "<=": op.le,
+    }
+)
+
+#: Map of alert metric names to hop-stats dictionary keys.
+_METRIC_KEY: Mapping[str, str] = MappingProxyType(
+    {
+        "packet_loss_pct": "packet_loss_pct",
+        "avg_rtt_ms": "avg_ms",
+        "cur_rtt_ms": "cur_ms",
+    }
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_rule(
+    operator: str, metric: str
+) -> tuple[Optional[Callable[[Any, Any], bool]], Optional[str]]:
+    """Resolve an alert's operator and metric to ``(cmp_fn, stats_key)``.
+
+    The handful of distinct operator/metric pairs are resolved once and
+    reused across every alert and sample cycle.
+    """
+    return OPERATORS.get(operator), _METRIC_KEY.get(metric)
 
 
 def _extract_metric(stats: dict[str, Any], metric: str) -> float | None:
@@ -43,26 +76,43 @@ def _extract_metric(stats: dict[str, Any], metric: str) -> float | None:
     Returns:
         Numeric value, or ``None`` when unavailable.
     """
-    mapping = {
-        "packet_loss_pct": "packet_loss_pct",
-        "avg_rtt_ms": "avg_ms",
-        "cur_rtt_ms": "cur_ms",
-    }
-    key = mapping.get(metric)
+    key = _METRIC_KEY.get(metric)
     if key is None:
         return None
     return stats.get(key)
 
 
+def _index_hops_by_ip(all_stats: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+    """Group hop-stats by responding IP for O(1) specific-IP lookups.
+
+    Built once per sample cycle and shared by every alert on the target.
+    A list is kept per IP because the same router can answer at more
+    than one TTL.
+
+    Args:
+        all_stats: Full list of per-hop stat dictionaries.
+
+    Returns:
+        Mapping of IP → hop-stats dictionaries in hop order.
+    """
+    by_ip: dict[str, list[dict[str, Any]]] = {}
+    for s in all_stats:
+        by_ip.setdefault(s.get("ip"), []).append(s)
+    return by_ip
+
+
 def _find_matching_hops(
     all_stats: list[dict[str, Any]],
     hop_selector: str,
+    by_ip: dict[str, list[dict[str, Any]]] | None = None,
 ) -> list[dict[str, Any]]:
     """Filter hop-stats to the hops relevant for an alert rule.
 
     Args:
         all_stats: Full list of per-hop stat dictionaries.
         hop_selector: ``"any"``, ``"final"``, or a specific IP string.
+        by_ip: Optional index from :func:`_index_hops_by_ip`; used for
+            the specific-IP case instead of scanning *all_stats*.
 
     Returns:
         Filtered list of hop-stats dictionaries.
@@ -74,43 +124,156 @@ def _find_matching_hops(
     if hop_selector == "any":
         return all_stats
     # Specific IP.
+    if by_ip is not None:
+        return by_ip.get(hop_selector, [])
     return [s for s in all_stats if s.get("ip") == hop_selector]
 
 
-def check_condition(alert: Alert, all_stats: list[dict[str, Any]]) -> tuple[bool, float | None]:
+def check_condition(
+    alert: Alert,
+    all_stats: list[dict[str, Any]],
+    by_ip: dict[str, list[dict[str, Any]]] | None = None,
+) -> tuple[bool, float | None]:
     """Evaluate whether an alert's condition is currently breached.
 
     Args:
         alert: The :class:`Alert` rule to check.
         all_stats: Per-hop statistics for the current focus window.
+        by_ip: Optional prebuilt IP index shared across alerts.
 
     Returns:
         Tuple of ``(is_triggered, metric_value)``.  *metric_value* is
         the reading that caused (or did not cause) the trigger.
     """
-    cmp_fn = OPERATORS.get(alert.operator)
+    cmp_fn, stats_key = _compile_rule(alert.operator, alert.metric)
     if cmp_fn is None:
         logger.warning("Unknown operator %r on alert %s", alert.operator, alert.id)
         return False, None
 
-    hops = _find_matching_hops(all_stats, alert.hop)
+    if stats_key is None:
+        return False, None
+
+    hops = _find_matching_hops(all_stats, alert.hop, by_ip)
+
+    threshold = alert.threshold
     for hop_stats in hops:
-        value = _extract_metric(hop_stats, alert.metric)
-        if value is not None and cmp_fn(value, alert.threshold):
+        value = hop_stats.get(stats_key)
+        if value is not None and cmp_fn(value, threshold):
             return True, value
 
     # Return the metric value from the first matching hop for logging.
     if hops:
-        value = _extract_metric(hops[0], alert.metric)
-        return False, value
+        return False, hops[0].get(stats_key)
     return False, None
 
 
+#: Column order of the per-cycle hop value matrix built by check_conditions.
+_METRIC_COLUMNS: tuple[str, ...] = ("packet_loss_pct", "avg_ms", "cur_ms")
+_METRIC_COLUMN_INDEX: Mapping[str, int] = MappingProxyType(
+    {key: idx for idx, key in enumerate(_METRIC_COLUMNS)}
+)
+
+
+def _hop_values(all_stats: list[dict[str, Any]]) -> np.ndarray:
+    """Pack hop metrics into an ``(H, 3)`` float array (``NaN`` = missing)."""
+    values = np.full((len(all_stats), len(_METRIC_COLUMNS)), np.nan)
+    for row, hop_stats in enumerate(all_stats):
+        for col, key in enumerate(_METRIC_COLUMNS):
+            value = hop_stats.get(key)
+            if value is not None:
+                values[row, col] = value
+    return values
+
+
+def check_conditions(
+    alerts: Sequence[Alert],
+    all_stats: list[dict[str, Any]],
+    by_ip: dict[str, list[dict[str, Any]]] | None = None,
+) -> list[tuple[bool, float | None]]:
+    """Evaluate many alert rules against one hop-stats snapshot at once.
+
+    Equivalent to calling :func:`check_condition` for each alert, but the
+    rules are laid out as parallel arrays (metric column, threshold, hop
+    selection mask) and compared against an ``(H, 3)`` value matrix with
+    one vectorised operation per distinct operator.
+
+    Args:
+        alerts: Alert rules for the target.
+        all_stats: Per-hop statistics for the current focus window.
+        by_ip: Optional prebuilt IP index shared across alerts.
+
+    Returns:
+        One ``(is_triggered, metric_value)`` tuple per alert, in order.
+    """
+    results: list[tuple[bool, float | None]] = [(False, None)] * len(alerts)
+    if not alerts or not all_stats:
+        for alert in alerts:
+            if OPERATORS.get(alert.operator) is None:
+                logger.warning("Unknown operator %r on alert %s", alert.operator, alert.id)
+        return results
+
+    if by_ip is None:
+        by_ip = _index_hops_by_ip(all_stats)
+    hop_row = {id(s): i for i, s in enumerate(all_stats)}
+    n_hops = len(all_stats)
+
+    rows: list[int] = []
+    columns: list[int] = []
+    thresholds: list[float] = []
+    ops: list[str] = []
+    masks: list[np.ndarray] = []
+    for idx, alert in enumerate(alerts):
+        cmp_fn, stats_key = _compile_rule(alert.operator, alert.metric)
+        if cmp_fn is None:
+            logger.warning("Unknown operator %r on alert %s", alert.operator, alert.id)
+            continue
+        if stats_key is None:
+            continue
+        mask = np.zeros(n_hops, dtype=bool)
+        for hop_stats in _find_matching_hops(all_stats, alert.hop, by_ip):
+            mask[hop_row[id(hop_stats)]] = True
+        rows.append(idx)
+        columns.append(_METRIC_COLUMN_INDEX[stats_key])
+        thresholds.append(alert.threshold)
+        ops.append(alert.operator)
+        masks.append(mask)
+
+    if not rows:
+        return results
+
+    # (K, H) matrix of each rule's metric across every hop.
+    values = _hop_values(all_stats)[:, columns].T
+    selected = np.vstack(masks)
+    threshold_col = np.asarray(thresholds, dtype=float)[:, None]
+    op_arr = np.asarray(ops)
+
+    breached = np.zeros_like(selected)
+    with np.errstate(invalid="ignore"):
+        for op_name in set(ops):
+            group = op_arr == op_name
+            breached[group] = OPERATORS[op_name](values[group], threshold_col[group])
+    breached &= selected
+
+    any_breach = breached.any(axis=1)
+    first_breach = breached.argmax(axis=1)
+    first_selected = selected.argmax(axis=1)
+    has_selection = selected.any(axis=1)
+
+    for k, idx in enumerate(rows):
+        if any_breach[k]:
+            results[idx] = (True, float(values[k, first_breach[k]]))
+        elif has_selection[k]:
+            value = values[k, first_selected[k]]
+            results[idx] = (False, None if np.isnan(value) else float(value))
+    return results
+
+
 def evaluate_alerts(
     db: Session,
     target_id: str,
     focus_n: int = 10,
     all_stats: list[dict[str, Any]] | None = None,
+    now: datetime | None = None,
 ) -> None:
     """Run all enabled alert rules for a target against current data.
 
@@ -126,6 +289,8 @@ def evaluate_alerts(
         all_stats: Pre-computed hop statistics from the current sample
             cycle.  When supplied the DB query inside this function is
             skipped entirely, avoiding redundant round-trips.
+        now: Timestamp of the sample cycle, used for every alert fired in
+            it.  Defaults to the module clock.
     """
     alerts = get_active_alerts(db, target_id)
     if not alerts:
@@ -134,9 +299,27 @@ def evaluate_alerts(
     if all_stats is None:
         all_stats = get_all_hop_stats(db, target_id, focus_n=focus_n)
 
-    for alert in alerts:
-        triggered, value = check_condition(alert, all_stats)
-        _handle_state_change(db, alert, triggered, value)
+    # Collect actions for every alert firing this cycle and deliver them
+    # together so correlated alerts do not block the scheduler serially.
+    # State changes for every alert are committed together; a failure
+    # part-way rolls the whole cycle back and the next sample re-evaluates.
+    # History rows are buffered and written with one multi-row INSERT.
+    by_ip = _index_hops_by_ip(all_stats)
+    pending: list[PendingAction] = []
+    events: list[dict[str, Any]] = []
+    try:
+        outcomes = check_conditions(alerts, all_stats, by_ip)
+        for alert, (triggered, value) in zip(alerts, outcomes):
+            _handle_state_change(
+                db, alert, triggered, value, pending=pending, events=events, now=now
+            )
+        record_alert_events(db, events)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    dispatch_actions(pending)
 
 
 def _handle_state_change(
@@ -144,34 +327,54 @@ def _handle_state_change(
     alert: Alert,
     triggered: bool,
     metric_value: float | None,
+    pending: list[PendingAction] | None = None,
+    events: list[dict[str, Any]] | None = None,
+    now: datetime | None = None,
 ) -> None:
     """Update alert state counters and dispatch actions when appropriate.
 
+    Changes are left pending on *db*; the caller commits.
+
     Args:
         db: Active database session.
         alert: The :class:`Alert` being evaluated.
         triggered: Whether the condition is currently met.
         metric_value: The metric reading that was evaluated.
+        pending: Optional batch to append the action to instead of
+            dispatching it immediately.
+        events: Optional buffer for history rows (see :func:`_fire_alert`).
+        now: Cycle timestamp passed through to :func:`_fire_alert`.
     """
     if triggered:
         alert.consecutive_triggers += 1
         if alert.consecutive_triggers >= alert.duration_samples:
-            _fire_alert(db, alert, metric_value)
+            _fire_alert(db, alert, metric_value, pending=pending, events=events, now=now)
     else:
         if alert.consecutive_triggers >= alert.duration_samples:
             logger.info("Alert %s recovered (was active for %d samples)", alert.id, alert.consecutive_triggers)
         alert.consecutive_triggers = 0
 
-    db.commit()
-
 
-def _fire_alert(db: Session, alert: Alert, metric_value: float | None) -> None:
+def _fire_alert(
+    db: Session,
+    alert: Alert,
+    metric_value: float | None,
+    pending: list[PendingAction] | None = None,
+    events: list[dict[str, Any]] | None = None,
+    now: datetime | None = None,
+) -> None:
     """Dispatch the configured action and record the event.
 
     Args:
         db: Active database session.
         alert: The firing :class:`Alert`.
         metric_value: The offending metric reading.
+        pending: Optional batch to append the action to; when ``None``
+            the action is dispatched immediately.
+        events: Optional buffer to append the history row to, for a later
+            :func:`~pingwatcher.db.queries.record_alert_events` call;
+            when ``None`` the row is added to *db* directly.
+        now: Trigger time; read from the module clock when ``None``.
     """
     message = (
         f"Alert {alert.id}: {alert.metric} {alert.operator} {alert.threshold} "
@@ -179,10 +382,25 @@ def _fire_alert(db: Session, alert: Alert, metric_value: float | None) -> None:
     )
     logger.warning(message)
 
-    alert.last_triggered_at = datetime.utcnow()
-    record_alert_event(db, alert, metric_value or 0.0, message)
+    if now is None:
+        now = _time_source()
+    alert.last_triggered_at = now
+    if events is not None:
+        events.append(
+            {
+                "alert_id": alert.id,
+                "target_id": alert.target_id,
+                "triggered_at": now,
+                "metric_value": metric_value or 0.0,
+                "message": message,
+            }
+        )
+    else:
+        record_alert_event(db, alert, metric_value or 0.0, message, commit=False, triggered_at=now)
 
-    # Dispatch via the appropriate action plugin.
-    from pingwatcher.alerts.actions import dispatch_action
+    if pending is not None:
+        pending.append((alert.action_type, alert.action_config, message))
+        return
 
+    # Dispatch via the appropriate action plugin.
     dispatch_action(alert.action_type, alert.action_config, message)
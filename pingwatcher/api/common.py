@@ -0,0 +1,29 @@
+"""Shared helpers for the REST API routers."""
+
+import functools
+from datetime import datetime
+
+try:  # Optional C-accelerated ISO-8601 parser.
+    from ciso8601 import parse_datetime as _parse_datetime  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - depends on the environment
+    _parse_datetime = datetime.fromisoformat
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_iso_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 query/body timestamp.
+
+    Uses :mod:`ciso8601` when installed and falls back to
+    :meth:`datetime.fromisoformat`.  Results are cached because the UI
+    re-sends the same handful of range boundaries on every poll.
+
+    Args:
+        value: ISO 8601 timestamp string.
+
+    Returns:
+        The parsed :class:`datetime`.
+
+    Raises:
+        ValueError: If *value* is not a valid ISO 8601 timestamp.
+    """
+    return _parse_datetime(value)
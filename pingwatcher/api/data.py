@@ -6,24 +6,25 @@ Endpoints
 * ``GET /api/targets/{id}/timeline``       — time-series for timeline graph.
 * ``GET /api/targets/{id}/route_changes``  — detected route changes.
 * ``GET /api/summary``                     — final-hop summary for all targets.
+* ``GET /api/metrics``                     — sampling-pipeline counters.
 """
 
-from datetime import datetime
 from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from pingwatcher.config import get_settings
+from pingwatcher.api.common import parse_iso_timestamp
+from pingwatcher.config import DEFAULTS
 from pingwatcher.db.models import get_db
 from pingwatcher.db.queries import (
+    TargetNotFound,
     get_all_hop_stats,
     get_route_changes,
     get_summary,
-    get_target,
     get_timeline_data,
 )
-from pingwatcher.engine.scheduler import latest_hop_stats
+from pingwatcher.engine.scheduler import latest_hop_stats, scheduler_metrics
 
 router = APIRouter(tags=["data"])
 
@@ -48,16 +49,17 @@ def api_hop_stats(
     Raises:
         HTTPException: 404 if the target does not exist.
     """
-    if get_target(db, target_id) is None:
-        raise HTTPException(status_code=404, detail="Target not found")
-    cfg = get_settings()
-    n = focus if focus is not None else cfg.default_focus
+    n = focus if focus is not None else DEFAULTS.focus
     # Return in-memory cache when requesting the default focus window —
-    # the scheduler keeps this current after every sample, so no DB query
-    # is needed for the common case.
-    if n == cfg.default_focus and target_id in latest_hop_stats:
+    # the scheduler keeps this current after every sample (and drops it
+    # when the target is deleted), so no DB query is needed for the
+    # common case.
+    if n == DEFAULTS.focus and target_id in latest_hop_stats:
         return latest_hop_stats[target_id]
-    return get_all_hop_stats(db, target_id, focus_n=n)
+    try:
+        return get_all_hop_stats(db, target_id, focus_n=n, ensure_target_exists=True)
+    except TargetNotFound:
+        raise HTTPException(status_code=404, detail="Target not found")
 
 
 @router.get("/api/targets/{target_id}/timeline")
@@ -84,15 +86,22 @@ def api_timeline(
     Raises:
         HTTPException: 404 if the target does not exist.
     """
-    if get_target(db, target_id) is None:
+    start_dt = parse_iso_timestamp(start) if start else None
+    end_dt = parse_iso_timestamp(end) if end else None
+    n = limit if limit is not None else DEFAULTS.timeline_points
+    try:
+        return get_timeline_data(
+            db,
+            target_id,
+            hop=hop,
+            start=start_dt,
+            end=end_dt,
+            limit=n,
+            ensure_target_exists=True,
+        )
+    except TargetNotFound:
         raise HTTPException(status_code=404, detail="Target not found")
 
-    cfg = get_settings()
-    start_dt = datetime.fromisoformat(start) if start else None
-    end_dt = datetime.fromisoformat(end) if end else None
-    n = limit if limit is not None else cfg.default_timeline_points
-    return get_timeline_data(db, target_id, hop=hop, start=start_dt, end=end_dt, limit=n)
-
 
 @router.get("/api/targets/{target_id}/route_changes")
 def api_route_changes(
@@ -111,9 +120,10 @@ def api_route_changes(
     Raises:
         HTTPException: 404 if the target does not exist.
     """
-    if get_target(db, target_id) is None:
+    try:
+        return get_route_changes(db, target_id, ensure_target_exists=True)
+    except TargetNotFound:
         raise HTTPException(status_code=404, detail="Target not found")
-    return get_route_changes(db, target_id)
 
 
 @router.get("/api/summary")
@@ -130,6 +140,16 @@ def api_summary(
     Returns:
         List of summary dictionaries, one per active target.
     """
-    cfg = get_settings()
-    n = focus if focus is not None else cfg.default_focus
+    n = focus if focus is not None else DEFAULTS.focus
     return get_summary(db, focus_n=n)
+
+
+@router.get("/api/metrics")
+def api_metrics() -> dict[str, Any]:
+    """Return in-process scheduler counters.
+
+    Returns:
+        The dictionary built by
+        :func:`~pingwatcher.engine.scheduler.scheduler_metrics`.
+    """
+    return scheduler_metrics()
@@ -8,17 +8,18 @@ Endpoints
 """
 
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import PlainTextResponse, JSONResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session as DbSession
 
+from pingwatcher.api.common import parse_iso_timestamp
 from pingwatcher.db.models import Session as SessionModel, get_db
-from pingwatcher.db.queries import get_target
-from pingwatcher.sessions.export import export_session_csv, export_session_json
+from pingwatcher.db.cache import target_exists
+from pingwatcher.sessions.export import export_session_json_bytes, iter_session_csv
 
 router = APIRouter(prefix="/api/targets/{target_id}/sessions", tags=["sessions"])
 
@@ -97,7 +98,7 @@ def api_list_sessions(target_id: str, db: DbSession = Depends(get_db)):
     Raises:
         HTTPException: 404 if the target does not exist.
     """
-    if get_target(db, target_id) is None:
+    if not target_exists(db, target_id):
         raise HTTPException(status_code=404, detail="Target not found")
 
     rows = (
@@ -128,15 +129,15 @@ def api_create_session(
     Raises:
         HTTPException: 404 if the target does not exist.
     """
-    if get_target(db, target_id) is None:
+    if not target_exists(db, target_id):
         raise HTTPException(status_code=404, detail="Target not found")
 
     session = SessionModel(
         id=str(uuid.uuid4()),
         target_id=target_id,
         name=body.name,
-        start_time=datetime.fromisoformat(body.start_time),
-        end_time=datetime.fromisoformat(body.end_time) if body.end_time else None,
+        start_time=parse_iso_timestamp(body.start_time),
+        end_time=parse_iso_timestamp(body.end_time) if body.end_time else None,
     )
     db.add(session)
     db.commit()
@@ -160,24 +161,35 @@ def api_export_session(
         db: Injected database session.
 
     Returns:
-        ``text/csv`` or ``application/json`` response body.
+        A streamed ``text/csv`` body or an ``application/json`` body.
 
     Raises:
         HTTPException: 404 if the target does not exist.  400 if the
             requested format is unsupported.
     """
-    if get_target(db, target_id) is None:
+    if not target_exists(db, target_id):
         raise HTTPException(status_code=404, detail="Target not found")
 
-    start_dt = datetime.fromisoformat(body.start_time)
-    end_dt = datetime.fromisoformat(body.end_time) if body.end_time else datetime.utcnow()
+    start_dt = parse_iso_timestamp(body.start_time)
+    if body.end_time:
+        end_dt = parse_iso_timestamp(body.end_time)
+    else:
+        end_dt = datetime.now(timezone.utc).replace(tzinfo=None)
 
     if body.format == "csv":
-        content = export_session_csv(db, target_id, start_dt, end_dt)
-        return PlainTextResponse(content, media_type="text/csv")
+
+        def _stream():
+            # The response body is produced after the request dependency
+            # has finished, so the generator owns closing the session.
+            try:
+                yield from iter_session_csv(db, target_id, start_dt, end_dt)
+            finally:
+                db.close()
+
+        return StreamingResponse(_stream(), media_type="text/csv")
     elif body.format == "json":
-        data = export_session_json(db, target_id, start_dt, end_dt)
-        return JSONResponse(content=data)
+        content = export_session_json_bytes(db, target_id, start_dt, end_dt)
+        return Response(content=content, media_type="application/json")
     else:
         raise HTTPException(status_code=400, detail="Unsupported format. Use 'csv' or 'json'.")
 
@@ -194,9 +206,10 @@ def _serialize_session(session: SessionModel) -> SessionResponse:
         session: The ORM instance.
 
     Returns:
-        A :class:`SessionResponse` Pydantic model.
+        A :class:`SessionResponse` Pydantic model (constructed without
+        validation; the row is already well-typed).
     """
-    return SessionResponse(
+    return SessionResponse.model_construct(
         id=session.id,
         target_id=session.target_id,
         name=session.name,
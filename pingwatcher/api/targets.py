@@ -15,7 +15,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from pingwatcher.config import get_settings
+from pingwatcher.config import DEFAULTS
 from pingwatcher.db.models import Target, get_db
 from pingwatcher.db.queries import (
     create_target,
@@ -100,16 +100,15 @@ def api_list_targets(db: Session = Depends(get_db)):
 @router.post("", response_model=TargetResponse, status_code=201)
 def api_create_target(body: TargetCreate, db: Session = Depends(get_db)):
     """Create a new target and immediately begin monitoring it."""
-    cfg = get_settings()
     target = Target(
         id=str(uuid.uuid4()),
         host=body.host,
         label=body.label,
-        trace_interval=body.trace_interval or cfg.default_trace_interval,
-        packet_type=body.packet_type or cfg.default_packet_type,
-        packet_size=body.packet_size or cfg.default_packet_size,
-        max_hops=body.max_hops or cfg.default_max_hops,
-        timeout=body.timeout or cfg.default_timeout,
+        trace_interval=body.trace_interval or DEFAULTS.trace_interval,
+        packet_type=body.packet_type or DEFAULTS.packet_type,
+        packet_size=body.packet_size or DEFAULTS.packet_size,
+        max_hops=body.max_hops or DEFAULTS.max_hops,
+        timeout=body.timeout or DEFAULTS.timeout,
         active=True,
     )
     target = create_target(db, target)
@@ -154,9 +153,11 @@ def _serialize_target(target: Target) -> TargetResponse:
         target: The ORM instance.
 
     Returns:
-        A :class:`TargetResponse` Pydantic model.
+        A :class:`TargetResponse` Pydantic model.  Built with
+        :meth:`~pydantic.BaseModel.model_construct` because the values come
+        from typed ORM columns and need no re-validation.
     """
-    return TargetResponse(
+    return TargetResponse.model_construct(
         id=target.id,
         host=target.host,
         label=target.label,
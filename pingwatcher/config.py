@@ -1,6 +1,9 @@
 """Application configuration via environment variables and defaults."""
 
+import dataclasses
+import functools
 from pathlib import Path
+from types import SimpleNamespace
 
 from pydantic_settings import BaseSettings
 
@@ -11,6 +14,12 @@ class Settings(BaseSettings):
     Attributes:
         database_url: SQLAlchemy connection string. Defaults to a local
             SQLite file in the project root.
+        pool_size: Persistent connections kept by the engine pool.  Sized
+            for the concurrently running trace jobs.
+        pool_max_overflow: Extra connections allowed beyond *pool_size*
+            under bursts.
+        insert_batch_size: Maximum sample rows per INSERT statement when
+            several traces are written together.
         default_trace_interval: Seconds between successive traceroute
             samples for new targets.
         default_packet_type: Probe type for new targets (``icmp``,
@@ -28,6 +37,9 @@ class Settings(BaseSettings):
     """
 
     database_url: str = "sqlite:///pingwatcher.db"
+    pool_size: int = 8
+    pool_max_overflow: int = 16
+    insert_batch_size: int = 500
     default_trace_interval: float = 2.5
     default_packet_type: str = "icmp"
     default_packet_size: int = 56
@@ -46,6 +58,8 @@ class Settings(BaseSettings):
     maintenance_interval_minutes: int = 30
     enable_rollups: bool = True
     enable_ws_summary_push: bool = True
+    ws_broadcast_tick_seconds: float = 0.2
+    trace_dispatch_tick_seconds: float = 0.2
     log_level: str = "INFO"
     host: str = "0.0.0.0"
     port: int = 8000
@@ -57,13 +71,97 @@ class Settings(BaseSettings):
     }
 
 
-def get_settings() -> Settings:
-    """Return a cached :class:`Settings` instance.
+@dataclasses.dataclass(frozen=True, slots=True)
+class FrozenSettings:
+    """Read-only, slotted copy of :class:`Settings` returned by :func:`get_settings`.
 
-    The instance is constructed once and reused for the lifetime of the
-    process.
+    Reading a slot is a plain descriptor lookup with none of pydantic's
+    per-access machinery, which matters on the per-trace hot paths.  The
+    fields mirror :class:`Settings` one for one (defaults live there
+    only); ``tests/test_config.py`` checks that the two stay in sync.
     """
-    return _settings
 
+    database_url: str
+    pool_size: int
+    pool_max_overflow: int
+    insert_batch_size: int
+    default_trace_interval: float
+    default_packet_type: str
+    default_packet_size: int
+    default_max_hops: int
+    default_timeout: float
+    default_inter_packet_delay: float
+    default_focus: int
+    default_timeline_points: int
+    probe_engine: str
+    scapy_enabled: bool
+    enable_dns_enrichment_worker: bool
+    dns_enrichment_batch_size: int
+    dns_enrichment_tick_seconds: float
+    raw_retention_days: int
+    rollup_after_hours: int
+    maintenance_interval_minutes: int
+    enable_rollups: bool
+    enable_ws_summary_push: bool
+    ws_broadcast_tick_seconds: float
+    trace_dispatch_tick_seconds: float
+    log_level: str
+    host: str
+    port: int
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> FrozenSettings:
+    """Return the cached, frozen application settings.
+
+    The environment and ``.env`` file are parsed on the first call, not at
+    import, and the snapshot is reused for the lifetime of the process.
+    Call ``get_settings.cache_clear()`` to force a re-read.
+    """
+    return FrozenSettings(**Settings().model_dump())
+
+
+class _Defaults(SimpleNamespace):
+    """Namespace that populates itself from the settings on first read."""
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes not set yet.
+        if self.__dict__:
+            raise AttributeError(name)
+        _fill_defaults(get_settings())
+        return getattr(self, name)
+
+
+#: Flat snapshot of the per-request defaults read by the API routers.
+#: Populated on first access and refreshed in place by
+#: :func:`reload_defaults` so modules holding a reference always see
+#: current values.
+DEFAULTS = _Defaults()
+
+
+def _fill_defaults(cfg: FrozenSettings) -> SimpleNamespace:
+    """Copy the per-request defaults from *cfg* into :data:`DEFAULTS`."""
+    DEFAULTS.focus = cfg.default_focus
+    DEFAULTS.timeline_points = cfg.default_timeline_points
+    DEFAULTS.trace_interval = cfg.default_trace_interval
+    DEFAULTS.packet_type = cfg.default_packet_type
+    DEFAULTS.packet_size = cfg.default_packet_size
+    DEFAULTS.max_hops = cfg.default_max_hops
+    DEFAULTS.timeout = cfg.default_timeout
+    return DEFAULTS
+
+
+def reload_defaults() -> SimpleNamespace:
+    """Re-read the settings and refresh :data:`DEFAULTS` from them.
+
+    The :func:`get_settings` cache is cleared first, so environment and
+    ``.env`` changes made since the last read are picked up.  Called
+    during application startup and available as an admin hook after
+    configuration changes.
+
+    Returns:
+        The (mutated in place) :data:`DEFAULTS` namespace.
+    """
+    get_settings.cache_clear()
+    return _fill_defaults(get_settings())
 
-_settings = Settings()
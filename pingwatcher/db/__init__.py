@@ -1,5 +1,5 @@
 """Database package — models, session factory, and query helpers."""
 
-from pingwatcher.db.models import Base, SessionLocal, engine, init_db
+from pingwatcher.db.models import Base, SessionLocal, get_engine, init_db
 
-__all__ = ["Base", "SessionLocal", "engine", "init_db"]
+__all__ = ["Base", "SessionLocal", "get_engine", "init_db"]
@@ -0,0 +1,76 @@
+"""Short-lived in-process caches for hot, rarely-changing lookups.
+
+Dashboards poll several endpoints per target every few seconds and each
+one starts with a "does this target exist?" probe.  :func:`target_exists`
+answers that from a small TTL cache; :func:`invalidate_target` is called
+by the create/delete helpers so answers never outlive a change made by
+this process.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from pingwatcher.db.models import Target
+
+#: Seconds a cached existence answer stays valid.
+TARGET_EXISTS_TTL = 5.0
+#: Maximum number of target IDs remembered.
+TARGET_EXISTS_MAXSIZE = 1024
+
+_lock = threading.Lock()
+_exists: "OrderedDict[str, tuple[float, bool]]" = OrderedDict()
+
+
+def _lookup(target_id: str, now: float) -> Optional[bool]:
+    """Return the cached answer for *target_id*, or ``None`` if absent or stale."""
+    entry = _exists.get(target_id)
+    if entry is None:
+        return None
+    expires_at, exists = entry
+    if expires_at <= now:
+        del _exists[target_id]
+        return None
+    _exists.move_to_end(target_id)
+    return exists
+
+
+def target_exists(db: Session, target_id: str) -> bool:
+    """Return whether *target_id* exists, consulting the TTL cache first.
+
+    Args:
+        db: Active database session (used only on a cache miss).
+        target_id: UUID-style target identifier.
+
+    Returns:
+        ``True`` if a :class:`Target` row with that ID exists.
+    """
+    now = time.monotonic()
+    with _lock:
+        cached = _lookup(target_id, now)
+    if cached is not None:
+        return cached
+
+    exists = db.query(Target.id).filter(Target.id == target_id).limit(1).first() is not None
+
+    with _lock:
+        _exists[target_id] = (now + TARGET_EXISTS_TTL, exists)
+        _exists.move_to_end(target_id)
+        while len(_exists) > TARGET_EXISTS_MAXSIZE:
+            _exists.popitem(last=False)
+    return exists
+
+
+def invalidate_target(target_id: str) -> None:
+    """Forget any cached existence answer for *target_id*."""
+    with _lock:
+        _exists.pop(target_id, None)
+
+
+def clear() -> None:
+    """Drop every cached entry."""
+    with _lock:
+        _exists.clear()
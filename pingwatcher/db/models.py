@@ -10,7 +10,10 @@ Tables
 * **sessions** — named time-range bookmarks for data export and replay.
 """
 
+import functools
+import json
 from datetime import datetime
+from typing import Any, Optional, Union
 
 from sqlalchemy import (
     Boolean,
@@ -20,14 +23,19 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    JSON,
     String,
-    Text,
     create_engine,
+    event,
     func,
+    inspect,
+    text,
 )
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import DeclarativeBase, relationship, sessionmaker
+from sqlalchemy.orm import Session as OrmSession
 
-from pingwatcher.config import get_settings
+from pingwatcher.config import FrozenSettings, Settings, get_settings
 
 
 class Base(DeclarativeBase):
@@ -104,7 +112,9 @@ class Sample(Base):
 
     __table_args__ = (
         Index("idx_samples_target_time", "target_id", "sampled_at"),
-        Index("idx_samples_target_hop", "target_id", "hop_number"),
+        # Serves the "last focus_n samples of a hop" lookups as a seek plus
+        # range scan, with no separate sort for ORDER BY sampled_at DESC.
+        Index("idx_samples_target_hop_time", "target_id", "hop_number", sampled_at.desc()),
     )
 
 
@@ -136,8 +146,8 @@ class RouteChange(Base):
         id: Auto-incrementing primary key.
         target_id: FK to the affected :class:`Target`.
         detected_at: Timestamp when the route change was noticed.
-        old_route: Comma-separated list of old hop IPs.
-        new_route: Comma-separated list of new hop IPs.
+        old_route: JSON array of the old hop IPs, in hop order.
+        new_route: JSON array of the new hop IPs, in hop order.
     """
 
     __tablename__ = "route_changes"
@@ -145,8 +155,8 @@ class RouteChange(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     target_id = Column(String, ForeignKey("targets.id", ondelete="CASCADE"), nullable=False)
     detected_at = Column(DateTime, nullable=False)
-    old_route = Column(Text, nullable=True)
-    new_route = Column(Text, nullable=True)
+    old_route = Column(JSON, nullable=True)
+    new_route = Column(JSON, nullable=True)
 
     target = relationship("Target", back_populates="route_changes")
 
@@ -167,7 +177,8 @@ class Alert(Base):
             specific IP address.
         action_type: Dispatch method — ``email``, ``webhook``,
             ``log``, ``command``.
-        action_config: JSON-encoded action-specific parameters.
+        action_config: Action-specific parameters, stored as JSON and
+            decoded to a ``dict`` on load.
         enabled: Whether the alert rule is active.
         last_triggered_at: Most recent trigger timestamp.
         consecutive_triggers: Running count of consecutive breaches.
@@ -184,7 +195,7 @@ class Alert(Base):
     duration_samples = Column(Integer, default=1)
     hop = Column(String, default="final")
     action_type = Column(String, nullable=False)
-    action_config = Column(Text, nullable=True)
+    action_config = Column(JSON, nullable=True)
     enabled = Column(Boolean, default=True)
     last_triggered_at = Column(DateTime, nullable=True)
     consecutive_triggers = Column(Integer, default=0)
@@ -193,6 +204,17 @@ class Alert(Base):
     target = relationship("Target", back_populates="alerts")
     history = relationship("AlertHistory", back_populates="alert", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Partial index matching get_active_alerts(): only enabled rules are
+        # indexed, so the lookup is a seek on target_id with no filter.
+        Index(
+            "idx_alerts_active_target",
+            "target_id",
+            sqlite_where=text("enabled = 1"),
+            postgresql_where=text("enabled = true"),
+        ),
+    )
+
 
 class AlertHistory(Base):
     """Audit row created each time an :class:`Alert` fires or resolves.
@@ -248,18 +270,169 @@ class Session(Base):
 # Engine / session factory
 # ---------------------------------------------------------------------------
 
-_cfg = get_settings()
-engine = create_engine(
-    _cfg.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in _cfg.database_url else {},
-    echo=False,
+# Applied to every new SQLite connection.  WAL lets the API read while the
+# scheduler writes, and synchronous=NORMAL drops the per-commit fsync that
+# the default rollback journal pays on every trace sample.
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
 )
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def _set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    """Tune a freshly opened SQLite connection for the write-heavy workload.
+
+    Args:
+        dbapi_connection: Raw ``sqlite3`` connection from the pool.
+        _connection_record: Pool bookkeeping record (unused).
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _engine_options(cfg: Union[FrozenSettings, Settings]) -> dict[str, Any]:
+    """Return :func:`create_engine` keyword arguments for *cfg*.
+
+    File-backed databases get a pool large enough for the concurrent
+    trace jobs plus API requests.  SQLite connections also wait up to
+    30 s on a locked database instead of failing immediately.  In-memory
+    SQLite keeps SQLAlchemy's default single-connection pool.
+
+    Args:
+        cfg: Application settings.
+
+    Returns:
+        Keyword arguments for :func:`sqlalchemy.create_engine`.
+    """
+    url = make_url(cfg.database_url)
+    if url.get_backend_name() != "sqlite":
+        options: dict[str, Any] = {
+            "pool_size": cfg.pool_size,
+            "max_overflow": cfg.pool_max_overflow,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        }
+        if url.get_driver_name() == "psycopg2":
+            # Multi-row VALUES for plain INSERTs, execute_batch for the rest.
+            options["executemany_mode"] = "values_plus_batch"
+        return options
+    options = {"connect_args": {"check_same_thread": False}}
+    if url.database not in (None, "", ":memory:"):
+        options["connect_args"]["timeout"] = 30
+        options["pool_size"] = cfg.pool_size
+        options["max_overflow"] = cfg.pool_max_overflow
+    return options
+
+
+@functools.lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """Return the process-wide engine, creating it on first use.
+
+    Building the engine lazily means importing this module does not read
+    the settings, so ``PINGWATCHER_DATABASE_URL`` may be set any time
+    before the first session is opened.
+
+    Returns:
+        The shared :class:`sqlalchemy.engine.Engine`.
+    """
+    cfg = get_settings()
+    eng = create_engine(cfg.database_url, echo=False, **_engine_options(cfg))
+    if "sqlite" in cfg.database_url:
+        event.listen(eng, "connect", _set_sqlite_pragmas)
+    return eng
+
+
+class _AppSession(OrmSession):
+    """ORM session that falls back to :func:`get_engine` when unbound."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.bind is None:
+            self.bind = get_engine()
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+SessionLocal = sessionmaker(class_=_AppSession, autoflush=False, autocommit=False)
+
+
+def __getattr__(name: str) -> Any:
+    # ``engine`` used to be a module global; keep ``models.engine`` working.
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Indexes superseded by a wider one; dropped from existing databases.
+_OBSOLETE_INDEXES = ("idx_samples_target_hop",)
+
+# route_changes columns that older releases stored as comma-separated text.
+_ROUTE_COLUMNS = ("old_route", "new_route")
+
+
+def _migrate_route_csv(conn) -> None:
+    """Rewrite legacy comma-separated route columns as JSON arrays.
+
+    Only columns that are still textual in the live schema are touched;
+    tables created with the current models already hold JSON.  On
+    PostgreSQL the rewritten columns are then converted to ``json`` so
+    the driver decodes them; SQLite stores JSON as text either way.
+
+    Args:
+        conn: Connection inside the :func:`init_db` transaction.
+    """
+    live_types = {col["name"]: col["type"] for col in inspect(conn).get_columns("route_changes")}
+    columns = [name for name in _ROUTE_COLUMNS if isinstance(live_types.get(name), String)]
+    if not columns:
+        return
+    legacy = conn.execute(
+        text(
+            f"SELECT id, {', '.join(columns)} FROM route_changes WHERE "
+            + " OR ".join(f"CAST({name} AS TEXT) NOT LIKE '[%'" for name in columns)
+        )
+    ).all()
+    assignments = ", ".join(f"{name} = :{name}" for name in columns)
+    for row_id, *values in legacy:
+        conn.execute(
+            text(f"UPDATE route_changes SET {assignments} WHERE id = :id"),
+            {"id": row_id, **{name: _csv_route_json(v) for name, v in zip(columns, values)}},
+        )
+    if conn.dialect.name == "postgresql":
+        for name in columns:
+            conn.execute(
+                text(
+                    f"ALTER TABLE route_changes ALTER COLUMN {name} TYPE json USING {name}::json"
+                )
+            )
+
+
+def _csv_route_json(value: Optional[str]) -> Optional[str]:
+    """Convert one stored route value to its JSON-array form."""
+    if value is None or value.startswith("["):
+        return value
+    return json.dumps(value.split(",") if value else [])
 
 
 def init_db() -> None:
-    """Create all tables that do not yet exist."""
+    """Create all tables that do not yet exist and bring indexes up to date.
+
+    ``create_all`` skips tables that already exist, so indexes added to a
+    model later are created here individually.
+    """
+    engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for name in _OBSOLETE_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        _migrate_route_csv(conn)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
 
 
 def get_db():
@@ -6,15 +6,29 @@ caller controls transaction scope (typically injected via FastAPI's
 """
 
 from collections import defaultdict
-from datetime import datetime, timedelta
-from typing import Any, Optional
-
-from itertools import groupby
-
-from sqlalchemy import desc, distinct, func, text
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, Mapping, Optional, Sequence, Union
+
+from sqlalchemy import (
+    Integer,
+    String,
+    case,
+    cast,
+    desc,
+    distinct,
+    extract,
+    func,
+    insert,
+    lambda_stmt,
+    select,
+    text,
+    update,
+)
 from sqlalchemy.orm import Session
 
 from pingwatcher.config import get_settings
+from pingwatcher.db import stats_cache
+from pingwatcher.db.cache import invalidate_target
 from pingwatcher.db.models import (
     Alert,
     AlertHistory,
@@ -25,6 +39,25 @@ from pingwatcher.db.models import (
 )
 
 
+def utcnow() -> datetime:
+    """Return the current UTC time as a naive datetime.
+
+    Timestamp columns are stored naive-in-UTC; this is the non-deprecated
+    equivalent of ``datetime.utcnow()``.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class TargetNotFound(LookupError):
+    """Raised by query helpers called with ``ensure_target_exists=True``
+    when the requested target does not exist."""
+
+
+def _target_exists(db: Session, target_id: str) -> bool:
+    """Return ``True`` when a :class:`Target` row with *target_id* exists."""
+    return db.query(Target.id).filter(Target.id == target_id).first() is not None
+
+
 # ---------------------------------------------------------------------------
 # Target helpers
 # ---------------------------------------------------------------------------
@@ -39,7 +72,8 @@ def list_targets(db: Session) -> list[Target]:
     Returns:
         List of :class:`Target` rows, newest first.
     """
-    return db.query(Target).order_by(desc(Target.created_at)).all()
+    stmt = lambda_stmt(lambda: select(Target).order_by(desc(Target.created_at)))
+    return list(db.execute(stmt).scalars())
 
 
 def get_target(db: Session, target_id: str) -> Optional[Target]:
@@ -52,7 +86,9 @@ def get_target(db: Session, target_id: str) -> Optional[Target]:
     Returns:
         The :class:`Target` row, or ``None`` if not found.
     """
-    return db.query(Target).filter(Target.id == target_id).first()
+    # Primary-key lookup: answered from the identity map when the row is
+    # already loaded in this session, otherwise a single cached SELECT.
+    return db.get(Target, target_id)
 
 
 def create_target(db: Session, target: Target) -> Target:
@@ -68,6 +104,7 @@ def create_target(db: Session, target: Target) -> Target:
     db.add(target)
     db.commit()
     db.refresh(target)
+    invalidate_target(target.id)
     return target
 
 
@@ -87,6 +124,8 @@ def delete_target(db: Session, target_id: str) -> bool:
         return False
     db.delete(target)
     db.commit()
+    invalidate_target(target_id)
+    stats_cache.forget(target_id)
     return True
 
 
@@ -95,15 +134,190 @@ def delete_target(db: Session, target_id: str) -> bool:
 # ---------------------------------------------------------------------------
 
 
-def store_sample(db: Session, samples: list[Sample]) -> None:
-    """Bulk-insert a list of :class:`Sample` rows for one trace run.
+_SAMPLE_COLUMNS = (
+    "target_id",
+    "sampled_at",
+    "hop_number",
+    "ip",
+    "dns",
+    "rtt_ms",
+    "is_timeout",
+)
+
+# Built once: every flush executes the same Core statement, so its
+# compiled form is looked up in the engine cache instead of rebuilt.
+_INSERT_SAMPLE = insert(Sample)
+
+
+def _sample_row(sample: Union[Sample, Mapping[str, Any]]) -> dict[str, Any]:
+    """Return the insert parameters for one sample.
+
+    ORM instances are read attribute by attribute; mappings are copied
+    as-is.  A missing ``is_timeout`` falls back to the column default so
+    every row carries the same keys for the multi-row INSERT.
+    """
+    if isinstance(sample, Mapping):
+        row = {col: sample.get(col) for col in _SAMPLE_COLUMNS}
+    else:
+        row = {col: getattr(sample, col) for col in _SAMPLE_COLUMNS}
+    if row["is_timeout"] is None:
+        row["is_timeout"] = False
+    return row
+
+
+def store_sample(
+    db: Session,
+    samples: Sequence[Union[Sample, Mapping[str, Any]]],
+) -> None:
+    """Bulk-insert the sample rows for one trace run.
+
+    Rows are written with a single Core ``INSERT`` instead of the ORM
+    unit of work, so no identity-map or attribute-history bookkeeping is
+    done per hop.
+
+    Args:
+        db: Active database session.
+        samples: One row per hop, either transient :class:`Sample`
+            instances or column dictionaries.
+    """
+    store_samples_bulk(db, [_sample_row(s) for s in samples])
+
+
+def store_samples_bulk(
+    db: Session,
+    rows: Sequence[Mapping[str, Any]],
+    batch_size: Optional[int] = None,
+) -> None:
+    """Insert sample rows from any number of targets in one transaction.
+
+    Rows are sent against the Core ``samples`` table rather than the
+    mapped class, which skips the ORM bulk-insert bookkeeping.  They go
+    in executemany chunks of *batch_size*, are committed once at the end,
+    and are then appended to the in-memory hop windows of
+    :mod:`pingwatcher.db.stats_cache`.
 
     Args:
         db: Active database session.
-        samples: Pre-populated sample rows (one per hop).
+        rows: Column dictionaries carrying every key in
+            :data:`_SAMPLE_COLUMNS`.
+        batch_size: Rows per INSERT; defaults to the
+            ``insert_batch_size`` setting.
     """
-    db.add_all(samples)
+    if not rows:
+        return
+    size = batch_size or get_settings().insert_batch_size
+    for start in range(0, len(rows), size):
+        db.execute(_INSERT_SAMPLE, rows[start : start + size])
     db.commit()
+    stats_cache.record(rows)
+
+
+def _round2(value: Optional[float]) -> Optional[float]:
+    """Round a latency to two decimals, passing ``None`` through."""
+    return round(value, 2) if value is not None else None
+
+
+# ``{hop_filter}`` narrows the window to one hop for get_hop_stats so the
+# (target_id, hop_number, sampled_at DESC) index serves it directly.
+_HOP_STATS_SQL = """
+    WITH recent AS (
+        SELECT hop_number, ip, dns, rtt_ms, is_timeout,
+               ROW_NUMBER() OVER (
+                   PARTITION BY hop_number ORDER BY sampled_at DESC
+               ) AS rn
+        FROM samples
+        WHERE target_id = :target_id{hop_filter}
+    )
+    SELECT r.hop_number,
+           COUNT(r.rn) AS total,
+           SUM(CASE WHEN r.is_timeout THEN 1 ELSE 0 END) AS lost,
+           AVG(CASE WHEN r.is_timeout THEN NULL ELSE r.rtt_ms END) AS avg_ms,
+           MIN(CASE WHEN r.is_timeout THEN NULL ELSE r.rtt_ms END) AS min_ms,
+           MAX(CASE WHEN r.is_timeout THEN NULL ELSE r.rtt_ms END) AS max_ms,
+           MAX(CASE WHEN r.rn = 1 AND NOT r.is_timeout THEN r.rtt_ms END) AS cur_ms,
+           MAX(CASE WHEN r.rn = 1 THEN r.ip END) AS ip,
+           MAX(CASE WHEN r.rn = 1 THEN r.dns END) AS dns
+    {source}
+    GROUP BY r.hop_number
+    ORDER BY r.hop_number
+"""
+_HOP_STATS_ONE_SQL = text(
+    _HOP_STATS_SQL.format(
+        hop_filter=" AND hop_number = :hop_number",
+        source="FROM recent r WHERE r.rn <= :focus_n",
+    )
+)
+_HOP_STATS_UNCHECKED_SQL = text(
+    _HOP_STATS_SQL.format(hop_filter="", source="FROM recent r WHERE r.rn <= :focus_n")
+)
+# LEFT JOINed from ``targets`` so a missing target (no rows) is
+# distinguishable from a target without samples (one NULL-hop row).
+_HOP_STATS_CHECKED_SQL = text(
+    _HOP_STATS_SQL.format(
+        hop_filter="",
+        source=(
+            "FROM targets t LEFT JOIN recent r ON r.rn <= :focus_n "
+            "WHERE t.id = :target_id"
+        ),
+    )
+)
+
+
+# Raw rows of every hop's most recent window, used to seed stats_cache.
+_HOP_WINDOW_SQL = text(
+    """
+    SELECT hop_number, ip, dns, rtt_ms, is_timeout
+    FROM (
+        SELECT hop_number, ip, dns, rtt_ms, is_timeout, sampled_at,
+               ROW_NUMBER() OVER (
+                   PARTITION BY hop_number ORDER BY sampled_at DESC
+               ) AS rn
+        FROM samples
+        WHERE target_id = :target_id
+    ) recent
+    WHERE rn <= :window
+    ORDER BY hop_number, sampled_at
+"""
+)
+
+
+def _cached_hop_stats(db: Session, target_id: str, focus_n: int) -> Optional[list[dict[str, Any]]]:
+    """Serve hop statistics from :mod:`~pingwatcher.db.stats_cache`.
+
+    A cold target is seeded from :data:`_HOP_WINDOW_SQL` first.  Returns
+    ``None`` when the caller must fall back to the aggregate SQL: the
+    window is deeper than the cache keeps, the target has no samples
+    (so its existence is still unknown), or a concurrent write beat
+    the seed.
+    """
+    if focus_n > stats_cache.MAX_FOCUS_N:
+        return None
+    stats = stats_cache.hop_stats(target_id, focus_n)
+    if stats is not None:
+        return stats
+    seen = stats_cache.generation(target_id)
+    rows = (
+        db.execute(_HOP_WINDOW_SQL, {"target_id": target_id, "window": stats_cache.MAX_FOCUS_N})
+        .mappings()
+        .all()
+    )
+    if not rows or not stats_cache.seed(target_id, seen, rows):
+        return None
+    return stats_cache.hop_stats(target_id, focus_n)
+
+
+def _hop_stats_row(row: Any) -> dict[str, Any]:
+    """Shape one :data:`_HOP_STATS_SQL` result row into a hop-stats dict."""
+    return {
+        "hop": row["hop_number"],
+        "ip": row["ip"],
+        "dns": row["dns"],
+        "avg_ms": _round2(row["avg_ms"]),
+        "min_ms": _round2(row["min_ms"]),
+        "max_ms": _round2(row["max_ms"]),
+        "cur_ms": _round2(row["cur_ms"]),
+        "packet_loss_pct": round((row["lost"] or 0) / row["total"] * 100, 1),
+    }
 
 
 def get_hop_stats(
@@ -114,7 +328,9 @@ def get_hop_stats(
 ) -> dict[str, Any]:
     """Compute aggregated statistics for the last *focus_n* samples of a hop.
 
-    This replicates PingPlotter's *Focus* window.
+    This replicates PingPlotter's *Focus* window.  Warm targets are
+    answered from the in-memory hop windows; otherwise the aggregation
+    runs in SQL and only the single result row is returned to Python.
 
     Args:
         db: Active database session.
@@ -126,15 +342,20 @@ def get_hop_stats(
         Dictionary with keys ``avg_ms``, ``min_ms``, ``max_ms``,
         ``cur_ms``, ``packet_loss_pct``, ``ip``, and ``dns``.
     """
-    rows = (
-        db.query(Sample)
-        .filter(Sample.target_id == target_id, Sample.hop_number == hop_number)
-        .order_by(desc(Sample.sampled_at))
-        .limit(focus_n)
-        .all()
+    cached = stats_cache.hop_stats(target_id, focus_n)
+    if cached is not None:
+        for stats in cached:
+            if stats["hop"] == hop_number:
+                return stats
+    row = (
+        db.execute(
+            _HOP_STATS_ONE_SQL,
+            {"target_id": target_id, "hop_number": hop_number, "focus_n": focus_n},
+        )
+        .mappings()
+        .first()
     )
-
-    if not rows:
+    if row is None:
         return {
             "hop": hop_number,
             "ip": None,
@@ -145,95 +366,204 @@ def get_hop_stats(
             "cur_ms": None,
             "packet_loss_pct": 0.0,
         }
-
-    valid_rtts = [r.rtt_ms for r in rows if not r.is_timeout and r.rtt_ms is not None]
-    total = len(rows)
-    lost = sum(1 for r in rows if r.is_timeout)
-
-    # Use the most recent row for IP / DNS display.
-    latest = rows[0]
-
-    latest_cur = None if latest.is_timeout or latest.rtt_ms is None else round(latest.rtt_ms, 2)
-
-    return {
-        "hop": hop_number,
-        "ip": latest.ip,
-        "dns": latest.dns,
-        "avg_ms": round(sum(valid_rtts) / len(valid_rtts), 2) if valid_rtts else None,
-        "min_ms": round(min(valid_rtts), 2) if valid_rtts else None,
-        "max_ms": round(max(valid_rtts), 2) if valid_rtts else None,
-        "cur_ms": latest_cur,
-        "packet_loss_pct": round(lost / total * 100, 1) if total else 0.0,
-    }
+    return _hop_stats_row(row)
 
 
 def get_all_hop_stats(
     db: Session,
     target_id: str,
     focus_n: int = 10,
+    ensure_target_exists: bool = False,
 ) -> list[dict[str, Any]]:
     """Return per-hop statistics for every hop seen on *target_id*.
 
-    Uses a single window-function query to fetch the last *focus_n* rows
-    per hop in one round-trip, replacing the previous N+1 query loop.
+    Warm targets are answered from the in-memory hop windows of
+    :mod:`pingwatcher.db.stats_cache`, seeding them on first use.
+    Otherwise the focus window and the aggregates are both computed in
+    SQL, so one statement returns exactly one row per hop.
 
     Args:
         db: Active database session.
         target_id: UUID-style target identifier.
         focus_n: Number of recent samples per hop.
+        ensure_target_exists: Join against ``targets`` in the same query
+            and raise :class:`TargetNotFound` when the target is missing.
 
     Returns:
         List of per-hop stat dictionaries sorted by hop number.
+
+    Raises:
+        TargetNotFound: If *ensure_target_exists* is set and the target
+            does not exist.
     """
-    sql = text(
-        """
-        SELECT hop_number, ip, dns, rtt_ms, is_timeout
-        FROM (
-            SELECT hop_number, ip, dns, rtt_ms, is_timeout,
-                   ROW_NUMBER() OVER (
-                       PARTITION BY hop_number ORDER BY sampled_at DESC
-                   ) AS rn
-            FROM samples
-            WHERE target_id = :target_id
-        ) sub
-        WHERE rn <= :focus_n
-        ORDER BY hop_number, rn
-        """
-    )
-    rows = db.execute(sql, {"target_id": target_id, "focus_n": focus_n}).mappings().fetchall()
+    cached = _cached_hop_stats(db, target_id, focus_n)
+    if cached is not None:
+        return cached
+
+    sql = _HOP_STATS_CHECKED_SQL if ensure_target_exists else _HOP_STATS_UNCHECKED_SQL
+    rows = db.execute(sql, {"target_id": target_id, "focus_n": focus_n}).mappings().all()
 
     if not rows:
+        if ensure_target_exists:
+            raise TargetNotFound(target_id)
         return []
 
-    result = []
-    for hop_num, group in groupby(rows, key=lambda r: r["hop_number"]):
-        hop_rows = list(group)
-        valid_rtts = [
-            r["rtt_ms"]
-            for r in hop_rows
-            if not r["is_timeout"] and r["rtt_ms"] is not None
-        ]
-        total = len(hop_rows)
-        lost = sum(1 for r in hop_rows if r["is_timeout"])
-        latest = hop_rows[0]  # rn=1 → most recent
-        cur = (
-            None
-            if (latest["is_timeout"] or latest["rtt_ms"] is None)
-            else round(latest["rtt_ms"], 2)
+    return [_hop_stats_row(row) for row in rows if row["hop_number"] is not None]
+
+
+#: Rows fetched per round-trip when streaming timeline points.
+_TIMELINE_BATCH = 500
+
+
+def _sqlite_iso(column: Any) -> Any:
+    """Render a SQLite ``DATETIME`` column exactly as ``datetime.isoformat()``.
+
+    SQLAlchemy stores SQLite datetimes as ``YYYY-MM-DD HH:MM:SS.ffffff``;
+    ``isoformat()`` uses a ``T`` separator and omits an all-zero fraction.
+    """
+    raw = cast(column, String)
+    iso = func.replace(raw, " ", "T")
+    return case((func.substr(raw, 21) == "000000", func.substr(iso, 1, 19)), else_=iso)
+
+
+def _raw_points(db: Session, filters: list[Any], as_text: bool) -> Iterator[dict[str, Any]]:
+    """Yield one timeline point per raw sample matching *filters*.
+
+    Only the plotted columns are selected, so rows come back as plain
+    tuples rather than ORM instances, and they are fetched in batches of
+    :data:`_TIMELINE_BATCH` instead of all at once.
+    """
+    rows = (
+        db.query(
+            _sqlite_iso(Sample.sampled_at) if as_text else Sample.sampled_at,
+            Sample.rtt_ms,
+            Sample.is_timeout,
         )
-        result.append(
-            {
-                "hop": hop_num,
-                "ip": latest["ip"],
-                "dns": latest["dns"],
-                "avg_ms": round(sum(valid_rtts) / len(valid_rtts), 2) if valid_rtts else None,
-                "min_ms": round(min(valid_rtts), 2) if valid_rtts else None,
-                "max_ms": round(max(valid_rtts), 2) if valid_rtts else None,
-                "cur_ms": cur,
-                "packet_loss_pct": round(lost / total * 100, 1) if total else 0.0,
+        .filter(*filters)
+        .order_by(Sample.sampled_at)
+        .yield_per(_TIMELINE_BATCH)
+    )
+    if as_text:
+        for ts, rtt, is_timeout in rows:
+            yield {"timestamp": ts, "rtt_ms": rtt, "is_timeout": is_timeout}
+    else:
+        for ts, rtt, is_timeout in rows:
+            yield {
+                "timestamp": ts.isoformat() if ts else None,
+                "rtt_ms": rtt,
+                "is_timeout": is_timeout,
             }
+
+
+def _time_bucket(column: Any, start: datetime, end: datetime, buckets: int) -> Any:
+    """Return the index of the equal-width slice of ``[start, end]`` holding *column*."""
+    width = (end - start).total_seconds() / buckets
+    start_epoch = (start - datetime(1970, 1, 1)).total_seconds()
+    offset = cast((extract("epoch", column) - start_epoch) / width, Integer)
+    # Values stamped exactly at *end* belong to the last slice.
+    return case((offset >= buckets, buckets - 1), else_=offset)
+
+
+def _downsampled_points(
+    db: Session,
+    filters: list[Any],
+    start: datetime,
+    end: datetime,
+    buckets: int,
+    as_text: bool,
+) -> list[dict[str, Any]]:
+    """Aggregate raw samples into at most *buckets* equal time slices.
+
+    Each slice reports its first timestamp and mean non-timeout RTT, and
+    counts as a timeout only when every sample in it timed out, which
+    matches the hourly rollup points.
+
+    Args:
+        db: Active database session.
+        filters: Criteria selecting the raw samples.
+        start: Lower bound of the window (naive UTC).
+        end: Upper bound of the window (naive UTC).
+        buckets: Number of slices to divide the window into.
+        as_text: Format timestamps in SQL (SQLite only).
+
+    Returns:
+        Timeline point dictionaries in chronological order.
+    """
+    bucket = _time_bucket(Sample.sampled_at, start, end, buckets)
+    first_ts = func.min(Sample.sampled_at)
+    rows = (
+        db.query(
+            _sqlite_iso(first_ts) if as_text else first_ts,
+            func.avg(case((Sample.is_timeout, None), else_=Sample.rtt_ms)),
+            func.count(Sample.id),
+            func.sum(case((Sample.is_timeout, 1), else_=0)),
         )
-    return result
+        .filter(*filters)
+        .group_by(bucket)
+        .order_by(bucket)
+        .all()
+    )
+    return [
+        {
+            "timestamp": ts if as_text or ts is None else ts.isoformat(),
+            "rtt_ms": avg_rtt,
+            "is_timeout": bool(count and timeouts == count),
+        }
+        for ts, avg_rtt, count, timeouts in rows
+    ]
+
+
+def _downsampled_rollup_points(
+    db: Session,
+    filters: list[Any],
+    start: datetime,
+    end: datetime,
+    buckets: int,
+    as_text: bool,
+) -> list[dict[str, Any]]:
+    """Merge hourly rollups into at most *buckets* equal time slices.
+
+    Slice means are weighted by each rollup's non-timeout sample count,
+    so merging gives the same RTT as bucketing the raw samples would.
+
+    Args:
+        db: Active database session.
+        filters: Criteria selecting the rollup rows.
+        start: Lower bound of the window (naive UTC).
+        end: Upper bound of the window (naive UTC).
+        buckets: Number of slices to divide the window into.
+        as_text: Format timestamps in SQL (SQLite only).
+
+    Returns:
+        Timeline point dictionaries in chronological order.
+    """
+    bucket = _time_bucket(SampleHourly.bucket_start, start, end, buckets)
+    first_ts = func.min(SampleHourly.bucket_start)
+    rtt_weight = case(
+        (SampleHourly.avg_rtt_ms.is_(None), 0),
+        else_=SampleHourly.sample_count - SampleHourly.timeout_count,
+    )
+    rows = (
+        db.query(
+            _sqlite_iso(first_ts) if as_text else first_ts,
+            func.sum(SampleHourly.avg_rtt_ms * rtt_weight),
+            func.sum(rtt_weight),
+            func.sum(SampleHourly.sample_count),
+            func.sum(SampleHourly.timeout_count),
+        )
+        .filter(*filters)
+        .group_by(bucket)
+        .order_by(bucket)
+        .all()
+    )
+    return [
+        {
+            "timestamp": ts if as_text or ts is None else ts.isoformat(),
+            "rtt_ms": weighted / weight if weight else None,
+            "is_timeout": bool(count and timeouts == count),
+        }
+        for ts, weighted, weight, count, timeouts in rows
+    ]
 
 
 def get_timeline_data(
@@ -243,6 +573,7 @@ def get_timeline_data(
     start: Optional[datetime] = None,
     end: Optional[datetime] = None,
     limit: Optional[int] = None,
+    ensure_target_exists: bool = False,
 ) -> list[dict[str, Any]]:
     """Retrieve time-series latency data for the timeline graph.
 
@@ -252,23 +583,42 @@ def get_timeline_data(
         hop: ``"last"`` for the final hop, or a stringified hop number.
         start: Optional lower bound on ``sampled_at``.
         end: Optional upper bound on ``sampled_at``.
+        limit: Maximum number of points.  Without *start* the newest
+            points are kept; with *start* the whole range is kept and
+            downsampled to fit.
+        ensure_target_exists: Raise :class:`TargetNotFound` when the
+            target is missing.  The check rides on the max-hop query for
+            ``hop="last"`` and only costs a query when no points match.
 
     Returns:
         List of dictionaries with ``timestamp``, ``rtt_ms``, and
         ``is_timeout`` suitable for Plotly consumption.
+
+    Raises:
+        TargetNotFound: If *ensure_target_exists* is set and the target
+            does not exist.
     """
     if hop == "last":
         max_hop_raw = (
             db.query(func.max(Sample.hop_number))
             .filter(Sample.target_id == target_id)
-            .scalar()
+            .scalar_subquery()
         )
         max_hop_rollup = (
             db.query(func.max(SampleHourly.hop_number))
             .filter(SampleHourly.target_id == target_id)
-            .scalar()
+            .scalar_subquery()
         )
-        candidates = [h for h in (max_hop_raw, max_hop_rollup) if h is not None]
+        row = (
+            db.query(Target.id, max_hop_raw, max_hop_rollup)
+            .filter(Target.id == target_id)
+            .first()
+        )
+        if row is None:
+            if ensure_target_exists:
+                raise TargetNotFound(target_id)
+            return []
+        candidates = [h for h in (row[1], row[2]) if h is not None]
         if not candidates:
             return []
         hop_number = max(candidates)
@@ -276,58 +626,164 @@ def get_timeline_data(
         hop_number = int(hop)
 
     cfg = get_settings()
-    cutoff = datetime.utcnow() - timedelta(hours=cfg.rollup_after_hours)
+    now = utcnow()
+    cutoff = now - timedelta(hours=cfg.rollup_after_hours)
     start_eff = start
-    end_eff = end or datetime.utcnow()
+    end_eff = end or now
     points: list[dict[str, Any]] = []
 
+    # On SQLite the stored text is reshaped into isoformat() in SQL, so no
+    # datetime is parsed and re-formatted per point in Python.
+    as_text = db.get_bind().dialect.name == "sqlite"
+
     # Rollup segment for older windows.
     if cfg.enable_rollups and start_eff is not None and start_eff < cutoff:
         rollup_end = min(end_eff, cutoff)
-        rollups_q = db.query(SampleHourly).filter(
+        rollup_filters = [
             SampleHourly.target_id == target_id,
             SampleHourly.hop_number == hop_number,
             SampleHourly.bucket_start >= start_eff,
             SampleHourly.bucket_start <= rollup_end,
-        )
-        rollups = rollups_q.order_by(SampleHourly.bucket_start).all()
-        points.extend(
-            {
-                "timestamp": r.bucket_start.isoformat() if r.bucket_start else None,
-                "rtt_ms": r.avg_rtt_ms,
-                "is_timeout": bool(r.sample_count and r.timeout_count == r.sample_count),
-            }
-            for r in rollups
-        )
+        ]
+        # The rollups get the share of the point budget their span covers,
+        # so the raw segment after them is never starved.
+        rollup_budget = None
+        if limit is not None and end_eff > start_eff:
+            share = (rollup_end - start_eff) / (end_eff - start_eff)
+            rollup_budget = max(1, int(limit * share))
+            if end_eff > rollup_end:
+                rollup_budget = min(rollup_budget, max(1, limit - 1))
+        if (
+            rollup_budget is not None
+            and rollup_end > start_eff
+            and db.query(func.count(SampleHourly.id)).filter(*rollup_filters).scalar()
+            > rollup_budget
+        ):
+            points.extend(
+                _downsampled_rollup_points(
+                    db, rollup_filters, start_eff, rollup_end, rollup_budget, as_text
+                )
+            )
+        else:
+            rollups_q = db.query(
+                _sqlite_iso(SampleHourly.bucket_start) if as_text else SampleHourly.bucket_start,
+                SampleHourly.avg_rtt_ms,
+                SampleHourly.sample_count,
+                SampleHourly.timeout_count,
+            ).filter(*rollup_filters)
+            rollups = rollups_q.order_by(SampleHourly.bucket_start).yield_per(_TIMELINE_BATCH)
+            points.extend(
+                {
+                    "timestamp": ts if as_text or ts is None else ts.isoformat(),
+                    "rtt_ms": avg_rtt,
+                    "is_timeout": bool(count and timeouts == count),
+                }
+                for ts, avg_rtt, count, timeouts in rollups
+            )
         start_eff = cutoff
 
     # Raw segment for recent windows.
-    query = db.query(Sample).filter(
-        Sample.target_id == target_id,
-        Sample.hop_number == hop_number,
-    )
+    raw_filters = [Sample.target_id == target_id, Sample.hop_number == hop_number]
     if start_eff:
-        query = query.filter(Sample.sampled_at >= start_eff)
+        raw_filters.append(Sample.sampled_at >= start_eff)
     if end_eff:
-        query = query.filter(Sample.sampled_at <= end_eff)
-
-    raw_rows = query.order_by(Sample.sampled_at).all()
-    points.extend(
-        {
-            "timestamp": r.sampled_at.isoformat() if r.sampled_at else None,
-            "rtt_ms": r.rtt_ms,
-            "is_timeout": r.is_timeout,
-        }
-        for r in raw_rows
-    )
+        raw_filters.append(Sample.sampled_at <= end_eff)
+
+    # A bounded range holding more samples than the remaining point budget
+    # is averaged into that many equal-width buckets in SQL.
+    budget = limit - len(points) if limit is not None else 0
+    if (
+        budget > 0
+        and start_eff is not None
+        and end_eff > start_eff
+        and db.query(func.count(Sample.id)).filter(*raw_filters).scalar() > budget
+    ):
+        points.extend(
+            _downsampled_points(db, raw_filters, start_eff, end_eff, budget, as_text)
+        )
+    else:
+        points.extend(_raw_points(db, raw_filters, as_text))
+    if not points and ensure_target_exists and hop != "last" and not _target_exists(db, target_id):
+        raise TargetNotFound(target_id)
     if limit is not None and len(points) > limit:
         points = points[-limit:]
     return points
 
 
+# Final-hop stats for many targets in one statement: pick each target's
+# highest hop, rank that hop's rows newest-first, and aggregate the focus
+# window.  LEFT JOIN keeps targets that have no samples yet.
+# ``{where}`` filters ``targets`` both in the outer query and inside
+# ``final_hop`` so the window only ever scans samples of the selected
+# targets (one target for the per-sample WebSocket summary push).
+_SUMMARY_SQL = """
+    WITH final_hop AS (
+        SELECT target_id, MAX(hop_number) AS hop_number
+        FROM samples
+        WHERE target_id IN (SELECT t.id FROM targets t WHERE {where})
+        GROUP BY target_id
+    ),
+    recent AS (
+        SELECT s.target_id, s.ip, s.dns, s.rtt_ms, s.is_timeout,
+               ROW_NUMBER() OVER (
+                   PARTITION BY s.target_id ORDER BY s.sampled_at DESC
+               ) AS rn
+        FROM samples s
+        JOIN final_hop f
+          ON f.target_id = s.target_id AND f.hop_number = s.hop_number
+    )
+    SELECT t.id AS target_id, t.host, t.label, t.active,
+           COUNT(r.rn) AS total,
+           SUM(CASE WHEN r.is_timeout THEN 1 ELSE 0 END) AS lost,
+           AVG(CASE WHEN r.is_timeout THEN NULL ELSE r.rtt_ms END) AS avg_ms,
+           MIN(CASE WHEN r.is_timeout THEN NULL ELSE r.rtt_ms END) AS min_ms,
+           MAX(CASE WHEN r.is_timeout THEN NULL ELSE r.rtt_ms END) AS max_ms,
+           MAX(CASE WHEN r.rn = 1 AND NOT r.is_timeout THEN r.rtt_ms END) AS cur_ms,
+           MAX(CASE WHEN r.rn = 1 THEN r.ip END) AS ip,
+           MAX(CASE WHEN r.rn = 1 THEN r.dns END) AS dns
+    FROM targets t
+    LEFT JOIN recent r ON r.target_id = t.id AND r.rn <= :focus_n
+    WHERE {where}
+    GROUP BY t.id, t.host, t.label, t.active, t.created_at
+    ORDER BY t.created_at DESC
+"""
+_SUMMARY_ALL_SQL = text(_SUMMARY_SQL.format(where="t.active = :active"))
+_SUMMARY_ONE_SQL = text(_SUMMARY_SQL.format(where="t.id = :target_id"))
+
+
+def _summary_row(row: Any) -> dict[str, Any]:
+    """Shape one :data:`_SUMMARY_SQL` result row into a summary dict."""
+    summary: dict[str, Any] = {
+        "target_id": row["target_id"],
+        "host": row["host"],
+        "label": row["label"],
+        "active": bool(row["active"]),
+    }
+    total = row["total"]
+    if not total:
+        summary.update(
+            avg_ms=None, min_ms=None, max_ms=None, cur_ms=None, packet_loss_pct=0.0
+        )
+        return summary
+
+    summary.update(
+        ip=row["ip"],
+        dns=row["dns"],
+        avg_ms=_round2(row["avg_ms"]),
+        min_ms=_round2(row["min_ms"]),
+        max_ms=_round2(row["max_ms"]),
+        cur_ms=_round2(row["cur_ms"]),
+        packet_loss_pct=round((row["lost"] or 0) / total * 100, 1),
+    )
+    return summary
+
+
 def get_summary(db: Session, focus_n: int = 10) -> list[dict[str, Any]]:
     """Build a summary row for every active target (final-hop stats).
 
+    All targets are aggregated by a single windowed SQL statement rather
+    than one stats query per target.
+
     Args:
         db: Active database session.
         focus_n: Number of recent samples used for stats.
@@ -336,44 +792,20 @@ def get_summary(db: Session, focus_n: int = 10) -> list[dict[str, Any]]:
         List of dictionaries with target metadata plus final-hop
         statistics.
     """
-    targets = db.query(Target).filter(Target.active.is_(True)).all()
-    summaries: list[dict[str, Any]] = []
-
-    for t in targets:
-        row = get_target_summary(db, t.id, focus_n=focus_n)
-        if row is not None:
-            summaries.append(row)
-
-    return summaries
+    rows = db.execute(_SUMMARY_ALL_SQL, {"active": True, "focus_n": focus_n}).mappings()
+    return [_summary_row(r) for r in rows]
 
 
 def get_target_summary(db: Session, target_id: str, focus_n: int = 10) -> Optional[dict[str, Any]]:
     """Build one summary row for a specific target."""
-    target = get_target(db, target_id)
-    if target is None:
-        return None
-    max_hop = (
-        db.query(func.max(Sample.hop_number))
-        .filter(Sample.target_id == target.id)
-        .scalar()
+    row = (
+        db.execute(_SUMMARY_ONE_SQL, {"target_id": target_id, "focus_n": focus_n})
+        .mappings()
+        .first()
     )
-    if max_hop is None:
-        stats: dict[str, Any] = {
-            "avg_ms": None,
-            "min_ms": None,
-            "max_ms": None,
-            "cur_ms": None,
-            "packet_loss_pct": 0.0,
-        }
-    else:
-        stats = get_hop_stats(db, target.id, max_hop, focus_n)
-    return {
-        "target_id": target.id,
-        "host": target.host,
-        "label": target.label,
-        "active": target.active,
-        **{k: v for k, v in stats.items() if k != "hop"},
-    }
+    if row is None:
+        return None
+    return _summary_row(row)
 
 
 # ---------------------------------------------------------------------------
@@ -391,21 +823,51 @@ def get_last_known_route(db: Session, target_id: str) -> Optional[list[str]]:
     Returns:
         Ordered list of hop IPs, or ``None`` if no samples exist yet.
     """
-    latest_time = (
-        db.query(func.max(Sample.sampled_at))
-        .filter(Sample.target_id == target_id)
-        .scalar()
+    stmt = lambda_stmt(
+        lambda: select(Sample.ip)
+        .where(
+            Sample.target_id == target_id,
+            Sample.sampled_at
+            == select(func.max(Sample.sampled_at))
+            .where(Sample.target_id == target_id)
+            .scalar_subquery(),
+        )
+        .order_by(Sample.hop_number)
     )
-    if latest_time is None:
-        return None
+    return list(db.execute(stmt).scalars()) or None
 
-    rows = (
-        db.query(Sample)
-        .filter(Sample.target_id == target_id, Sample.sampled_at == latest_time)
-        .order_by(Sample.hop_number)
-        .all()
+
+def get_last_known_routes(db: Session) -> dict[str, list[str]]:
+    """Return the most recently stored route of every target in one query.
+
+    Bulk counterpart of :func:`get_last_known_route`, used to warm the
+    scheduler's route cache at startup.
+
+    Args:
+        db: Active database session.
+
+    Returns:
+        Mapping of target ID to its ordered hop-IP list.  Targets without
+        samples are absent.
+    """
+    latest = (
+        select(Sample.target_id, func.max(Sample.sampled_at).label("sampled_at"))
+        .group_by(Sample.target_id)
+        .subquery()
+    )
+    stmt = (
+        select(Sample.target_id, Sample.ip)
+        .join(
+            latest,
+            (Sample.target_id == latest.c.target_id)
+            & (Sample.sampled_at == latest.c.sampled_at),
+        )
+        .order_by(Sample.target_id, Sample.hop_number)
     )
-    return [r.ip for r in rows]
+    routes: dict[str, list[str]] = {}
+    for target_id, ip in db.execute(stmt):
+        routes.setdefault(target_id, []).append(ip)
+    return routes
 
 
 def record_route_change(
@@ -413,6 +875,8 @@ def record_route_change(
     target_id: str,
     old_route: list[str],
     new_route: list[str],
+    now: Optional[datetime] = None,
+    commit: bool = True,
 ) -> RouteChange:
     """Persist a :class:`RouteChange` event.
 
@@ -421,69 +885,115 @@ def record_route_change(
         target_id: UUID-style target identifier.
         old_route: Previous ordered list of hop IPs.
         new_route: Current ordered list of hop IPs.
+        now: Detection time; pass the sample's timestamp so the change
+            lines up with the samples that revealed it.  Defaults to the
+            current time.
+        commit: Commit immediately.  Pass ``False`` to add the row to the
+            caller's transaction instead.
 
     Returns:
         The newly created :class:`RouteChange` row.
     """
     change = RouteChange(
         target_id=target_id,
-        detected_at=datetime.utcnow(),
-        old_route=",".join(str(ip) for ip in old_route),
-        new_route=",".join(str(ip) for ip in new_route),
+        detected_at=now or utcnow(),
+        old_route=[str(ip) for ip in old_route],
+        new_route=[str(ip) for ip in new_route],
     )
     db.add(change)
+    if not commit:
+        return change
     db.commit()
     db.refresh(change)
     return change
 
 
-def get_route_changes(db: Session, target_id: str) -> list[dict[str, Any]]:
+def get_route_changes(
+    db: Session,
+    target_id: str,
+    ensure_target_exists: bool = False,
+) -> list[dict[str, Any]]:
     """Fetch all route-change events for a target, newest first.
 
     Args:
         db: Active database session.
         target_id: UUID-style target identifier.
+        ensure_target_exists: Outer-join from ``targets`` in the same
+            query and raise :class:`TargetNotFound` when it is missing.
 
     Returns:
         List of serialisable route-change dictionaries.
+
+    Raises:
+        TargetNotFound: If *ensure_target_exists* is set and the target
+            does not exist.
     """
-    rows = (
-        db.query(RouteChange)
-        .filter(RouteChange.target_id == target_id)
-        .order_by(desc(RouteChange.detected_at))
-        .all()
-    )
+    if ensure_target_exists:
+        joined = (
+            db.query(Target.id, RouteChange)
+            .outerjoin(RouteChange, RouteChange.target_id == Target.id)
+            .filter(Target.id == target_id)
+            .order_by(desc(RouteChange.detected_at))
+            .all()
+        )
+        if not joined:
+            raise TargetNotFound(target_id)
+        rows = [rc for _tid, rc in joined if rc is not None]
+    else:
+        rows = (
+            db.query(RouteChange)
+            .filter(RouteChange.target_id == target_id)
+            .order_by(desc(RouteChange.detected_at))
+            .all()
+        )
     return [
         {
             "id": r.id,
             "detected_at": r.detected_at.isoformat() if r.detected_at else None,
-            "old_route": r.old_route.split(",") if r.old_route else [],
-            "new_route": r.new_route.split(",") if r.new_route else [],
+            "old_route": r.old_route or [],
+            "new_route": r.new_route or [],
         }
         for r in rows
     ]
 
 
-def backfill_dns_for_ip(db: Session, ip: str, dns_name: str, limit: int = 5000) -> int:
-    """Backfill missing DNS values for a known IP address."""
-    rows = (
-        db.query(Sample)
-        .filter(
-            Sample.ip == ip,
+def backfill_dns_bulk(db: Session, names: Mapping[str, str], within_hours: int = 24) -> int:
+    """Backfill missing DNS values for many IPs with one ``UPDATE``.
+
+    The new value is picked per row with ``CASE ip WHEN ... THEN ...``,
+    so a whole enrichment batch costs a single round trip.  Only samples
+    from the last *within_hours* are touched, which keeps one statement
+    from rewriting an IP's entire retained history.  The caller commits,
+    then patches :mod:`~pingwatcher.db.stats_cache` with
+    :func:`~pingwatcher.db.stats_cache.backfill_dns_many`.
+
+    Args:
+        db: Active database session.
+        names: Mapping of hop IP to its resolved hostname.
+        within_hours: Age of the oldest sample that may be updated.
+
+    Returns:
+        Number of sample rows updated.
+    """
+    if not names:
+        return 0
+    cutoff = utcnow() - timedelta(hours=within_hours)
+    stmt = (
+        update(Sample)
+        .where(
+            Sample.ip.in_(list(names)),
             (Sample.dns.is_(None) | (Sample.dns == "")),
+            Sample.sampled_at >= cutoff,
         )
-        .order_by(desc(Sample.sampled_at))
-        .limit(limit)
-        .all()
+        .values(dns=case(dict(names), value=Sample.ip))
+        .execution_options(synchronize_session=False)
     )
-    for row in rows:
-        row.dns = dns_name
-    return len(rows)
+    return db.execute(stmt).rowcount
 
 
 def aggregate_hourly_rollups(db: Session, older_than_hours: int = 24) -> int:
     """Aggregate raw samples into hourly rollup rows."""
-    cutoff = datetime.utcnow() - timedelta(hours=older_than_hours)
+    cutoff = utcnow() - timedelta(hours=older_than_hours)
     rows = (
         db.query(Sample)
         .filter(Sample.sampled_at < cutoff)
@@ -545,9 +1055,12 @@ def aggregate_hourly_rollups(db: Session, older_than_hours: int = 24) -> int:
 
 def delete_raw_samples_older_than(db: Session, days: int = 14) -> int:
     """Delete raw samples older than the retention window."""
-    cutoff = datetime.utcnow() - timedelta(days=days)
+    cutoff = utcnow() - timedelta(days=days)
     deleted = db.query(Sample).filter(Sample.sampled_at < cutoff).delete(synchronize_session=False)
     db.commit()
+    if deleted:
+        # An idle target's cached window may hold the rows just purged.
+        stats_cache.clear()
     return int(deleted)
 
 
@@ -566,11 +1079,10 @@ def get_active_alerts(db: Session, target_id: str) -> list[Alert]:
     Returns:
         List of enabled :class:`Alert` rows.
     """
-    return (
-        db.query(Alert)
-        .filter(Alert.target_id == target_id, Alert.enabled.is_(True))
-        .all()
+    stmt = lambda_stmt(
+        lambda: select(Alert).where(Alert.target_id == target_id, Alert.enabled)
     )
+    return list(db.execute(stmt).scalars())
 
 
 def record_alert_event(
@@ -578,6 +1090,8 @@ def record_alert_event(
     alert: Alert,
     metric_value: float,
     message: str,
+    commit: bool = True,
+    triggered_at: Optional[datetime] = None,
 ) -> AlertHistory:
     """Write an :class:`AlertHistory` row when an alert fires.
 
@@ -586,6 +1100,9 @@ def record_alert_event(
         alert: The :class:`Alert` that fired.
         metric_value: The reading that breached the threshold.
         message: Human-readable event description.
+        commit: Commit immediately.  Pass ``False`` to add the row to the
+            caller's transaction instead.
+        triggered_at: Event timestamp; defaults to the current UTC time.
 
     Returns:
         The newly created :class:`AlertHistory` row.
@@ -593,11 +1110,28 @@ def record_alert_event(
     event = AlertHistory(
         alert_id=alert.id,
         target_id=alert.target_id,
-        triggered_at=datetime.utcnow(),
+        triggered_at=triggered_at or utcnow(),
         metric_value=metric_value,
         message=message,
     )
     db.add(event)
+    if not commit:
+        return event
     db.commit()
     db.refresh(event)
     return event
+
+
+def record_alert_events(db: Session, events: list[dict[str, Any]]) -> None:
+    """Insert several :class:`AlertHistory` rows in one statement.
+
+    The rows join the caller's transaction; nothing is committed here.
+
+    Args:
+        db: Active database session.
+        events: Column dictionaries with ``alert_id``, ``target_id``,
+            ``triggered_at``, ``metric_value``, and ``message``.
+    """
+    if not events:
+        return
+    db.execute(insert(AlertHistory), events)
@@ -0,0 +1,228 @@
+"""Rolling per-hop sample windows that answer hop-statistics reads.
+
+Dashboards poll hop statistics every few seconds, and the scheduler and
+alert evaluator recompute them after every trace.  Instead of re-running
+the windowed aggregate in SQL each time, this module keeps the most
+recent :data:`MAX_FOCUS_N` samples of every hop in a bounded
+:class:`collections.deque` and derives avg/min/max/loss from it.
+
+A target starts *cold*.  The first read seeds its windows from the
+database (see :func:`seed`); from then on :func:`record` appends every
+newly stored sample and the target is *warm*.  Writes to a cold target
+only bump its generation counter, which lets :func:`seed` refuse a
+snapshot that a concurrent write may have overtaken.
+
+Reads flatten every hop's window into one array and aggregate all hops
+at once with NumPy segment reductions (``ufunc.reduceat``).
+"""
+
+import threading
+from collections import deque
+from typing import Any, Iterable, Mapping, Optional
+
+import numpy as np
+
+#: Deepest focus window served from memory; larger requests hit the DB.
+MAX_FOCUS_N = 100
+
+# (ip, dns, rtt_ms, is_timeout) for one sample, oldest first per deque.
+_HopSample = tuple[Optional[str], Optional[str], Optional[float], bool]
+
+_registry_lock = threading.Lock()
+_locks: dict[str, threading.Lock] = {}
+_generations: dict[str, int] = {}
+_cache: dict[str, dict[int, deque]] = {}
+
+
+def _lock_for(target_id: str) -> threading.Lock:
+    """Return the lock guarding *target_id*'s windows, creating it once."""
+    with _registry_lock:
+        lock = _locks.get(target_id)
+        if lock is None:
+            lock = _locks[target_id] = threading.Lock()
+        return lock
+
+
+def _round2(value: Optional[float]) -> Optional[float]:
+    """Round a latency to two decimals, passing ``None`` through."""
+    return round(value, 2) if value is not None else None
+
+
+def _windows_stats(
+    windows: dict[int, list[_HopSample]],
+) -> list[dict[str, Any]]:
+    """Aggregate every hop's window (newest last) like the SQL focus query.
+
+    All samples are laid out in one array, hop after hop, and each
+    statistic is a single ``reduceat`` over the hop boundaries.  Timeouts
+    and missing RTTs are ``NaN``, which ``fmin``/``fmax`` skip.
+    """
+    hop_numbers = sorted(windows)
+    samples = [sample for hop_number in hop_numbers for sample in windows[hop_number]]
+    lengths = np.fromiter(
+        (len(windows[hop_number]) for hop_number in hop_numbers),
+        dtype=np.intp,
+        count=len(hop_numbers),
+    )
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+
+    timeouts = np.fromiter((sample[3] for sample in samples), dtype=bool, count=len(samples))
+    rtt = np.array([sample[2] for sample in samples], dtype=float)
+    rtt[timeouts] = np.nan
+    valid = ~np.isnan(rtt)
+
+    counts = np.add.reduceat(valid.astype(np.intp), starts)
+    sums = np.add.reduceat(np.where(valid, rtt, 0.0), starts)
+    mins = np.fmin.reduceat(rtt, starts)
+    maxs = np.fmax.reduceat(rtt, starts)
+    lost = np.add.reduceat(timeouts.astype(np.intp), starts)
+
+    stats = []
+    for i, hop_number in enumerate(hop_numbers):
+        ip, dns, cur_rtt, cur_timeout = samples[ends[i] - 1]
+        has_rtt = counts[i] > 0
+        stats.append(
+            {
+                "hop": hop_number,
+                "ip": ip,
+                "dns": dns,
+                "avg_ms": _round2(float(sums[i] / counts[i])) if has_rtt else None,
+                "min_ms": _round2(float(mins[i])) if has_rtt else None,
+                "max_ms": _round2(float(maxs[i])) if has_rtt else None,
+                "cur_ms": None if cur_timeout else _round2(cur_rtt),
+                "packet_loss_pct": round(int(lost[i]) / int(lengths[i]) * 100, 1),
+            }
+        )
+    return stats
+
+
+def generation(target_id: str) -> int:
+    """Return the write counter to pass to a subsequent :func:`seed`."""
+    with _lock_for(target_id):
+        return _generations.get(target_id, 0)
+
+
+def seed(
+    target_id: str,
+    seen_generation: int,
+    rows: Iterable[Mapping[Any, Any]],
+) -> bool:
+    """Install *target_id*'s windows from a database snapshot.
+
+    Args:
+        target_id: UUID-style target identifier.
+        seen_generation: Value of :func:`generation` taken before the
+            snapshot query ran.
+        rows: Sample rows with ``hop_number``, ``ip``, ``dns``,
+            ``rtt_ms``, and ``is_timeout``, oldest first within each hop.
+
+    Returns:
+        ``True`` if the windows were installed, ``False`` if a write
+        landed after *seen_generation* was read (the snapshot may be
+        missing it, so the target stays cold).
+    """
+    hops: dict[int, deque] = {}
+    for row in rows:
+        window = hops.get(row["hop_number"])
+        if window is None:
+            window = hops[row["hop_number"]] = deque(maxlen=MAX_FOCUS_N)
+        window.append((row["ip"], row["dns"], row["rtt_ms"], bool(row["is_timeout"])))
+    with _lock_for(target_id):
+        if _generations.get(target_id, 0) != seen_generation:
+            return False
+        _cache[target_id] = hops
+    return True
+
+
+def record(rows: Iterable[Mapping[str, Any]]) -> None:
+    """Append freshly committed sample rows to their targets' windows.
+
+    Args:
+        rows: Insert parameter dictionaries as passed to
+            :func:`~pingwatcher.db.queries.store_samples_bulk`, in
+            chronological order per target.
+    """
+    by_target: dict[str, list[Mapping[str, Any]]] = {}
+    for row in rows:
+        by_target.setdefault(row["target_id"], []).append(row)
+    for target_id, target_rows in by_target.items():
+        with _lock_for(target_id):
+            _generations[target_id] = _generations.get(target_id, 0) + 1
+            hops = _cache.get(target_id)
+            if hops is None:
+                continue
+            for row in target_rows:
+                window = hops.get(row["hop_number"])
+                if window is None:
+                    window = hops[row["hop_number"]] = deque(maxlen=MAX_FOCUS_N)
+                window.append((row["ip"], row["dns"], row["rtt_ms"], bool(row["is_timeout"])))
+
+
+def hop_stats(target_id: str, focus_n: int) -> Optional[list[dict[str, Any]]]:
+    """Return per-hop statistics from memory.
+
+    Args:
+        target_id: UUID-style target identifier.
+        focus_n: Number of recent samples per hop.
+
+    Returns:
+        Per-hop stat dictionaries sorted by hop number, or ``None`` when
+        the target is cold or *focus_n* exceeds :data:`MAX_FOCUS_N`.
+    """
+    if focus_n > MAX_FOCUS_N:
+        return None
+    with _lock_for(target_id):
+        hops = _cache.get(target_id)
+        if hops is None:
+            return None
+        windows = {
+            hop_number: list(window)[-focus_n:] for hop_number, window in hops.items() if window
+        }
+    if not windows:
+        return []
+    return _windows_stats(windows)
+
+
+def backfill_dns_many(names: Mapping[str, str]) -> None:
+    """Fill in missing names on cached samples in one pass over every window.
+
+    Args:
+        names: Mapping of hop IP to its resolved hostname.
+    """
+    for target_id in list(_cache):
+        with _lock_for(target_id):
+            for window in _cache.get(target_id, {}).values():
+                for i, (s_ip, s_dns, rtt, timeout) in enumerate(window):
+                    if not s_dns and s_ip in names:
+                        window[i] = (s_ip, names[s_ip], rtt, timeout)
+
+
+def invalidate(target_id: str) -> None:
+    """Drop *target_id*'s windows so the next read re-seeds from the DB."""
+    with _lock_for(target_id):
+        _cache.pop(target_id, None)
+        _generations[target_id] = _generations.get(target_id, 0) + 1
+
+
+def forget(target_id: str) -> None:
+    """Drop every trace of a deleted *target_id*, including its lock.
+
+    Unlike :func:`invalidate`, the generation counter goes too, so the
+    registry does not grow with every target ever deleted.
+    """
+    with _registry_lock:
+        lock = _locks.pop(target_id, None)
+        if lock is None:
+            return
+        with lock:
+            _cache.pop(target_id, None)
+            _generations.pop(target_id, None)
+
+
+def clear() -> None:
+    """Drop every cached window."""
+    with _registry_lock:
+        target_ids = list(_locks)
+    for target_id in target_ids:
+        invalidate(target_id)
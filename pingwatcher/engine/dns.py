@@ -1,22 +1,85 @@
-"""Reverse-DNS resolution with an LRU cache.
+"""Reverse-DNS resolution with a TTL cache.
 
-Hop IPs are looked up via PTR records.  Results are cached with
-:func:`functools.lru_cache` to avoid redundant queries for stable
-hops.  When no PTR record exists, the sentinel ``"----------"`` is
-returned (matching PingPlotter's display convention).
+Hop IPs are looked up via PTR records.  Results are cached per IP with
+an expiry so stable hops are not re-queried on every trace while a
+changed PTR still gets picked up eventually.  Failed lookups are cached
+too, but only briefly, so a transient resolver outage does not pin an IP
+to the sentinel forever.  When no PTR record exists, the sentinel
+``"----------"`` is returned (matching PingPlotter's display convention).
+
+``socket.gethostbyaddr`` blocks, so async callers go through
+:func:`reverse_dns_async` / :func:`reverse_dns_many`, which run lookups
+on a dedicated thread pool.
 """
 
-import functools
+import asyncio
 import logging
 import socket
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
 
 logger = logging.getLogger(__name__)
 
 #: Sentinel displayed when a PTR record is absent.
 NO_PTR = "----------"
 
+#: Seconds a resolved hostname stays cached.
+POSITIVE_TTL = 3600.0
+#: Seconds a failed lookup stays cached before it is retried.
+NEGATIVE_TTL = 60.0
+#: Maximum number of IPs remembered.
+CACHE_MAXSIZE = 512
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+_lock = threading.Lock()
+_cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+_hits = 0
+_misses = 0
+
+_RESOLVER_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="reverse-dns")
+
+
+def _cached(ip: str) -> Optional[str]:
+    """Return the unexpired cached name for *ip*, counting the hit or miss."""
+    global _hits, _misses
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(ip)
+        if entry is not None:
+            expires_at, name = entry
+            if expires_at > now:
+                _cache.move_to_end(ip)
+                _hits += 1
+                return name
+            del _cache[ip]
+        _misses += 1
+    return None
+
+
+def _store(ip: str, name: str) -> None:
+    """Cache *name* for *ip* with the TTL matching the lookup outcome."""
+    ttl = NEGATIVE_TTL if name == NO_PTR else POSITIVE_TTL
+    with _lock:
+        _cache[ip] = (time.monotonic() + ttl, name)
+        _cache.move_to_end(ip)
+        while len(_cache) > CACHE_MAXSIZE:
+            _cache.popitem(last=False)
+
+
+def _resolve(ip: str) -> str:
+    """Perform an uncached PTR lookup for *ip*."""
+    try:
+        hostname, _aliases, _addrs = socket.gethostbyaddr(ip)
+        return hostname
+    except (socket.herror, socket.gaierror, OSError):
+        logger.debug("PTR lookup failed for %s", ip)
+        return NO_PTR
+
 
-@functools.lru_cache(maxsize=512)
 def reverse_dns(ip: str) -> str:
     """Look up the PTR record for *ip* and return the hostname.
 
@@ -28,28 +91,71 @@ def reverse_dns(ip: str) -> str:
     """
     if not ip:
         return NO_PTR
-    try:
-        hostname, _aliases, _addrs = socket.gethostbyaddr(ip)
-        return hostname
-    except (socket.herror, socket.gaierror, OSError):
-        logger.debug("PTR lookup failed for %s", ip)
+    name = _cached(ip)
+    if name is None:
+        name = _resolve(ip)
+        _store(ip, name)
+    return name
+
+
+async def reverse_dns_async(ip: str) -> str:
+    """Awaitable variant of :func:`reverse_dns`.
+
+    Cache hits are answered inline; misses are resolved on the module's
+    resolver thread pool so the event loop is never blocked.
+
+    Args:
+        ip: Dotted-quad IPv4 address.
+
+    Returns:
+        Reverse-DNS hostname, or :data:`NO_PTR` if the lookup fails.
+    """
+    if not ip:
         return NO_PTR
+    name = _cached(ip)
+    if name is not None:
+        return name
+    name = await asyncio.get_running_loop().run_in_executor(_RESOLVER_POOL, _resolve, ip)
+    _store(ip, name)
+    return name
+
+
+async def reverse_dns_many(ips: Iterable[str]) -> dict[str, str]:
+    """Resolve several IPs concurrently.
+
+    Args:
+        ips: Addresses to look up, e.g. every hop of one traceroute.
+            Duplicates and empty values are ignored.
+
+    Returns:
+        Mapping of each distinct non-empty IP to its hostname or
+        :data:`NO_PTR`.
+    """
+    unique = list(dict.fromkeys(ip for ip in ips if ip))
+    names = await asyncio.gather(*(reverse_dns_async(ip) for ip in unique))
+    return dict(zip(unique, names))
 
 
 def clear_cache() -> None:
-    """Flush the reverse-DNS LRU cache.
+    """Flush the reverse-DNS cache.
 
     Useful for testing or when the administrator wants to force
     re-resolution of all hop IPs.
     """
-    reverse_dns.cache_clear()
+    global _hits, _misses
+    with _lock:
+        _cache.clear()
+        _hits = 0
+        _misses = 0
 
 
-def cache_info():
-    """Return cache-hit statistics from the reverse-DNS LRU cache.
+def cache_info() -> CacheInfo:
+    """Return cache-hit statistics from the reverse-DNS cache.
 
     Returns:
-        A :class:`functools._CacheInfo` named tuple with ``hits``,
-        ``misses``, ``maxsize``, and ``currsize``.
+        A :class:`CacheInfo` named tuple with ``hits``, ``misses``,
+        ``maxsize``, and ``currsize`` (same fields as
+        :func:`functools.lru_cache`).
     """
-    return reverse_dns.cache_info()
+    with _lock:
+        return CacheInfo(_hits, _misses, CACHE_MAXSIZE, len(_cache))
@@ -1,29 +1,43 @@
 """APScheduler integration for continuous traceroute sampling."""
 
-import json
+import asyncio
+import concurrent.futures
+import functools
+import heapq
+import itertools
 import logging
+import os
+import queue
 import socket
 import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional
+from typing import Any, Callable, NamedTuple, Optional
 
+import orjson
+from apscheduler.executors.asyncio import AsyncIOExecutor
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy.orm import scoped_session
 
 from pingwatcher.alerts.conditions import evaluate_alerts
-from pingwatcher.config import get_settings
-from pingwatcher.db.models import Sample, SessionLocal, Target
+from pingwatcher.config import FrozenSettings, get_settings
+from pingwatcher.db import stats_cache
+from pingwatcher.db.models import SessionLocal, Target
 from pingwatcher.db.queries import (
     aggregate_hourly_rollups,
-    backfill_dns_for_ip,
+    backfill_dns_bulk,
     delete_raw_samples_older_than,
     get_all_hop_stats,
-    get_last_known_route,
+    get_last_known_routes,
     get_target_summary,
     record_route_change,
-    store_sample,
+    store_samples_bulk,
+    utcnow,
 )
-from pingwatcher.engine.dns import NO_PTR, reverse_dns
+from pingwatcher.engine.dns import NO_PTR, reverse_dns_many
 from pingwatcher.engine.tracer import (
+    HopRec,
     icmp_traceroute,
     scapy_icmp_traceroute,
     system_traceroute,
@@ -31,43 +45,175 @@ from pingwatcher.engine.tracer import (
 
 logger = logging.getLogger(__name__)
 
-scheduler = AsyncIOScheduler()
+# Traces are not APScheduler jobs: one dispatch job (see "Trace dispatch"
+# below) feeds them to _trace_pool.  They spend nearly all their time
+# waiting on probe replies, so the pool is sized well past the core count.
+# Every scheduler job is a coroutine awaited on the loop via the "loop"
+# executor; blocking work (traces, DB writes) is handed off to threads
+# explicitly, so APScheduler needs no thread pool of its own.
+_TRACE_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+_LOOP_EXECUTOR = "loop"
 
-# In-memory dict of latest raw hop list per target for WebSocket push.
-# Keyed by target_id; value is the hop list from the most recent trace.
-latest_results: dict[str, list[dict]] = {}
+scheduler = AsyncIOScheduler(executors={_LOOP_EXECUTOR: AsyncIOExecutor()})
+
+
+def _new_trace_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Return an idle trace pool; its threads start on first submit."""
+    return concurrent.futures.ThreadPoolExecutor(
+        max_workers=_TRACE_WORKERS,
+        thread_name_prefix="trace",
+    )
+
+
+_trace_pool = _new_trace_pool()
+
+#: Most targets remembered by the per-target "latest" caches below.
+LATEST_CACHE_MAXSIZE = 2048
+
+
+class _BoundedDict(OrderedDict):
+    """Dict that forgets its least recently *written* keys past a size cap.
+
+    Active targets rewrite their entry on every sample, so only targets
+    that stopped sampling without a clean :func:`stop_monitoring` age out.
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+# In-memory dict of the latest trace per target for WebSocket push.
+# Keyed by target_id; value is the most recent trace in the columnar
+# wire layout produced by hop_columns().
+latest_results: dict[str, dict[str, list]] = _BoundedDict(LATEST_CACHE_MAXSIZE)
 
 # In-memory cache of computed hop statistics for the default focus window.
 # Updated after every successful sample; used by the /hops API endpoint to
 # avoid re-querying the database on every request.
-latest_hop_stats: dict[str, list[dict]] = {}
+latest_hop_stats: dict[str, list[dict]] = _BoundedDict(LATEST_CACHE_MAXSIZE)
 
 # WebSocket subscribers (managed by the main app module).
 # Maps target_id → set of asyncio.Queue instances.
 ws_subscribers: dict[str, set] = {}
 ws_summary_subscribers: set = set()
 
+#: Frames buffered per WebSocket subscriber; the oldest is dropped past this.
+WS_QUEUE_MAXSIZE = 16
+
+# Coalesced WebSocket broadcasts.  Trace threads append messages per topic
+# (a target_id, or _SUMMARY_TOPIC); the broadcast job drains the buffer on
+# the event loop, serialises each topic's batch once and hands the same
+# frame to every subscriber of that topic.
+_SUMMARY_TOPIC = None
+_broadcast_buffer: dict[Optional[str], list[dict]] = {}
+_broadcast_lock = threading.Lock()
+
 # Number of consecutive DNS resolution failures before disabling
 # monitoring for a target.
 _MAX_DNS_FAILURES = 3
 _dns_failures_by_target: dict[str, int] = {}
-_target_run_locks: dict[str, threading.Lock] = {}
+
+# The dispatcher never queues a target that is still queued or running
+# (_queued / _inflight); _collect_sample re-checks _inflight for direct
+# calls.  Ticks skipped either way are counted per target.  All three are
+# guarded by _inflight_lock.
+_queued: set[str] = set()
+_inflight: set[str] = set()
+_inflight_lock = threading.Lock()
+_skipped_samples: dict[str, int] = {}
+
+
+class _Monitor(NamedTuple):
+    """Trace parameters of one monitored target.
+
+    ``run`` is :func:`_run_dispatched` with the trace arguments bound once
+    at registration, so a dispatch submits a single ready-made callable.
+    """
+
+    host: str
+    interval: float
+    run: Callable[[], None]
+    generation: int
+
+
+# Trace dispatch.  Each monitored target has a live entry
+# ``(due, generation, target_id)`` in a min-heap keyed on time.monotonic();
+# every dispatcher tick pops only the entries that are due.  Stopping or
+# re-registering a target leaves its old entry behind as a tombstone: its
+# generation no longer matches _monitored, so it is dropped when popped.
+_monitored: dict[str, _Monitor] = {}
+_dispatch_heap: list[tuple[float, int, str]] = []
+_dispatch_lock = threading.Lock()
+_generations = itertools.count(1)
 
 # In-memory route cache: last known hop-IP list per target.
-# Avoids two DB queries per sample for route-change detection.
-# _route_cache_initialized tracks which targets have been seeded from DB
-# (needed to handle server restarts without missing the first-sample check).
+# Loaded for every target by warm_route_cache() at startup and kept
+# current by each sample, so route-change detection never queries.
 _last_known_routes: dict[str, list] = {}
-_route_cache_initialized: set[str] = set()
 _dns_pending_ips: set[str] = set()
 
+# Group commit for sample rows.  Each trace appends its rows to the buffer
+# and then flushes; whichever thread holds the flush lock writes every
+# buffered trace in one transaction, so concurrent targets share a commit.
+# If that write fails, each target's rows are retried on their own and a
+# target whose rows still fail finds its error in _sample_flush_errors.
+# At most one trace per target is in flight, so target ids key it safely.
+_sample_buffer: list[dict] = []
+_sample_buffer_lock = threading.Lock()
+_sample_flush_lock = threading.Lock()
+_sample_flush_errors: dict[str, Exception] = {}
+
+# One reusable session per background thread (trace workers, the alert
+# thread, and the scheduler's job pool).  Each run closes it, which ends
+# the transaction and returns the connection to the pool, but the Session
+# object stays registered for the thread's next job.
+_worker_sessions = scoped_session(SessionLocal)
+
+# Alert evaluation runs on one dedicated thread fed by a bounded queue, so
+# trace workers hand off their stats and move on.  A single consumer keeps
+# each target's evaluations in sample order.
+_ALERT_QUEUE_MAXSIZE = 1024
+_alert_queue: queue.Queue = queue.Queue(maxsize=_ALERT_QUEUE_MAXSIZE)
+_alert_thread: Optional[threading.Thread] = None
+
 _DNS_JOB_ID = "__dns_enrichment__"
 _MAINTENANCE_JOB_ID = "__maintenance__"
+_DISPATCH_JOB_ID = "__trace_dispatch__"
+_BROADCAST_JOB_ID = "__ws_broadcast__"
+
+
+#: Per-hop fields sent to WebSocket clients, one array each.
+_HOP_WIRE_FIELDS = HopRec._fields
+
+
+def hop_columns(hops: list[HopRec]) -> dict[str, list]:
+    """Transpose a trace's hop rows into parallel per-field arrays.
+
+    Sending ``{"hop": [...], "ip": [...], ...}`` instead of one object per
+    hop avoids repeating every key name for every hop on the wire.
+
+    Args:
+        hops: Hop records as returned by the tracer.
+
+    Returns:
+        Mapping of each field in :data:`_HOP_WIRE_FIELDS` to a list with
+        one entry per hop, in trace order.
+    """
+    if not hops:
+        return {field: [] for field in _HOP_WIRE_FIELDS}
+    return {field: list(values) for field, values in zip(_HOP_WIRE_FIELDS, zip(*hops))}
 
 
 def _deactivate_target(target_id: str) -> None:
     """Mark a target inactive in the database."""
-    db = SessionLocal()
+    db = _worker_sessions()
     try:
         target = db.query(Target).filter(Target.id == target_id).first()
         if target and target.active:
@@ -77,18 +223,155 @@ def _deactivate_target(target_id: str) -> None:
         db.close()
 
 
-def _queue_dns_enrichment(hops: list[dict]) -> None:
-    """Queue unresolved hop IPs for async DNS backfill."""
-    for hop in hops:
-        ip = hop.get("ip")
-        dns = hop.get("dns")
-        if ip and not dns:
-            _dns_pending_ips.add(ip)
+def _count_skipped_sample(target_id: str) -> None:
+    """Record one dropped tick for *target_id*."""
+    with _inflight_lock:
+        _skipped_samples[target_id] = _skipped_samples.get(target_id, 0) + 1
 
 
-def _select_probe_engine(host: str, max_hops: int, timeout: float) -> list[dict]:
-    """Run traceroute using configured probe-engine strategy."""
-    cfg = get_settings()
+def _enqueue_alert_evaluation(
+    target_id: str,
+    focus_n: int,
+    all_stats: Optional[list[dict]],
+    now: datetime,
+) -> None:
+    """Queue one alert evaluation for the alert thread.
+
+    When the queue is full the evaluation is dropped; the target's next
+    sample re-evaluates with fresher stats anyway.
+    """
+    try:
+        _alert_queue.put_nowait((target_id, focus_n, all_stats, now))
+    except queue.Full:
+        logger.warning("Alert queue full; skipping evaluation for %s", target_id)
+
+
+def _alert_worker() -> None:
+    """Drain :data:`_alert_queue` until the ``None`` sentinel arrives."""
+    while True:
+        item = _alert_queue.get()
+        try:
+            if item is None:
+                return
+            target_id, focus_n, all_stats, now = item
+            db = _worker_sessions()
+            try:
+                evaluate_alerts(db, target_id, focus_n=focus_n, all_stats=all_stats, now=now)
+            except Exception:
+                logger.exception("Alert evaluation failed for %s", target_id)
+            finally:
+                db.close()
+        finally:
+            _alert_queue.task_done()
+
+
+def _start_alert_worker() -> None:
+    """Start the alert thread unless it is already running."""
+    global _alert_thread
+    if _alert_thread is not None and _alert_thread.is_alive():
+        return
+    _alert_thread = threading.Thread(target=_alert_worker, name="alert-worker", daemon=True)
+    _alert_thread.start()
+
+
+def _stop_alert_worker(timeout: float = 5.0) -> None:
+    """Let the alert thread finish queued evaluations, then stop it.
+
+    If the thread outlives *timeout* its handle is kept, so a later
+    :func:`_start_alert_worker` does not start a second one beside it.
+    """
+    global _alert_thread
+    if _alert_thread is None:
+        return
+    try:
+        _alert_queue.put(None, timeout=timeout)
+    except queue.Full:
+        logger.warning("Alert queue still full at shutdown; abandoning pending evaluations")
+    _alert_thread.join(timeout)
+    if _alert_thread.is_alive():
+        logger.warning("Alert worker still running after %.1fs; leaving it to finish", timeout)
+        return
+    _alert_thread = None
+
+
+def _queue_dns_enrichment(columns: dict[str, list]) -> None:
+    """Queue unresolved hop IPs for async DNS backfill.
+
+    Args:
+        columns: One trace's hops as returned by :func:`hop_columns`.
+    """
+    _dns_pending_ips.update(ip for ip, dns in zip(columns["ip"], columns["dns"]) if ip and not dns)
+
+
+def _store_samples(db, rows: list[dict]) -> None:
+    """Persist *rows*, batching them with rows from concurrent traces.
+
+    Returns once *rows* are committed, either by this call or by another
+    thread whose flush picked them up first.
+
+    Args:
+        db: Active database session used for the flush.
+        rows: Sample column dictionaries for one trace.
+
+    Raises:
+        Exception: Whatever the database raised for *rows*, even when the
+            failed flush ran on another thread.
+    """
+    if not rows:
+        return
+    target_id = rows[0]["target_id"]
+    with _sample_buffer_lock:
+        _sample_buffer.extend(rows)
+    with _sample_flush_lock:
+        with _sample_buffer_lock:
+            pending = _sample_buffer[:]
+            _sample_buffer.clear()
+        if pending:
+            _flush_samples(db, pending)
+        error = _sample_flush_errors.pop(target_id, None)
+    if error is not None:
+        raise error
+
+
+def _flush_samples(db, pending: list[dict]) -> None:
+    """Write *pending* in one transaction, falling back to one per target.
+
+    Called with :data:`_sample_flush_lock` held.  A failure of the shared
+    write (say, a target deleted mid-trace) must not cost the other
+    targets their samples, so after a rollback each target's rows are
+    retried alone and only the ones that fail again are recorded in
+    :data:`_sample_flush_errors` for their trace to raise.
+    """
+    try:
+        store_samples_bulk(db, pending)
+        return
+    except Exception:
+        db.rollback()
+        logger.warning("Group commit of %d sample rows failed; retrying per target", len(pending))
+
+    by_target: dict[str, list[dict]] = {}
+    for row in pending:
+        by_target.setdefault(row["target_id"], []).append(row)
+    for target_id, target_rows in by_target.items():
+        try:
+            store_samples_bulk(db, target_rows)
+        except Exception as exc:
+            db.rollback()
+            _sample_flush_errors[target_id] = exc
+
+
+def _select_probe_engine(
+    host: str,
+    max_hops: int,
+    timeout: float,
+    cfg: Optional[FrozenSettings] = None,
+) -> list[HopRec]:
+    """Run traceroute using configured probe-engine strategy.
+
+    *cfg* lets :func:`_collect_sample` pass the settings it already holds;
+    defaults to :func:`~pingwatcher.config.get_settings`.
+    """
+    cfg = cfg or get_settings()
     mode = str(getattr(cfg, "probe_engine", "auto") or "auto").lower()
 
     if mode in {"auto", "scapy"} and cfg.scapy_enabled:
@@ -127,7 +410,7 @@ def _select_probe_engine(host: str, max_hops: int, timeout: float) -> list[dict]
 def _collect_sample(target_id: str, host: str, max_hops: int, timeout: float) -> None:
     """Run a single traceroute and persist results.
 
-    This function is called by APScheduler inside a worker thread.
+    This function is called by the dispatcher inside a trace-pool thread.
 
     Args:
         target_id: UUID-style target identifier.
@@ -135,19 +418,24 @@ def _collect_sample(target_id: str, host: str, max_hops: int, timeout: float) ->
         max_hops: Maximum TTL.
         timeout: Per-probe timeout in seconds.
     """
-    lock = _target_run_locks.setdefault(target_id, threading.Lock())
-    if not lock.acquire(blocking=False):
-        logger.debug(
-            "Skipping sample for %s (%s): previous run still in progress",
-            target_id,
-            host,
-        )
+    with _inflight_lock:
+        busy = target_id in _inflight
+        if not busy:
+            _inflight.add(target_id)
+    if busy:
+        _count_skipped_sample(target_id)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Skipping sample for %s (%s): previous run still in progress",
+                target_id,
+                host,
+            )
         return
 
     try:
         cfg = get_settings()
         try:
-            hops = _select_probe_engine(host, max_hops=max_hops, timeout=timeout)
+            hops = _select_probe_engine(host, max_hops=max_hops, timeout=timeout, cfg=cfg)
         except socket.gaierror as exc:
             failures = _dns_failures_by_target.get(target_id, 0) + 1
             _dns_failures_by_target[target_id] = failures
@@ -176,45 +464,46 @@ def _collect_sample(target_id: str, host: str, max_hops: int, timeout: float) ->
             return
 
         _dns_failures_by_target.pop(target_id, None)
-
-        now = datetime.utcnow()
-        db = SessionLocal()
+        # Transposed once; the route check, DNS queue, cache and broadcast
+        # all read the per-field lists.
+        columns = hop_columns(hops)
+
+        # One timestamp per trace: samples, route change and alert events
+        # recorded for this cycle all share it.
+        now = utcnow()
+        db = _worker_sessions()
         all_stats = None
         summary_row = None
         try:
-            # --- Route-change detection (cached; DB only on first run) ---
-            new_ips = [h["ip"] for h in hops]
-            if target_id not in _route_cache_initialized:
-                # First sample since startup — seed cache from DB so we
-                # don't lose a real route change that occurred while down.
-                old_route = get_last_known_route(db, target_id)
-                _route_cache_initialized.add(target_id)
-            else:
-                old_route = _last_known_routes.get(target_id)
+            samples = [
+                {
+                    "target_id": target_id,
+                    "sampled_at": now,
+                    "hop_number": hop_number,
+                    "ip": ip,
+                    "dns": dns,
+                    "rtt_ms": rtt_ms,
+                    "is_timeout": is_timeout,
+                }
+                for hop_number, ip, dns, rtt_ms, is_timeout in hops
+            ]
+            _store_samples(db, samples)
+
+            # --- Route-change detection (from the warmed route cache) ---
+            # Recorded only after the samples are stored: a pending change
+            # would be lost to the rollback if a shared flush failed.
+            new_ips = list(columns["ip"])
+            old_route = _last_known_routes.get(target_id)
 
             if old_route is not None and old_route != new_ips:
-                record_route_change(db, target_id, old_route, new_ips)
+                record_route_change(db, target_id, old_route, new_ips, now=now)
                 logger.info(
                     "Route change detected for %s: %s → %s",
                     target_id,
                     old_route,
                     new_ips,
                 )
-
-            samples = [
-                Sample(
-                    target_id=target_id,
-                    sampled_at=now,
-                    hop_number=h["hop"],
-                    ip=h["ip"],
-                    dns=h["dns"],
-                    rtt_ms=h["rtt_ms"],
-                    is_timeout=h["is_timeout"],
-                )
-                for h in hops
-            ]
-            store_sample(db, samples)
-            _queue_dns_enrichment(hops)
+            _queue_dns_enrichment(columns)
 
             # Update route cache after the new sample is stored.
             _last_known_routes[target_id] = new_ips
@@ -228,19 +517,15 @@ def _collect_sample(target_id: str, host: str, max_hops: int, timeout: float) ->
             except Exception:
                 logger.exception("Failed to cache hop stats for %s", target_id)
 
-            # Evaluate threshold alerts, reusing the stats we just computed
-            # so the alert engine does not issue its own DB queries.
-            try:
-                evaluate_alerts(
-                    db,
-                    target_id,
-                    focus_n=cfg.default_focus,
-                    all_stats=all_stats,
-                )
-            except Exception:
-                logger.exception("Alert evaluation failed for %s", target_id)
+            # Hand threshold alerts to the alert thread, reusing the stats
+            # we just computed so the alert engine does not query them again.
+            _enqueue_alert_evaluation(target_id, cfg.default_focus, all_stats, now)
 
-            if cfg.enable_ws_summary_push:
+            # The summary row only travels over WebSockets; skip its query
+            # while nobody who would receive it is connected.
+            if cfg.enable_ws_summary_push and (
+                ws_summary_subscribers or ws_subscribers.get(target_id)
+            ):
                 try:
                     summary_row = get_target_summary(db, target_id, focus_n=cfg.default_focus)
                 except Exception:
@@ -248,109 +533,224 @@ def _collect_sample(target_id: str, host: str, max_hops: int, timeout: float) ->
         finally:
             db.close()
 
-        # Cache latest raw hops for WebSocket consumers.
-        latest_results[target_id] = hops
+        # Cache the latest trace for WebSocket consumers.
+        latest_results[target_id] = columns
 
         # Push to any connected WebSocket subscribers.
         _notify_subscribers(
             target_id,
-            hops,
-            sampled_at=now.isoformat(),
+            columns,
+            sampled_at=now,
             hop_stats=all_stats,
             summary_row=summary_row,
         )
     finally:
-        lock.release()
+        with _inflight_lock:
+            _inflight.discard(target_id)
+
+
+def _run_dispatched(target_id: str, host: str, max_hops: int, timeout: float) -> None:
+    """Trace-pool entry point: leave the queued set, then sample.
+
+    The pool's futures are never awaited, so anything escaping
+    :func:`_collect_sample` is logged here instead of vanishing.
+    """
+    with _inflight_lock:
+        _queued.discard(target_id)
+    try:
+        _collect_sample(target_id, host, max_hops, timeout)
+    except Exception:
+        logger.exception("Sampling failed for target %s (%s)", target_id, host)
+
+
+def _dispatch_due(now: Optional[float] = None) -> None:
+    """Hand every target whose trace is due to the trace pool.
+
+    Each due target is re-pushed at its next due time.  Like APScheduler's
+    ``coalesce``, a target that fell more than one interval behind runs
+    once and is rescheduled from *now* rather than replaying the missed
+    ticks.  A target whose previous trace is still queued or running is
+    skipped for this tick and counted in :func:`scheduler_metrics`.
+
+    Args:
+        now: ``time.monotonic()`` reading to dispatch against.
+    """
+    if now is None:
+        now = time.monotonic()
+    due: list[tuple[str, _Monitor]] = []
+    with _dispatch_lock:
+        while _dispatch_heap and _dispatch_heap[0][0] <= now:
+            fire_at, gen, target_id = heapq.heappop(_dispatch_heap)
+            monitor = _monitored.get(target_id)
+            if monitor is None or monitor.generation != gen:
+                continue
+            next_at = fire_at + monitor.interval
+            if next_at <= now:
+                next_at = now + monitor.interval
+            heapq.heappush(_dispatch_heap, (next_at, gen, target_id))
+            due.append((target_id, monitor))
+
+    for target_id, monitor in due:
+        with _inflight_lock:
+            busy = target_id in _queued or target_id in _inflight
+            if busy:
+                _skipped_samples[target_id] = _skipped_samples.get(target_id, 0) + 1
+            else:
+                _queued.add(target_id)
+        if busy:
+            continue
+        _trace_pool.submit(monitor.run)
+
+
+async def _dispatch_tick() -> None:
+    """Scheduler job running :func:`_dispatch_due` on the event loop."""
+    _dispatch_due()
 
 
 def _notify_subscribers(
     target_id: str,
-    hops: list[dict],
-    sampled_at: Optional[str] = None,
+    hops: dict[str, list],
+    sampled_at: Optional[datetime] = None,
     hop_stats: Optional[list[dict]] = None,
     summary_row: Optional[dict] = None,
 ) -> None:
-    """Enqueue the latest hop data for all WebSocket subscribers.
+    """Buffer the latest hop data for the next WebSocket broadcast.
+
+    Nothing is serialised or enqueued here; :func:`_flush_broadcasts`
+    delivers everything buffered since its previous run as one frame per
+    subscriber.  Topics without subscribers are not buffered.
 
     Args:
         target_id: UUID-style target identifier.
-        hops: List of hop dictionaries from the most recent trace.
+        hops: The most recent trace, as built by :func:`hop_columns`.
+        sampled_at: Trace timestamp; left as a ``datetime`` for
+            ``orjson`` to render when the frame is serialised.
     """
-    queues = ws_subscribers.get(target_id, set())
-    payload_data = {"type": "target_sample", "target_id": target_id, "hops": hops}
-    if sampled_at is not None:
-        payload_data["sampled_at"] = sampled_at
-    if hop_stats is not None:
-        payload_data["hop_stats"] = hop_stats
-    if summary_row is not None:
-        payload_data["summary_row"] = summary_row
-    payload = json.dumps(payload_data)
-    dead: list = []
-    for queue in queues:
+    messages: list[tuple[Optional[str], dict]] = []
+    if ws_subscribers.get(target_id):
+        message: dict[str, Any] = {"type": "target_sample", "target_id": target_id, "hops": hops}
+        if sampled_at is not None:
+            message["sampled_at"] = sampled_at
+        if hop_stats is not None:
+            message["hop_stats"] = hop_stats
+        if summary_row is not None:
+            message["summary_row"] = summary_row
+        messages.append((target_id, message))
+
+    # Summary deltas go to subscribers of the summary feed.
+    if summary_row is not None and ws_summary_subscribers:
+        messages.append(
+            (
+                _SUMMARY_TOPIC,
+                {
+                    "type": "summary_update",
+                    "target_id": target_id,
+                    "summary_row": summary_row,
+                    "sampled_at": sampled_at,
+                },
+            )
+        )
+
+    if messages:
+        with _broadcast_lock:
+            for topic, message in messages:
+                _broadcast_buffer.setdefault(topic, []).append(message)
+
+
+def _try_put(queue, payload: str) -> bool:
+    """Enqueue *payload*, returning ``False`` if the queue is unusable.
+
+    A full queue belongs to a client that is momentarily slow, not gone:
+    its oldest frame is dropped to make room rather than unsubscribing it.
+    """
+    try:
         try:
             queue.put_nowait(payload)
-        except Exception:
-            dead.append(queue)
-    for q in dead:
-        queues.discard(q)
-
-    # Broadcast summary deltas to subscribers of the summary feed.
-    if summary_row is not None:
-        summary_payload = json.dumps(
-            {
-                "type": "summary_update",
-                "target_id": target_id,
-                "summary_row": summary_row,
-                "sampled_at": sampled_at,
-            }
-        )
-        dead_summary = []
-        for queue in ws_summary_subscribers:
-            try:
-                queue.put_nowait(summary_payload)
-            except Exception:
-                dead_summary.append(queue)
-        for q in dead_summary:
-            ws_summary_subscribers.discard(q)
+        except asyncio.QueueFull:
+            queue.get_nowait()
+            queue.put_nowait(payload)
+    except Exception:
+        return False
+    return True
 
 
-def _process_dns_enrichment() -> None:
-    """Resolve queued IPs and backfill DNS names asynchronously."""
+def _flush_broadcasts() -> None:
+    """Deliver buffered messages as one ``{"batch": [...]}`` frame per queue.
+
+    Must run on the event loop that owns the subscriber queues.  The
+    WebSocket handlers add and remove queues on that same loop, so the
+    subscriber sets need no lock here.
+    """
+    with _broadcast_lock:
+        if not _broadcast_buffer:
+            return
+        pending = dict(_broadcast_buffer)
+        _broadcast_buffer.clear()
+
+    for topic, messages in pending.items():
+        if topic is _SUMMARY_TOPIC:
+            queues = ws_summary_subscribers
+        else:
+            queues = ws_subscribers.get(topic, set())
+        if not queues:
+            continue
+        payload = orjson.dumps({"batch": messages}).decode()
+        queues.difference_update({q for q in queues if not _try_put(q, payload)})
+
+
+async def _broadcast_tick() -> None:
+    """Scheduler job running :func:`_flush_broadcasts` on the event loop.
+
+    Declared as a coroutine and bound to the asyncio executor so it is
+    awaited on the loop instead of a worker thread; ``asyncio.Queue`` is
+    not thread-safe.
+    """
+    _flush_broadcasts()
+
+
+async def _process_dns_enrichment() -> None:
+    """Resolve queued IPs and backfill DNS names asynchronously.
+
+    Lookups are awaited through :func:`reverse_dns_many` and the backfill
+    runs in the loop's default executor, so the job itself never blocks
+    the event loop.
+    """
     cfg = get_settings()
     if not cfg.enable_dns_enrichment_worker or not _dns_pending_ips:
         return
 
+    # Trace threads only ever add to the set and this job is the sole
+    # consumer, so a non-empty check guarantees the following pop().
     batch: list[str] = []
-    for ip in list(_dns_pending_ips):
-        batch.append(ip)
-        _dns_pending_ips.discard(ip)
-        if len(batch) >= cfg.dns_enrichment_batch_size:
-            break
+    while _dns_pending_ips and len(batch) < cfg.dns_enrichment_batch_size:
+        batch.append(_dns_pending_ips.pop())
     if not batch:
         return
 
-    resolved: dict[str, str] = {}
-    for ip in batch:
-        name = reverse_dns(ip)
-        if name and name != NO_PTR:
-            resolved[ip] = name
+    names = await reverse_dns_many(batch)
+    resolved = {ip: name for ip, name in names.items() if name and name != NO_PTR}
 
     if not resolved:
         return
 
-    db = SessionLocal()
+    await asyncio.get_running_loop().run_in_executor(None, _backfill_dns, resolved)
+
+
+def _backfill_dns(resolved: dict[str, str]) -> None:
+    """Write one enrichment batch's names to the stored samples."""
+    db = _worker_sessions()
     try:
-        for ip, dns_name in resolved.items():
-            backfill_dns_for_ip(db, ip=ip, dns_name=dns_name, limit=5000)
+        backfill_dns_bulk(db, resolved)
         db.commit()
     finally:
         db.close()
+    stats_cache.backfill_dns_many(resolved)
 
 
 def _run_maintenance() -> None:
     """Roll up and prune historical sample data."""
     cfg = get_settings()
-    db = SessionLocal()
+    db = _worker_sessions()
     try:
         if cfg.enable_rollups:
             aggregate_hourly_rollups(db, older_than_hours=cfg.rollup_after_hours)
@@ -360,11 +760,32 @@ def _run_maintenance() -> None:
         db.close()
 
 
+async def _maintenance_tick() -> None:
+    """Scheduler job running :func:`_run_maintenance` in the default executor."""
+    await asyncio.get_running_loop().run_in_executor(None, _run_maintenance)
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
 
+def warm_route_cache() -> None:
+    """Load every target's last stored route with one query.
+
+    Called by :func:`start_scheduler` before any trace runs, so the first
+    sample after a restart still detects a route change that happened
+    while the service was down.  Targets without samples (including any
+    added later) simply have nothing to compare their first trace with.
+    """
+    db = SessionLocal()
+    try:
+        routes = get_last_known_routes(db)
+    finally:
+        db.close()
+    _last_known_routes.update(routes)
+
+
 def start_monitoring(
     target_id: str,
     host: str,
@@ -372,51 +793,74 @@ def start_monitoring(
     max_hops: int = 30,
     timeout: float = 3.0,
 ) -> None:
-    """Register an interval job to continuously trace *host*.
+    """Schedule *host* to be traced every *interval* seconds.
 
-    If a job with the same *target_id* already exists it is replaced.
+    The first trace runs one interval from now.  If *target_id* is
+    already monitored its schedule and parameters are replaced.
 
     Args:
-        target_id: Unique identifier used as the APScheduler job ID.
+        target_id: Unique identifier of the target.
         host: Hostname or IP to trace.
         interval: Seconds between successive traces.
         max_hops: Maximum TTL per trace.
         timeout: Per-probe timeout in seconds.
     """
-    scheduler.add_job(
-        func=_collect_sample,
-        trigger="interval",
-        seconds=interval,
-        args=[target_id, host, max_hops, timeout],
-        id=target_id,
-        coalesce=True,
-        max_instances=32,
-        misfire_grace_time=1,
-        replace_existing=True,
-    )
+    gen = next(_generations)
+    run = functools.partial(_run_dispatched, target_id, host, max_hops, timeout)
+    with _dispatch_lock:
+        _monitored[target_id] = _Monitor(host, interval, run, gen)
+        heapq.heappush(_dispatch_heap, (time.monotonic() + interval, gen, target_id))
     logger.info("Started monitoring %s (%s) every %.1fs", target_id, host, interval)
 
 
 def stop_monitoring(target_id: str) -> None:
-    """Remove the scheduled trace job for *target_id*.
+    """Stop tracing *target_id*.
 
-    No-op if the job does not exist.
+    No-op if the target is not monitored.  A trace already running is
+    allowed to finish.
 
     Args:
-        target_id: The APScheduler job ID (same as the target ID).
+        target_id: The target identifier passed to :func:`start_monitoring`.
     """
-    try:
-        scheduler.remove_job(target_id)
+    with _dispatch_lock:
+        removed = _monitored.pop(target_id, None)
+    if removed is not None:
         logger.info("Stopped monitoring %s", target_id)
-    except Exception:
-        logger.debug("No active job for %s", target_id)
+    else:
+        logger.debug("%s is not monitored", target_id)
 
     latest_results.pop(target_id, None)
     latest_hop_stats.pop(target_id, None)
     _dns_failures_by_target.pop(target_id, None)
-    _target_run_locks.pop(target_id, None)
+    with _inflight_lock:
+        _skipped_samples.pop(target_id, None)
     _last_known_routes.pop(target_id, None)
-    _route_cache_initialized.discard(target_id)
+
+
+def scheduler_metrics() -> dict:
+    """Return counters describing the sampling pipeline's health.
+
+    Returns:
+        Dictionary with ``monitored_targets``, ``queued_traces`` (traces
+        handed to the trace pool but not started yet), ``skipped_samples``
+        (per-target count of ticks dropped because the previous trace was
+        still queued or running), ``alert_queue_depth``, and
+        ``sample_buffer_rows``.
+    """
+    with _dispatch_lock:
+        monitored = len(_monitored)
+    with _inflight_lock:
+        queued = len(_queued)
+        skipped = dict(_skipped_samples)
+    with _sample_buffer_lock:
+        buffered = len(_sample_buffer)
+    return {
+        "monitored_targets": monitored,
+        "queued_traces": queued,
+        "skipped_samples": skipped,
+        "alert_queue_depth": _alert_queue.qsize(),
+        "sample_buffer_rows": buffered,
+    }
 
 
 def start_scheduler() -> None:
@@ -427,11 +871,17 @@ def start_scheduler() -> None:
     """
     if scheduler.running:
         return
+    try:
+        warm_route_cache()
+    except Exception:
+        logger.exception("Failed to warm the route cache; first samples skip route checks")
     scheduler.start()
+    _start_alert_worker()
     cfg = get_settings()
     if cfg.enable_dns_enrichment_worker:
         scheduler.add_job(
             func=_process_dns_enrichment,
+            executor=_LOOP_EXECUTOR,
             trigger="interval",
             seconds=max(0.25, cfg.dns_enrichment_tick_seconds),
             id=_DNS_JOB_ID,
@@ -440,7 +890,28 @@ def start_scheduler() -> None:
             replace_existing=True,
         )
     scheduler.add_job(
-        func=_run_maintenance,
+        func=_dispatch_tick,
+        executor=_LOOP_EXECUTOR,
+        trigger="interval",
+        seconds=max(0.05, cfg.trace_dispatch_tick_seconds),
+        id=_DISPATCH_JOB_ID,
+        coalesce=True,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        func=_broadcast_tick,
+        executor=_LOOP_EXECUTOR,
+        trigger="interval",
+        seconds=max(0.05, cfg.ws_broadcast_tick_seconds),
+        id=_BROADCAST_JOB_ID,
+        coalesce=True,
+        max_instances=1,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        func=_maintenance_tick,
+        executor=_LOOP_EXECUTOR,
         trigger="interval",
         minutes=max(1, cfg.maintenance_interval_minutes),
         id=_MAINTENANCE_JOB_ID,
@@ -452,7 +923,19 @@ def start_scheduler() -> None:
 
 
 def shutdown_scheduler() -> None:
-    """Gracefully shut down the APScheduler background thread."""
+    """Gracefully shut down the APScheduler background thread.
+
+    Once dispatching has stopped, traces that have not started are
+    cancelled and running ones are waited for, so none of them writes
+    after the caller disposes of the database.  A fresh, idle trace pool
+    replaces the old one for a later :func:`start_scheduler`.
+    """
+    global _trace_pool
     if scheduler.running:
         scheduler.shutdown(wait=False)
         logger.info("Scheduler stopped")
+    pool, _trace_pool = _trace_pool, _new_trace_pool()
+    pool.shutdown(wait=True, cancel_futures=True)
+    with _inflight_lock:
+        _queued.clear()
+    _stop_alert_worker()
@@ -1,51 +1,67 @@
-"""Cross-platform traceroute engine using system ``ping`` and ``traceroute``.
+"""Cross-platform traceroute engine using ICMP sockets and ``traceroute``.
 
-Two strategies are provided:
+Three strategies are provided:
 
-* **ping-per-hop** — sends one ICMP echo with an incrementing TTL via
-  the system ``ping`` binary.  Works without root on both macOS and
-  Linux.
+* **native ICMP** — sends one ICMP echo per TTL over a single socket
+  and decodes the replies directly.  Uses unprivileged datagram ICMP
+  sockets where the OS allows them (macOS, Linux within
+  ``ping_group_range``) and a raw socket otherwise.
+* **Scapy** — the same probes, sent as one batch through Scapy with
+  replies collected by a sniffer thread.
 * **system traceroute** — shells out to ``traceroute`` / ``tracert``
-  and parses the textual output.  Used as a fallback when ping-per-hop
-  parsing fails.
+  and parses the textual output.
 
-All public functions return a list of *hop dictionaries*::
+All public functions return a list of :class:`HopRec` records::
 
-    {"hop": int, "ip": str | None, "rtt_ms": float | None, "is_timeout": bool}
+    HopRec(hop: int, ip: str | None, dns: str | None,
+           rtt_ms: float | None, is_timeout: bool)
 """
 
+import functools
+import itertools
 import logging
+import os
 import platform
 import re
+import selectors
 import socket
+import struct
 import subprocess
+import threading
 import time
-from typing import Optional
+from typing import Any, Iterator, NamedTuple, Optional
 
 from pingwatcher.engine.dns import reverse_dns
 
 logger = logging.getLogger(__name__)
 
-# Pre-compiled patterns for parsing ping output across platforms.
-_RE_TTL_EXCEEDED_MAC = re.compile(
-    r"(\d+) bytes from ([\d.]+): Time to live exceeded"
-)
-_RE_TTL_EXCEEDED_LINUX = re.compile(
-    r"From ([\d.]+) .*Time to live exceeded"
-)
-_RE_REPLY_RTT = re.compile(r"time[=<]([\d.]+)\s*ms")
-_RE_REPLY_FROM = re.compile(r"from ([\d.]+)")
-
-# Patterns for parsing system traceroute output.
+# Patterns for parsing system traceroute output.  Applied to the whole
+# stdout at once, so whitespace classes must not cross line breaks.
 _RE_TRACEROUTE_HOP = re.compile(
-    r"^\s*(\d+)\s+"
-    r"(?:(\d+\.\d+\.\d+\.\d+)\s+([\d.]+)\s*ms"
-    r"|\*)"
+    r"^[ \t]*(\d+)[ \t]+"
+    r"(?:(\d+\.\d+\.\d+\.\d+)[ \t]+([\d.]+)[ \t]*ms"
+    r"|\*)",
+    re.MULTILINE,
 )
 
 _PLATFORM = platform.system().lower()
 
 
+class HopRec(NamedTuple):
+    """One hop of a traceroute.
+
+    A tuple rather than a dict keeps the per-hop footprint small; every
+    trace allocates one of these per TTL.  Use :meth:`_asdict` where a
+    mapping is needed.
+    """
+
+    hop: int
+    ip: Optional[str]
+    dns: Optional[str]
+    rtt_ms: Optional[float]
+    is_timeout: bool
+
+
 def resolve_target(host: str) -> str:
     """Resolve *host* to an IPv4 address string.
 
@@ -62,112 +78,226 @@ def resolve_target(host: str) -> str:
 
 
 # ---------------------------------------------------------------------------
-# Ping-per-hop strategy
+# Native ICMP strategy
 # ---------------------------------------------------------------------------
 
+_ICMP_ECHO_REPLY = 0
+_ICMP_DEST_UNREACHABLE = 3
+_ICMP_ECHO_REQUEST = 8
+_ICMP_TIME_EXCEEDED = 11
 
-def _build_ping_cmd(target: str, ttl: int, timeout: float) -> list[str]:
-    """Return the platform-appropriate ``ping`` command list.
+_ICMP_HEADER = struct.Struct("!BBHHH")
+# struct sock_extended_err, followed by the offender's sockaddr_in.
+_SOCK_EXTENDED_ERR = struct.Struct("=IBBBBII")
+_RECV_SIZE = 1500
 
-    Args:
-        target: Destination host or IP.
-        ttl: IP Time-To-Live for this probe.
-        timeout: Probe timeout in seconds.
+# Linux reports ICMP errors for unprivileged datagram sockets on the
+# socket error queue instead of as datagrams.
+_IP_RECVERR = getattr(socket, "IP_RECVERR", 11) if _PLATFORM == "linux" else None
+_MSG_ERRQUEUE = getattr(socket, "MSG_ERRQUEUE", None)
+
+_ident_counter = itertools.count(os.getpid())
+
+
+def _checksum(data: bytes) -> int:
+    """Return the RFC 1071 Internet checksum of *data*."""
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_request(ident: int, seq: int) -> bytes:
+    """Build an ICMP echo request header with a valid checksum."""
+    unsummed = _ICMP_HEADER.pack(_ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return _ICMP_HEADER.pack(_ICMP_ECHO_REQUEST, 0, _checksum(unsummed), ident, seq)
+
+
+def _open_icmp_socket() -> tuple[socket.socket, bool]:
+    """Open a non-blocking ICMP socket.
+
+    Unprivileged datagram ICMP sockets (macOS; Linux within
+    ``net.ipv4.ping_group_range``) are preferred, with a raw socket as
+    the fallback for root.
 
     Returns:
-        Command tokens suitable for :func:`subprocess.run`.
+        ``(sock, is_dgram)``.
+
+    Raises:
+        PermissionError: If neither socket kind may be opened.
     """
-    if _PLATFORM == "darwin":
-        return [
-            "ping",
-            "-c", "1",
-            "-m", str(ttl),
-            "-t", str(max(1, int(timeout))),
-            target,
-        ]
-    # Linux (and other POSIX).
-    return [
-        "ping",
-        "-c", "1",
-        "-t", str(ttl),
-        "-W", str(max(1, int(timeout))),
-        target,
-    ]
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP)
+        is_dgram = True
+    except OSError:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        is_dgram = False
+    if is_dgram and _IP_RECVERR is not None:
+        sock.setsockopt(socket.IPPROTO_IP, _IP_RECVERR, 1)
+    sock.setblocking(False)
+    return sock, is_dgram
 
 
-def _parse_ping_output(output: str, target_ip: str) -> dict:
-    """Extract hop IP and RTT from ``ping`` standard output/error.
+def _parse_icmp_packet(packet: bytes) -> Optional[tuple[int, int, int]]:
+    """Identify the echo request an incoming ICMP message answers.
 
     Args:
-        output: Combined stdout + stderr text from the ping process.
-        target_ip: Resolved IPv4 address of the final destination.
+        packet: An ICMP message, optionally preceded by its IPv4 header
+            (raw sockets and macOS datagram sockets include it).
 
     Returns:
-        Dictionary with ``ip``, ``rtt_ms``, and ``is_timeout``.
+        ``(icmp_type, ident, seq)``, taking the identifiers from the
+        quoted original datagram for time-exceeded and unreachable
+        errors, or ``None`` for anything that does not answer an echo
+        request.
     """
-    # Check for TTL-exceeded (intermediate hop).
-    match = _RE_TTL_EXCEEDED_MAC.search(output) or _RE_TTL_EXCEEDED_LINUX.search(output)
-    if match:
-        ip = match.group(2) if match.lastindex and match.lastindex >= 2 else match.group(1)
-        return {"ip": ip, "rtt_ms": None, "is_timeout": False}
-
-    # Check for a successful reply (final hop or echo reply).
-    rtt_match = _RE_REPLY_RTT.search(output)
-    from_match = _RE_REPLY_FROM.search(output)
-    if rtt_match and from_match:
-        return {
-            "ip": from_match.group(1),
-            "rtt_ms": float(rtt_match.group(1)),
-            "is_timeout": False,
-        }
-
-    # Timeout — no usable response.
-    return {"ip": None, "rtt_ms": None, "is_timeout": True}
-
-
-def _send_probe(
-    target: str,
-    target_ip: str,
-    ttl: int,
-    timeout: float,
-    resolve_dns_name: bool = True,
-) -> dict:
-    """Send a single ping probe at the given TTL and parse the result.
+    if packet and packet[0] >> 4 == 4:
+        packet = packet[(packet[0] & 0x0F) * 4:]
+    if len(packet) < _ICMP_HEADER.size:
+        return None
+    icmp_type, _code, _csum, ident, seq = _ICMP_HEADER.unpack_from(packet)
+    if icmp_type == _ICMP_ECHO_REPLY:
+        return icmp_type, ident, seq
+    if icmp_type not in (_ICMP_TIME_EXCEEDED, _ICMP_DEST_UNREACHABLE):
+        return None
+
+    quoted = packet[_ICMP_HEADER.size:]
+    if not quoted or quoted[0] >> 4 != 4:
+        return None
+    quoted = quoted[(quoted[0] & 0x0F) * 4:]
+    if len(quoted) < _ICMP_HEADER.size:
+        return None
+    quoted_type, _code, _csum, ident, seq = _ICMP_HEADER.unpack_from(quoted)
+    if quoted_type != _ICMP_ECHO_REQUEST:
+        return None
+    return icmp_type, ident, seq
+
+
+def _parse_error_queue(
+    data: bytes,
+    ancdata: list[tuple[int, int, bytes]],
+) -> Optional[tuple[int, int, int, str]]:
+    """Decode one Linux error-queue entry for a sent echo request.
 
     Args:
-        target: Destination hostname or IP.
-        target_ip: Pre-resolved IPv4 of *target*.
-        ttl: TTL / hop count for this probe.
-        timeout: Per-probe timeout in seconds.
+        data: The echo request the error refers to.
+        ancdata: Control messages returned by ``recvmsg``.
 
     Returns:
-        Hop dictionary with ``hop``, ``ip``, ``dns``, ``rtt_ms``, and
-        ``is_timeout``.
+        ``(icmp_type, ident, seq, offender_ip)`` or ``None``.
     """
-    cmd = _build_ping_cmd(target, ttl, timeout)
-    try:
-        proc = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout + 2,
+    if len(data) < _ICMP_HEADER.size:
+        return None
+    offender_at = _SOCK_EXTENDED_ERR.size + 4
+    for level, cmsg_type, cmsg_data in ancdata:
+        if level != socket.IPPROTO_IP or cmsg_type != _IP_RECVERR:
+            continue
+        if len(cmsg_data) < offender_at + 4:
+            continue
+        _errno, _origin, icmp_type, _code, _pad, _info, _data = _SOCK_EXTENDED_ERR.unpack_from(
+            cmsg_data
         )
-        combined = proc.stdout + "\n" + proc.stderr
-    except subprocess.TimeoutExpired:
-        combined = ""
+        _type, _code, _csum, ident, seq = _ICMP_HEADER.unpack_from(data)
+        return icmp_type, ident, seq, socket.inet_ntoa(cmsg_data[offender_at:offender_at + 4])
+    return None
+
+
+def _drain(sock: socket.socket, is_dgram: bool) -> Iterator[tuple[int, int, int, str]]:
+    """Yield ``(icmp_type, ident, seq, src_ip)`` for every pending response."""
+    if is_dgram and _IP_RECVERR is not None and _MSG_ERRQUEUE is not None:
+        while True:
+            try:
+                data, ancdata, _flags, _addr = sock.recvmsg(_RECV_SIZE, 512, _MSG_ERRQUEUE)
+            except OSError:
+                break
+            error = _parse_error_queue(data, ancdata)
+            if error is not None:
+                yield error
+    while True:
+        try:
+            packet, (src_ip, _port) = sock.recvfrom(_RECV_SIZE)
+        except OSError:
+            # Empty (EAGAIN), or a datagram socket surfacing an ICMP
+            # error already read from the error queue.
+            break
+        parsed = _parse_icmp_packet(packet)
+        if parsed is not None:
+            yield (*parsed, src_ip)
+
 
-    parsed = _parse_ping_output(combined, target_ip)
-    rtt = parsed["rtt_ms"]
+def _gather_responses(
+    sock: socket.socket,
+    is_dgram: bool,
+    ident: int,
+    target_ip: str,
+    max_hops: int,
+    timeout: float,
+    inter_packet_delay: float,
+) -> dict[int, tuple[str, float]]:
+    """Fire one probe per TTL and collect the answers on one selector loop.
+
+    Probes go out *inter_packet_delay* apart, and responses that arrive
+    meanwhile are read as they come, so every probe's RTT is measured
+    from its own send.  Nothing is sent past the first TTL the target
+    itself answers.  The loop ends once that TTL and every lower one
+    are answered, or *timeout* after the last send.
+
+    Args:
+        sock: Socket from :func:`_open_icmp_socket`.
+        is_dgram: Whether *sock* is a datagram ICMP socket.
+        ident: ICMP identifier for this trace.
+        target_ip: Resolved IPv4 address of the destination.
+        max_hops: Highest TTL to probe; TTLs double as sequence numbers.
+        timeout: Seconds to wait for answers after the last send.
+        inter_packet_delay: Seconds between successive sends.
 
-    dns_name = reverse_dns(parsed["ip"]) if (resolve_dns_name and parsed["ip"]) else None
+    Returns:
+        Mapping of answered TTL to ``(responder_ip, rtt_ms)``.
+    """
+    sent_at: dict[int, float] = {}
+    answers: dict[int, tuple[str, float]] = {}
+    idents: tuple[int, ...] = (ident,)
+    target_ttl: Optional[int] = None
+    next_ttl = 1
+    next_send = time.perf_counter()
+    deadline = 0.0
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(sock, selectors.EVENT_READ)
+        while True:
+            now = time.perf_counter()
+            sending = next_ttl <= max_hops and (target_ttl is None or next_ttl < target_ttl)
+            if sending and now >= next_send:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, next_ttl)
+                sock.sendto(_echo_request(ident, next_ttl), (target_ip, 0))
+                sent_at[next_ttl] = now
+                if is_dgram and next_ttl == 1:
+                    # Linux rewrites the identifier of datagram sockets to
+                    # their port, which is only bound by the first send.
+                    idents = (ident, sock.getsockname()[1])
+                next_ttl += 1
+                next_send = now + inter_packet_delay
+                deadline = now + timeout
+                continue
+
+            if target_ttl is not None and all(ttl in answers for ttl in range(1, target_ttl)):
+                break
+            wake_at = next_send if sending else deadline
+            if not sending and now >= deadline:
+                break
+            if not selector.select(max(0.0, wake_at - now)):
+                continue
 
-    return {
-        "hop": ttl,
-        "ip": parsed["ip"],
-        "dns": dns_name,
-        "rtt_ms": round(rtt, 2) if rtt is not None else None,
-        "is_timeout": parsed["is_timeout"],
-    }
+            received = time.perf_counter()
+            for _icmp_type, reply_ident, seq, src_ip in _drain(sock, is_dgram):
+                if reply_ident not in idents or seq not in sent_at or seq in answers:
+                    continue
+                answers[seq] = (src_ip, round((received - sent_at[seq]) * 1000.0, 2))
+                if src_ip == target_ip and (target_ttl is None or seq < target_ttl):
+                    target_ttl = seq
+    return answers
 
 
 def icmp_traceroute(
@@ -177,112 +307,162 @@ def icmp_traceroute(
     inter_packet_delay: float = 0.025,
     max_consecutive_timeouts: int = 4,
     resolve_dns_name: bool = True,
-) -> list[dict]:
-    """Run a single ICMP traceroute to *target* using per-hop pings.
+) -> list[HopRec]:
+    """Run a single ICMP traceroute to *target* over one native socket.
 
-    Each TTL from 1 to *max_hops* is probed in sequence.  The trace
-    stops early when a reply arrives from the target IP itself.
+    All TTLs are in flight together (see :func:`_gather_responses`), so
+    a trace takes about one *timeout* however many hops stay silent.
+    The result ends at the first hop answered by the target itself.
 
     Args:
         target: Hostname or IP to trace.
         max_hops: Maximum TTL to send.
-        timeout: Per-probe timeout in seconds.
+        timeout: Seconds to wait for answers after the last probe.
         inter_packet_delay: Pause between successive probes in seconds.
-        max_consecutive_timeouts: End the trace early after this many
-            consecutive hop timeouts.
+        max_consecutive_timeouts: Cut the trace after this many
+            consecutive unanswered hops.
 
     Returns:
-        Ordered list of hop dictionaries.
+        Ordered list of hops.
+
+    Raises:
+        PermissionError: If no ICMP socket may be opened.
     """
     target_ip = resolve_target(target)
-    hops: list[dict] = []
-    consecutive_timeouts = 0
-
-    for ttl in range(1, max_hops + 1):
-        result = _send_probe(
-            target,
+    ident = next(_ident_counter) & 0xFFFF
+
+    sock, is_dgram = _open_icmp_socket()
+    with sock:
+        answers = _gather_responses(
+            sock,
+            is_dgram,
+            ident,
             target_ip,
-            ttl,
+            max_hops,
             timeout,
-            resolve_dns_name=resolve_dns_name,
+            inter_packet_delay,
         )
-        hops.append(result)
-        logger.debug("hop %d → %s  rtt=%s", ttl, result["ip"], result["rtt_ms"])
 
-        if result["ip"] == target_ip:
-            break
-        if result["is_timeout"]:
+    hops: list[HopRec] = []
+    consecutive_timeouts = 0
+    for ttl in range(1, max_hops + 1):
+        answer = answers.get(ttl)
+        if answer is None:
+            hops.append(HopRec(ttl, None, None, None, True))
             consecutive_timeouts += 1
             if consecutive_timeouts >= max_consecutive_timeouts:
                 break
-        else:
-            consecutive_timeouts = 0
-        if inter_packet_delay > 0:
-            time.sleep(inter_packet_delay)
-
+            continue
+        consecutive_timeouts = 0
+        ip, rtt_ms = answer
+        dns_name = reverse_dns(ip) if resolve_dns_name else None
+        hops.append(HopRec(ttl, ip, dns_name, rtt_ms, False))
+        logger.debug("hop %d → %s  rtt=%s", ttl, ip, rtt_ms)
+        if ip == target_ip:
+            break
     return hops
 
 
+@functools.lru_cache(maxsize=1)
+def _scapy_can_compile_filters() -> bool:
+    """Return whether Scapy can build BPF filters (needs libpcap or tcpdump).
+
+    Without them the sniffer falls back to a Python ``lfilter``.
+    """
+    try:
+        from scapy.arch.common import compile_filter  # type: ignore
+
+        compile_filter("icmp")
+    except Exception:
+        return False
+    return True
+
+
 def scapy_icmp_traceroute(
     target: str,
     max_hops: int = 30,
     timeout: float = 3.0,
     resolve_dns_name: bool = True,
-) -> list[dict]:
+) -> list[HopRec]:
     """Run a batched ICMP traceroute with Scapy.
 
-    Sends all TTL probes in one shot and maps responses back by TTL. This
-    collapses trace duration toward ``max(timeout)`` rather than summing
-    per-hop subprocess waits.
+    Every TTL probe is written back to back on one L3 socket while an
+    :class:`~scapy.all.AsyncSniffer` thread collects ICMP replies.
+    Replies are matched to probes by the echo id/seq (taken from the
+    quoted header for Time Exceeded), so there is no per-packet
+    send/receive matching in ``sr()``.  The wait ends once the target
+    and every nearer hop have answered, or *timeout* after the last send.
     """
     # Delay import so environments without Scapy can still use subprocess mode.
-    from scapy.all import ICMP, IP, sr  # type: ignore
+    from scapy.all import ICMP, IP, AsyncSniffer, ICMPerror, conf  # type: ignore
 
     target_ip = resolve_target(target)
-    packets = [IP(dst=target_ip, ttl=ttl) / ICMP() for ttl in range(1, max_hops + 1)]
-    answered, _unanswered = sr(
-        packets,
-        timeout=timeout,
-        retry=0,
-        verbose=False,
-    )
+    ident = next(_ident_counter) & 0xFFFF
+    packets = [
+        IP(dst=target_ip, ttl=ttl) / ICMP(id=ident, seq=ttl) for ttl in range(1, max_hops + 1)
+    ]
 
-    hops_by_ttl: dict[int, dict] = {
-        ttl: {
-            "hop": ttl,
-            "ip": None,
-            "dns": None,
-            "rtt_ms": None,
-            "is_timeout": True,
-        }
-        for ttl in range(1, max_hops + 1)
-    }
-
-    for sent_pkt, recv_pkt in answered:
-        ttl = int(getattr(sent_pkt, "ttl", 0))
-        if ttl <= 0 or ttl > max_hops:
+    sent_at: dict[int, float] = {}
+    answers: dict[int, tuple[str, Optional[float]]] = {}
+    ready = threading.Event()
+    done = threading.Event()
+    target_ttl = max_hops + 1
+
+    def _on_reply(pkt) -> None:
+        nonlocal target_ttl
+        if pkt.haslayer(ICMPerror):
+            probe = pkt[ICMPerror]
+        elif pkt.haslayer(ICMP) and pkt[ICMP].type == _ICMP_ECHO_REPLY:
+            probe = pkt[ICMP]
+        else:
+            return
+        ttl = int(probe.seq)
+        if probe.id != ident or ttl not in sent_at or ttl in answers:
+            return
+        src_ip = pkt[IP].src
+        answers[ttl] = (src_ip, round((float(pkt.time) - sent_at[ttl]) * 1000.0, 2))
+        if src_ip == target_ip:
+            target_ttl = min(target_ttl, ttl)
+        if target_ttl <= max_hops and all(t in answers for t in range(1, target_ttl)):
+            done.set()
+
+    if _scapy_can_compile_filters():
+        reply_filter: dict[str, Any] = {"filter": "icmp"}
+    else:
+        reply_filter = {"lfilter": lambda pkt: pkt.haslayer(ICMP)}
+    sniffer = AsyncSniffer(
+        prn=_on_reply,
+        store=False,
+        started_callback=ready.set,
+        **reply_filter,
+    )
+    sniffer.start()
+    if not ready.wait(timeout):
+        raise RuntimeError(f"Scapy sniffer did not start: {sniffer.exception}")
+    try:
+        sock = conf.L3socket()
+        try:
+            for ttl, packet in enumerate(packets, start=1):
+                sent_at[ttl] = time.time()
+                sock.send(packet)
+        finally:
+            sock.close()
+        done.wait(timeout)
+    finally:
+        sniffer.stop()
+
+    hops: list[HopRec] = []
+    for ttl in range(1, max_hops + 1):
+        answer = answers.get(ttl)
+        if answer is None:
+            hops.append(HopRec(ttl, None, None, None, True))
             continue
-        src_ip = getattr(recv_pkt, "src", None)
-        sent_time = getattr(sent_pkt, "sent_time", None)
-        recv_time = getattr(recv_pkt, "time", None)
-        rtt_ms = None
-        if sent_time is not None and recv_time is not None:
-            rtt_ms = round((float(recv_time) - float(sent_time)) * 1000.0, 2)
-
-        dns_name = reverse_dns(src_ip) if (resolve_dns_name and src_ip) else None
-        hops_by_ttl[ttl] = {
-            "hop": ttl,
-            "ip": src_ip,
-            "dns": dns_name,
-            "rtt_ms": rtt_ms,
-            "is_timeout": src_ip is None,
-        }
-
-    ordered = [hops_by_ttl[ttl] for ttl in range(1, max_hops + 1)]
-    for idx, hop in enumerate(ordered):
-        if hop["ip"] == target_ip:
-            return ordered[: idx + 1]
-    return ordered
+        src_ip, rtt_ms = answer
+        dns_name = reverse_dns(src_ip) if resolve_dns_name else None
+        hops.append(HopRec(ttl, src_ip, dns_name, rtt_ms, False))
+        if src_ip == target_ip:
+            break
+    return hops
 
 
 # ---------------------------------------------------------------------------
@@ -290,35 +470,31 @@ def scapy_icmp_traceroute(
 # ---------------------------------------------------------------------------
 
 
-def _parse_traceroute_output(output: str, resolve_dns_name: bool = True) -> list[dict]:
+def _parse_traceroute_output(output: str, resolve_dns_name: bool = True) -> list[HopRec]:
     """Parse the textual output of ``traceroute -n -q 1``.
 
     Args:
         output: Raw stdout from the traceroute process.
 
     Returns:
-        List of hop dictionaries.
+        List of parsed hops.
     """
-    hops: list[dict] = []
-    for line in output.splitlines():
-        match = _RE_TRACEROUTE_HOP.match(line)
-        if not match:
-            continue
-        hop_num = int(match.group(1))
-        ip: Optional[str] = match.group(2)
-        rtt_str = match.group(3)
+    hops: list[HopRec] = []
+    for match in _RE_TRACEROUTE_HOP.finditer(output):
+        hop_num_str, ip, rtt_str = match.groups()
+        hop_num = int(hop_num_str)
         rtt: Optional[float] = float(rtt_str) if rtt_str else None
         is_timeout = ip is None
 
         dns_name = reverse_dns(ip) if (resolve_dns_name and ip) else None
         hops.append(
-            {
-                "hop": hop_num,
-                "ip": ip,
-                "dns": dns_name,
-                "rtt_ms": round(rtt, 2) if rtt is not None else None,
-                "is_timeout": is_timeout,
-            }
+            HopRec(
+                hop_num,
+                ip,
+                dns_name,
+                round(rtt, 2) if rtt is not None else None,
+                is_timeout,
+            )
         )
     return hops
 
@@ -328,11 +504,12 @@ def system_traceroute(
     max_hops: int = 30,
     timeout: float = 3.0,
     resolve_dns_name: bool = True,
-) -> list[dict]:
+) -> list[HopRec]:
     """Run the system ``traceroute`` binary and parse its output.
 
-    This is a fallback for platforms where per-hop ``ping`` parsing is
-    unreliable.
+    :func:`~pingwatcher.engine.scheduler._select_probe_engine` tries this
+    first when Scapy is disabled or fails, before falling back to
+    :func:`icmp_traceroute` on a native socket.
 
     Args:
         target: Hostname or IP to trace.
@@ -340,7 +517,7 @@ def system_traceroute(
         timeout: Per-hop timeout in seconds.
 
     Returns:
-        Ordered list of hop dictionaries.
+        Ordered list of hops.
     """
     cmd = [
         "traceroute",
@@ -269,27 +269,32 @@ function connectWebSocket(targetId) {
 
   ws.onmessage = (event) => {
     try {
-      const data = JSON.parse(event.data);
-      if (data.target_id !== activeTargetId) return;
-      const sampledAt = data.sampled_at || new Date().toISOString();
+      const messages = unwrapBatch(JSON.parse(event.data)).filter(
+        (data) => data.target_id === activeTargetId
+      );
+      if (messages.length === 0) return;
       const activeView = document.querySelector(".tab-btn.active")?.dataset.view;
       if (activeView === "trace") {
-        if (Array.isArray(data.hop_stats)) {
-          renderTraceGraph(data.hop_stats);
+        // Only the newest sample in a batch is worth drawing.
+        const latest = messages[messages.length - 1];
+        if (Array.isArray(latest.hop_stats)) {
+          renderTraceGraph(latest.hop_stats);
         } else {
           refreshTrace();
         }
       }
       if (activeView === "timeline") {
-        const finalHop = getFinalHop(data.hops || []);
-        appendTimelinePoint(
-          {
-            timestamp: sampledAt,
-            rtt_ms: finalHop?.rtt_ms ?? null,
-            is_timeout: finalHop ? !!finalHop.is_timeout : true,
-          },
-          DEFAULT_TIMELINE_POINTS
-        );
+        for (const data of messages) {
+          const finalHop = getFinalHop(data.hops);
+          appendTimelinePoint(
+            {
+              timestamp: data.sampled_at || new Date().toISOString(),
+              rtt_ms: finalHop?.rtt_ms ?? null,
+              is_timeout: finalHop ? !!finalHop.is_timeout : true,
+            },
+            DEFAULT_TIMELINE_POINTS
+          );
+        }
       }
     } catch (err) {
       console.error("WebSocket parse error:", err);
@@ -304,15 +309,39 @@ function connectWebSocket(targetId) {
   };
 }
 
+/**
+ * Flatten a server frame into its messages.
+ *
+ * Live updates arrive coalesced as ``{batch: [...]}``; snapshots and the
+ * initial cached sample are sent as a single bare message.
+ *
+ * @param {Object} data - Parsed WebSocket frame.
+ * @returns {Array<Object>}
+ */
+function unwrapBatch(data) {
+  return Array.isArray(data.batch) ? data.batch : [data];
+}
+
 /**
  * Return the highest-hop row from a traceroute sample.
  *
- * @param {Array<{hop:number}>} hops
+ * Samples arrive columnar (one array per field, see ``hop_columns`` on
+ * the server); the matching entries are gathered back into one row.
+ *
+ * @param {{hop:number[], rtt_ms:Array, is_timeout:boolean[]}} hops
  * @returns {Object|null}
  */
 function getFinalHop(hops) {
-  if (!Array.isArray(hops) || hops.length === 0) return null;
-  return hops.reduce((acc, row) => (row.hop > acc.hop ? row : acc), hops[0]);
+  if (!hops || !Array.isArray(hops.hop) || hops.hop.length === 0) return null;
+  let last = 0;
+  for (let i = 1; i < hops.hop.length; i++) {
+    if (hops.hop[i] > hops.hop[last]) last = i;
+  }
+  return {
+    hop: hops.hop[last],
+    rtt_ms: hops.rtt_ms[last],
+    is_timeout: hops.is_timeout[last],
+  };
 }
 
 /** Close the current WebSocket connection. */
@@ -331,14 +360,17 @@ function connectSummaryWebSocket() {
   summaryWs = new WebSocket(`${protocol}//${location.host}/ws/summary`);
   summaryWs.onmessage = (event) => {
     try {
-      const data = JSON.parse(event.data);
-      if (data.type === "summary_snapshot" && Array.isArray(data.rows)) {
-        summaryRows = new Map(data.rows.map((row) => [row.target_id, row]));
-      } else if (data.type === "summary_update" && data.summary_row) {
-        summaryRows.set(data.target_id, data.summary_row);
-      } else {
-        return;
+      let changed = false;
+      for (const data of unwrapBatch(JSON.parse(event.data))) {
+        if (data.type === "summary_snapshot" && Array.isArray(data.rows)) {
+          summaryRows = new Map(data.rows.map((row) => [row.target_id, row]));
+          changed = true;
+        } else if (data.type === "summary_update" && data.summary_row) {
+          summaryRows.set(data.target_id, data.summary_row);
+          changed = true;
+        }
       }
+      if (!changed) return;
       renderSummary(Array.from(summaryRows.values()));
     } catch (err) {
       console.error("Summary WS parse error:", err);
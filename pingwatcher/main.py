@@ -10,18 +10,21 @@ import socket
 from contextlib import asynccontextmanager
 from pathlib import Path
 
+import orjson
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 
 from pingwatcher import __version__
 from pingwatcher.api.data import router as data_router
 from pingwatcher.api.sessions import router as sessions_router
 from pingwatcher.api.targets import router as targets_router
-from pingwatcher.config import get_settings
+from pingwatcher.config import get_settings, reload_defaults
 from pingwatcher.db.models import SessionLocal, init_db
 from pingwatcher.db.queries import get_summary, list_targets
 from pingwatcher.engine.scheduler import (
+    WS_QUEUE_MAXSIZE,
     latest_results,
     shutdown_scheduler,
     start_monitoring,
@@ -52,6 +55,9 @@ async def lifespan(app: FastAPI):
     logging.basicConfig(level=cfg.log_level, format="%(levelname)s %(name)s: %(message)s")
     logger.info("PingWatcher v%s starting up", __version__)
 
+    # Snapshot per-request defaults for the API routers.
+    reload_defaults()
+
     # Ensure tables exist.
     init_db()
 
@@ -88,6 +94,7 @@ app = FastAPI(
     version=__version__,
     description="A PingPlotter-like network monitoring web application.",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Mount API routers.
@@ -115,7 +122,8 @@ async def ws_live_feed(websocket: WebSocket, target_id: str):
 
     Each time the scheduler finishes a sample for *target_id*, the
     payload is pushed to every subscriber via an in-process
-    :class:`asyncio.Queue`.
+    :class:`asyncio.Queue`.  The queue is bounded; a client that falls
+    behind loses its oldest frames, not its subscription.
 
     Args:
         websocket: The incoming WebSocket connection.
@@ -123,14 +131,15 @@ async def ws_live_feed(websocket: WebSocket, target_id: str):
     """
     await websocket.accept()
 
-    queue: asyncio.Queue = asyncio.Queue()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_MAXSIZE)
     ws_subscribers.setdefault(target_id, set()).add(queue)
 
     try:
         # Send the most recent cached result immediately if available.
         cached = latest_results.get(target_id)
         if cached:
-            await websocket.send_json({"target_id": target_id, "hops": cached})
+            initial = orjson.dumps({"target_id": target_id, "hops": cached})
+            await websocket.send_text(initial.decode())
 
         while True:
             payload = await queue.get()
@@ -141,24 +150,29 @@ async def ws_live_feed(websocket: WebSocket, target_id: str):
         ws_subscribers.get(target_id, set()).discard(queue)
 
 
+def _summary_snapshot() -> list[dict]:
+    """Build the summary rows on a short-lived session.
+
+    Runs in the threadpool (like the sync REST handlers) so the
+    blocking query never stalls the event loop serving other sockets.
+    """
+    db = SessionLocal()
+    try:
+        return get_summary(db)
+    finally:
+        db.close()
+
+
 @app.websocket("/ws/summary")
 async def ws_summary_feed(websocket: WebSocket):
     """Stream summary-row updates for all active targets."""
     await websocket.accept()
-    queue: asyncio.Queue = asyncio.Queue()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=WS_QUEUE_MAXSIZE)
     ws_summary_subscribers.add(queue)
     try:
         # Push an initial snapshot for quick UI paint.
-        db = SessionLocal()
-        try:
-            await websocket.send_json(
-                {
-                    "type": "summary_snapshot",
-                    "rows": get_summary(db),
-                }
-            )
-        finally:
-            db.close()
+        rows = await run_in_threadpool(_summary_snapshot)
+        await websocket.send_text(orjson.dumps({"type": "summary_snapshot", "rows": rows}).decode())
 
         while True:
             payload = await queue.get()
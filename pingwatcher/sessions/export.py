@@ -2,26 +2,63 @@
 
 Functions accept a database session and a time range, then return the
 serialised data as a string (CSV) or a list of dictionaries (JSON).
+:func:`iter_session_csv` yields the CSV incrementally for streaming
+responses, and :func:`export_session_json_bytes` returns the JSON body
+already encoded by ``orjson``.
 """
 
 import csv
 import io
 from datetime import datetime
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, Optional
 
+import orjson
+from sqlalchemy import Row, Select, select
 from sqlalchemy.orm import Session
 
 from pingwatcher.db.models import Sample
 
+#: Rows fetched from the database per round-trip while streaming.
+_STREAM_BATCH = 1000
+
+_CSV_HEADER = ["sampled_at", "hop_number", "ip", "dns", "rtt_ms", "is_timeout"]
+
+# Exported columns, in the order of _CSV_HEADER; rows are unpacked by
+# position.
+_EXPORT_COLUMNS = (
+    Sample.sampled_at,
+    Sample.hop_number,
+    Sample.ip,
+    Sample.dns,
+    Sample.rtt_ms,
+    Sample.is_timeout,
+)
+
+
+def _samples_query(target_id: str, start: datetime, end: datetime) -> Select:
+    """Build the ordered Core select of exported columns for a time range."""
+    return (
+        select(*_EXPORT_COLUMNS)
+        .where(
+            Sample.target_id == target_id,
+            Sample.sampled_at >= start,
+            Sample.sampled_at <= end,
+        )
+        .order_by(Sample.sampled_at, Sample.hop_number)
+    )
+
 
 def _query_samples(
     db: Session,
     target_id: str,
     start: datetime,
     end: datetime,
-) -> list[Sample]:
+) -> Iterable[Row]:
     """Fetch ordered sample rows within a time range.
 
+    Only the exported columns are selected, so no :class:`Sample`
+    objects are built; rows arrive in batches of :data:`_STREAM_BATCH`.
+
     Args:
         db: Active database session.
         target_id: UUID-style target identifier.
@@ -29,18 +66,64 @@ def _query_samples(
         end: Upper bound on ``sampled_at``.
 
     Returns:
-        Ordered list of :class:`Sample` rows.
+        Ordered result rows in :data:`_CSV_HEADER` column order.
     """
-    return (
-        db.query(Sample)
-        .filter(
-            Sample.target_id == target_id,
-            Sample.sampled_at >= start,
-            Sample.sampled_at <= end,
+    stmt = _samples_query(target_id, start, end).execution_options(yield_per=_STREAM_BATCH)
+    return db.execute(stmt)
+
+
+def _csv_chunks(rows: Iterable[Row], chunk_rows: int = _STREAM_BATCH) -> Iterator[str]:
+    """Yield CSV text in chunks of up to *chunk_rows* lines, header first."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(_CSV_HEADER)
+
+    pending = 0
+    for sampled_at, hop_number, ip, dns, rtt_ms, is_timeout in rows:
+        writer.writerow(
+            [
+                sampled_at.isoformat() if sampled_at else "",
+                hop_number,
+                ip or "",
+                dns or "",
+                rtt_ms if rtt_ms is not None else "",
+                is_timeout,
+            ]
         )
-        .order_by(Sample.sampled_at, Sample.hop_number)
-        .all()
-    )
+        pending += 1
+        if pending >= chunk_rows:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+
+    tail = buf.getvalue()
+    if tail:
+        yield tail
+
+
+def iter_session_csv(
+    db: Session,
+    target_id: str,
+    start: datetime,
+    end: datetime,
+) -> Iterator[str]:
+    """Stream sample data as CSV text chunks.
+
+    Rows are pulled from the database in batches of
+    :data:`_STREAM_BATCH` so memory stays bounded regardless of the
+    export size.
+
+    Args:
+        db: Active database session.
+        target_id: UUID-style target identifier.
+        start: Start of the export window.
+        end: End of the export window.
+
+    Yields:
+        CSV text chunks; the first one starts with the header row.
+    """
+    yield from _csv_chunks(_query_samples(db, target_id, start, end))
 
 
 def export_session_csv(
@@ -63,25 +146,28 @@ def export_session_csv(
     Returns:
         A UTF-8 CSV string including the header row.
     """
-    rows = _query_samples(db, target_id, start, end)
-
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(["sampled_at", "hop_number", "ip", "dns", "rtt_ms", "is_timeout"])
-
-    for r in rows:
-        writer.writerow(
-            [
-                r.sampled_at.isoformat() if r.sampled_at else "",
-                r.hop_number,
-                r.ip or "",
-                r.dns or "",
-                r.rtt_ms if r.rtt_ms is not None else "",
-                r.is_timeout,
-            ]
-        )
-
-    return buf.getvalue()
+    return "".join(iter_session_csv(db, target_id, start, end))
+
+
+def _isoformat(sampled_at: Optional[datetime]) -> Optional[str]:
+    """Render a sample timestamp as ISO 8601, passing ``None`` through."""
+    return sampled_at.isoformat() if sampled_at else None
+
+
+def _json_records(
+    rows: Iterable[Row],
+    format_timestamp: Callable[[Optional[datetime]], Any],
+) -> Iterator[dict[str, Any]]:
+    """Yield one JSON record per row, rendering ``sampled_at`` with *format_timestamp*."""
+    for sampled_at, hop_number, ip, dns, rtt_ms, is_timeout in rows:
+        yield {
+            "sampled_at": format_timestamp(sampled_at),
+            "hop_number": hop_number,
+            "ip": ip,
+            "dns": dns,
+            "rtt_ms": rtt_ms,
+            "is_timeout": is_timeout,
+        }
 
 
 def export_session_json(
@@ -101,16 +187,30 @@ def export_session_json(
     Returns:
         List of dictionaries, one per sample row.
     """
-    rows = _query_samples(db, target_id, start, end)
+    return list(_json_records(_query_samples(db, target_id, start, end), _isoformat))
 
-    return [
-        {
-            "sampled_at": r.sampled_at.isoformat() if r.sampled_at else None,
-            "hop_number": r.hop_number,
-            "ip": r.ip,
-            "dns": r.dns,
-            "rtt_ms": r.rtt_ms,
-            "is_timeout": r.is_timeout,
-        }
-        for r in rows
-    ]
+
+def export_session_json_bytes(
+    db: Session,
+    target_id: str,
+    start: datetime,
+    end: datetime,
+) -> bytes:
+    """Export sample data as an encoded JSON array.
+
+    Same records as :func:`export_session_json`, but timestamps are left
+    as ``datetime`` for ``orjson`` to render (identically to
+    :meth:`~datetime.datetime.isoformat` for the naive UTC column) and the
+    result is the finished response body.
+
+    Args:
+        db: Active database session.
+        target_id: UUID-style target identifier.
+        start: Start of the export window.
+        end: End of the export window.
+
+    Returns:
+        UTF-8 JSON bytes.
+    """
+    rows = _query_samples(db, target_id, start, end)
+    return orjson.dumps(list(_json_records(rows, lambda sampled_at: sampled_at)))
@@ -15,10 +15,22 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from pingwatcher.db import cache as db_cache
+from pingwatcher.db import stats_cache
 from pingwatcher.db.models import Base, get_db
 from pingwatcher.main import app
 
 
+@pytest.fixture(autouse=True)
+def _clear_db_cache():
+    """Reset in-process query caches so each test sees its own database."""
+    db_cache.clear()
+    stats_cache.clear()
+    yield
+    db_cache.clear()
+    stats_cache.clear()
+
+
 @pytest.fixture()
 def db_engine():
     """Create an isolated in-memory SQLite engine with all tables.
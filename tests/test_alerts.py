@@ -2,11 +2,15 @@
 
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from pingwatcher.alerts.actions import dispatch_action
 from pingwatcher.alerts.conditions import (
     _extract_metric,
     _find_matching_hops,
+    _index_hops_by_ip,
     check_condition,
+    check_conditions,
 )
 from pingwatcher.db.models import Alert
 
@@ -96,6 +100,13 @@ class TestFindMatchingHops:
         assert len(result) == 1
         assert result[0]["hop"] == 2
 
+    def test_specific_ip_via_index(self):
+        """The prebuilt IP index returns the same hops as a scan."""
+        stats = _make_stats(3)
+        by_ip = _index_hops_by_ip(stats)
+        assert _find_matching_hops(stats, "10.0.0.2", by_ip) == [stats[1]]
+        assert _find_matching_hops(stats, "192.0.2.1", by_ip) == []
+
     def test_empty_stats(self):
         """Empty stats list returns empty."""
         assert _find_matching_hops([], "final") == []
@@ -134,6 +145,33 @@ class TestCheckCondition:
         assert triggered is False
 
 
+class TestCheckConditions:
+    """Verify the vectorised multi-alert evaluator."""
+
+    def test_matches_scalar_evaluation(self):
+        """Batch results equal per-alert check_condition results."""
+        stats = _make_stats(4, base_rtt=10.0, loss=5.0)
+        stats[1]["cur_ms"] = None
+        stats[2]["ip"] = stats[0]["ip"]
+        alerts = [
+            _make_alert(id="a1", metric="packet_loss_pct", operator=">", threshold=1.0, hop="final"),
+            _make_alert(id="a2", metric="cur_rtt_ms", operator=">=", threshold=13.0, hop="any"),
+            _make_alert(id="a3", metric="avg_rtt_ms", operator="<", threshold=5.0, hop="any"),
+            _make_alert(id="a4", metric="cur_rtt_ms", operator="<=", threshold=50.0, hop="10.0.0.2"),
+            _make_alert(id="a5", metric="avg_rtt_ms", operator=">", threshold=11.0, hop="10.0.0.1"),
+            _make_alert(id="a6", metric="avg_rtt_ms", operator=">", threshold=1.0, hop="192.0.2.9"),
+            _make_alert(id="a7", metric="bogus", operator=">", threshold=1.0, hop="any"),
+            _make_alert(id="a8", metric="avg_rtt_ms", operator="!=", threshold=1.0, hop="any"),
+        ]
+        expected = [check_condition(a, stats) for a in alerts]
+        assert check_conditions(alerts, stats) == expected
+
+    def test_empty_inputs(self):
+        """No alerts or no stats yields non-triggered results."""
+        assert check_conditions([], _make_stats(2)) == []
+        assert check_conditions([_make_alert()], []) == [(False, None)]
+
+
 class TestDispatchAction:
     """Verify action routing."""
 
@@ -161,6 +199,262 @@ class TestDispatchAction:
         dispatch_action("command", '{"command": "echo hi"}', "test msg")
         mock_cmd.assert_called_once()
 
+    @patch("pingwatcher.alerts.actions.log_file.log_alert")
+    def test_dispatch_decoded_config(self, mock_log):
+        """A config already decoded by the ORM is passed through as-is."""
+        config = {"path": "/tmp/test.log"}
+        dispatch_action("log", config, "test msg")
+        mock_log.assert_called_once_with(config, "test msg")
+
     def test_dispatch_unknown(self):
         """Unknown action types do not raise."""
         dispatch_action("unknown", None, "test msg")  # Should not raise.
+
+    @patch("pingwatcher.alerts.actions.dispatch_action")
+    def test_dispatch_actions_batch(self, mock_dispatch):
+        """Every queued action in a batch is dispatched."""
+        from pingwatcher.alerts.actions import dispatch_actions
+
+        dispatch_actions(
+            [
+                ("webhook", '{"url": "http://a.example"}', "one"),
+                ("webhook", '{"url": "http://b.example"}', "two"),
+                ("log", None, "three"),
+            ]
+        )
+        assert mock_dispatch.call_count == 3
+
+    def test_config_parse_is_cached(self):
+        """Repeated configs are parsed once and returned read-only."""
+        from pingwatcher.alerts.actions import _get_config
+
+        first = _get_config('{"path": "/tmp/cached.log"}')
+        second = _get_config('{"path": "/tmp/cached.log"}')
+        assert first is second
+        assert first["path"] == "/tmp/cached.log"
+        with pytest.raises(TypeError):
+            first["path"] = "other"
+
+
+class TestWebhookAction:
+    """Verify webhook delivery."""
+
+    @patch("pingwatcher.alerts.actions.webhook._CLIENT")
+    def test_posts_through_shared_client(self, mock_client):
+        """Webhooks are sent via the pooled module-level client."""
+        from pingwatcher.alerts.actions.webhook import send_webhook
+
+        send_webhook({"url": "http://example.com/hook"}, "test msg")
+        mock_client.post.assert_called_once_with(
+            "http://example.com/hook", json={"message": "test msg"}, headers={}
+        )
+
+
+class TestEmailAction:
+    """Verify pooled SMTP delivery."""
+
+    @patch("pingwatcher.alerts.actions.email_action.smtplib.SMTP")
+    def test_reuses_connection(self, mock_smtp_cls):
+        """Consecutive alerts to one server share a single SMTP session."""
+        from pingwatcher.alerts.actions import email_action
+
+        email_action._smtp_pool.clear()
+        config = {"smtp_host": "mail.test", "smtp_port": 25, "to_addr": "ops@example.com"}
+        email_action.send_email_alert(config, "first")
+        email_action.send_email_alert(config, "second")
+
+        assert mock_smtp_cls.call_count == 1
+        assert mock_smtp_cls.return_value.sendmail.call_count == 2
+        email_action._smtp_pool.clear()
+
+    def test_message_uses_cached_headers(self):
+        """The header block is rendered once and the body spliced on."""
+        import email
+
+        from pingwatcher.alerts.actions import email_action
+
+        email_action._header_block.cache_clear()
+        raw = email_action._build_message("[PW] Alert Triggered", "a@example.com", "b@example.com", "héllo")
+        email_action._build_message("[PW] Alert Triggered", "a@example.com", "b@example.com", "again")
+        assert email_action._header_block.cache_info().hits == 1
+
+        parsed = email.message_from_bytes(raw)
+        assert parsed["Subject"] == "[PW] Alert Triggered"
+        assert parsed.get_payload(decode=True).decode("utf-8").strip() == "héllo"
+
+    @patch("pingwatcher.alerts.actions.email_action.smtplib.SMTP")
+    def test_reconnects_after_disconnect(self, mock_smtp_cls):
+        """A dropped pooled session is replaced transparently."""
+        import smtplib
+
+        from pingwatcher.alerts.actions import email_action
+
+        email_action._smtp_pool.clear()
+        stale = MagicMock()
+        stale.sendmail.side_effect = smtplib.SMTPServerDisconnected()
+        email_action._smtp_pool[("mail.test", 25, None)] = stale
+
+        config = {"smtp_host": "mail.test", "smtp_port": 25, "to_addr": "ops@example.com"}
+        email_action.send_email_alert(config, "hello")
+
+        mock_smtp_cls.return_value.sendmail.assert_called_once()
+        email_action._smtp_pool.clear()
+
+    def test_close_pool_waits_for_running_send(self):
+        """A session is only quit once the send holding its lock is done."""
+        import threading
+
+        from pingwatcher.alerts.actions import email_action
+
+        key = ("mail.test", 25, None)
+        session = MagicMock()
+        lock = threading.Lock()
+        with patch.dict(email_action._smtp_pool, {key: session}, clear=True), patch.dict(
+            email_action._smtp_locks, {key: lock}, clear=True
+        ):
+            lock.acquire()
+            closer = threading.Thread(target=email_action.close_pool)
+            closer.start()
+            closer.join(0.1)
+            assert closer.is_alive()
+            session.quit.assert_not_called()
+            lock.release()
+            closer.join(1.0)
+            assert not closer.is_alive()
+            session.quit.assert_called_once()
+            assert key not in email_action._smtp_pool
+
+
+class TestLogFileAction:
+    """Verify batched log-file writes."""
+
+    def test_lines_are_appended(self, tmp_path):
+        """Queued alert lines reach the file once flushed."""
+        from pingwatcher.alerts.actions import log_file
+
+        path = tmp_path / "alerts.log"
+        for i in range(5):
+            log_file.log_alert({"path": str(path)}, f"msg {i}")
+        log_file.flush()
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 5
+        assert lines[0].endswith("msg 0")
+        assert lines[-1].endswith("msg 4")
+
+
+class TestEvaluateAlerts:
+    """Verify a full evaluation cycle against the database."""
+
+    @patch("pingwatcher.alerts.conditions.dispatch_actions")
+    def test_single_commit_per_cycle(self, mock_dispatch, db_session):
+        """All alert state changes land in one commit before dispatch."""
+        from pingwatcher.alerts.conditions import evaluate_alerts
+        from pingwatcher.db.models import AlertHistory, Target
+
+        db_session.add(Target(id="t1", host="8.8.8.8"))
+        for aid in ("a1", "a2"):
+            db_session.add(
+                Alert(
+                    id=aid,
+                    target_id="t1",
+                    metric="packet_loss_pct",
+                    operator=">",
+                    threshold=5.0,
+                    duration_samples=1,
+                    hop="final",
+                    action_type="log",
+                    enabled=True,
+                    consecutive_triggers=0,
+                )
+            )
+        db_session.commit()
+
+        with patch.object(db_session, "commit", wraps=db_session.commit) as spy_commit:
+            evaluate_alerts(db_session, "t1", all_stats=_make_stats(3, loss=50.0))
+
+        assert spy_commit.call_count == 1
+        assert db_session.query(AlertHistory).count() == 2
+        pending = mock_dispatch.call_args.args[0]
+        assert len(pending) == 2
+
+    @patch("pingwatcher.alerts.conditions.dispatch_actions")
+    def test_fire_uses_single_timestamp(self, _mock_dispatch, db_session):
+        """The alert and its history row share one clock reading."""
+        from datetime import datetime
+
+        from pingwatcher.alerts.conditions import evaluate_alerts
+        from pingwatcher.db.models import AlertHistory, Target
+
+        fixed = datetime(2024, 5, 6, 7, 8, 9)
+        db_session.add(Target(id="t1", host="8.8.8.8"))
+        db_session.add(
+            Alert(
+                id="a1",
+                target_id="t1",
+                metric="packet_loss_pct",
+                operator=">",
+                threshold=5.0,
+                duration_samples=1,
+                hop="final",
+                action_type="log",
+                enabled=True,
+                consecutive_triggers=0,
+            )
+        )
+        db_session.commit()
+
+        with patch("pingwatcher.alerts.conditions._time_source", return_value=fixed):
+            evaluate_alerts(db_session, "t1", all_stats=_make_stats(2, loss=50.0))
+
+        event = db_session.query(AlertHistory).one()
+        assert event.triggered_at == fixed
+        assert db_session.get(Alert, "a1").last_triggered_at == fixed
+
+    @patch("pingwatcher.alerts.conditions.dispatch_actions")
+    def test_cycle_timestamp_overrides_clock(self, _mock_dispatch, db_session):
+        """A caller-supplied cycle time is used instead of reading the clock."""
+        from datetime import datetime
+
+        from pingwatcher.alerts.conditions import evaluate_alerts
+        from pingwatcher.db.models import AlertHistory, Target
+
+        tick = datetime(2024, 5, 6, 7, 8, 9)
+        db_session.add(Target(id="t1", host="8.8.8.8"))
+        db_session.add(
+            Alert(
+                id="a1",
+                target_id="t1",
+                metric="packet_loss_pct",
+                operator=">",
+                threshold=5.0,
+                duration_samples=1,
+                hop="final",
+                action_type="log",
+                enabled=True,
+                consecutive_triggers=0,
+            )
+        )
+        db_session.commit()
+
+        with patch("pingwatcher.alerts.conditions._time_source") as clock:
+            evaluate_alerts(db_session, "t1", all_stats=_make_stats(2, loss=50.0), now=tick)
+
+        clock.assert_not_called()
+        assert db_session.query(AlertHistory).one().triggered_at == tick
+
+
+class TestCommandAction:
+    """Verify shell-free command execution."""
+
+    @patch("pingwatcher.alerts.actions.command.subprocess.run")
+    def test_message_substituted_without_shell(self, mock_run):
+        """The message is injected into argv and no shell is spawned."""
+        from pingwatcher.alerts.actions.command import run_command
+
+        mock_run.return_value = MagicMock(returncode=0, stderr="")
+        run_command({"command": "notify-ops --message '{message}'"}, "it's `down`")
+
+        argv = mock_run.call_args.args[0]
+        assert argv == ["notify-ops", "--message", "it's `down`"]
+        assert mock_run.call_args.kwargs["shell"] is False
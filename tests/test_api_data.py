@@ -121,6 +121,78 @@ class TestSummaryEndpoint:
         assert data[0]["host"] == "8.8.8.8"
 
 
+class TestSummaryWebSocket:
+    """WS /ws/summary initial snapshot."""
+
+    def test_snapshot_built_off_event_loop(self, client, db_engine):
+        """The snapshot query runs on a worker thread, not the loop thread."""
+        import threading
+
+        from sqlalchemy.orm import sessionmaker
+
+        tid = _seed(client)
+        _insert_samples(db_engine, tid, hops=2, traces=3)
+        from pingwatcher import main
+
+        Session = sessionmaker(bind=db_engine)
+        loop_threads, db_threads = [], []
+        real_run_in_threadpool = main.run_in_threadpool
+
+        def _session():
+            db_threads.append(threading.current_thread())
+            return Session()
+
+        async def _spy(func, *args):
+            loop_threads.append(threading.current_thread())
+            return await real_run_in_threadpool(func, *args)
+
+        with patch("pingwatcher.main.SessionLocal", side_effect=_session), patch(
+            "pingwatcher.main.run_in_threadpool", side_effect=_spy
+        ):
+            with client.websocket_connect("/ws/summary") as ws:
+                msg = ws.receive_json()
+
+        assert msg["type"] == "summary_snapshot"
+        assert [row["host"] for row in msg["rows"]] == ["8.8.8.8"]
+        assert db_threads and db_threads[0] is not loop_threads[0]
+
+
+class TestLiveFeedWebSocket:
+    """WS /ws/targets/{id} initial frame."""
+
+    def test_cached_hops_sent_on_connect(self, client):
+        """The latest cached trace is pushed as soon as a client connects."""
+        from pingwatcher.engine.scheduler import hop_columns, latest_results
+        from pingwatcher.engine.tracer import HopRec
+
+        hops = hop_columns(
+            [HopRec(1, "10.0.0.1", None, 1.5, False)]
+        )
+        latest_results["ws-t1"] = hops
+        try:
+            with client.websocket_connect("/ws/targets/ws-t1") as ws:
+                msg = ws.receive_json()
+        finally:
+            latest_results.pop("ws-t1", None)
+        assert msg == {"target_id": "ws-t1", "hops": hops}
+
+
+class TestMetricsEndpoint:
+    """GET /api/metrics."""
+
+    def test_metrics_shape(self, client):
+        """The endpoint reports the scheduler counters."""
+        resp = client.get("/api/metrics")
+        assert resp.status_code == 200
+        assert set(resp.json()) == {
+            "monitored_targets",
+            "queued_traces",
+            "skipped_samples",
+            "alert_queue_depth",
+            "sample_buffer_rows",
+        }
+
+
 class TestRouteChangesEndpoint:
     """GET /api/targets/{id}/route_changes."""
 
@@ -135,3 +207,15 @@ class TestRouteChangesEndpoint:
         """Returns 404 for a missing target."""
         resp = client.get("/api/targets/fake/route_changes")
         assert resp.status_code == 404
+
+
+class TestParseIsoTimestamp:
+    """Cached ISO-8601 parsing shared by the API routers."""
+
+    def test_parses_and_caches(self):
+        """Repeated boundaries return the cached datetime."""
+        from pingwatcher.api.common import parse_iso_timestamp
+
+        first = parse_iso_timestamp("2024-01-02T03:04:05")
+        assert first == datetime(2024, 1, 2, 3, 4, 5)
+        assert parse_iso_timestamp("2024-01-02T03:04:05") is first
@@ -1,6 +1,10 @@
 """Tests for :mod:`pingwatcher.config`."""
 
-from pingwatcher.config import Settings, get_settings
+import dataclasses
+
+import pytest
+
+from pingwatcher.config import FrozenSettings, Settings, get_settings
 
 
 class TestSettings:
@@ -47,12 +51,62 @@ class TestSettings:
         assert s.host == "0.0.0.0"
 
     def test_get_settings_returns_instance(self):
-        """get_settings() should return a Settings object."""
+        """get_settings() should return a frozen snapshot of Settings."""
+        cfg = get_settings()
+        assert isinstance(cfg, FrozenSettings)
+        assert dataclasses.asdict(cfg) == Settings().model_dump()
+
+    def test_frozen_settings_are_read_only(self):
+        """The snapshot rejects assignment and carries no instance dict."""
         cfg = get_settings()
-        assert isinstance(cfg, Settings)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            cfg.default_focus = 99
+        assert not hasattr(cfg, "__dict__")
+
+    def test_frozen_fields_mirror_settings(self):
+        """FrozenSettings declares exactly the Settings fields, same types."""
+        frozen = {f.name: f.type for f in dataclasses.fields(FrozenSettings)}
+        assert frozen == {
+            name: field.annotation for name, field in Settings.model_fields.items()
+        }
 
     def test_get_settings_is_cached(self):
         """get_settings() should return the same object on repeated calls."""
         a = get_settings()
         b = get_settings()
         assert a is b
+
+    def test_defaults_snapshot_matches_settings(self):
+        """DEFAULTS should mirror the active settings after a reload."""
+        from pingwatcher.config import DEFAULTS, reload_defaults
+
+        assert reload_defaults() is DEFAULTS
+        cfg = get_settings()
+        assert DEFAULTS.focus == cfg.default_focus
+        assert DEFAULTS.trace_interval == cfg.default_trace_interval
+
+    def test_reload_defaults_follows_env_change(self, monkeypatch):
+        """reload_defaults() re-reads the environment instead of the cached snapshot."""
+        from pingwatcher.config import DEFAULTS, reload_defaults
+
+        before = reload_defaults().focus
+        monkeypatch.setenv("PINGWATCHER_DEFAULT_FOCUS", str(before + 7))
+        try:
+            reload_defaults()
+            assert DEFAULTS.focus == before + 7
+        finally:
+            monkeypatch.delenv("PINGWATCHER_DEFAULT_FOCUS")
+            reload_defaults()
+        assert DEFAULTS.focus == before
+
+    def test_get_settings_cache_clear_rereads_env(self, monkeypatch):
+        """Clearing the cache makes get_settings() pick up new env vars."""
+        before = get_settings()
+        monkeypatch.setenv("PINGWATCHER_DEFAULT_FOCUS", "25")
+        get_settings.cache_clear()
+        try:
+            assert get_settings().default_focus == 25
+        finally:
+            monkeypatch.delenv("PINGWATCHER_DEFAULT_FOCUS")
+            get_settings.cache_clear()
+        assert get_settings().default_focus == before.default_focus
@@ -1,16 +1,24 @@
 """Tests for :mod:`pingwatcher.engine.dns`."""
 
+import asyncio
 import socket
 from unittest.mock import patch
 
-from pingwatcher.engine.dns import NO_PTR, cache_info, clear_cache, reverse_dns
+from pingwatcher.engine import dns
+from pingwatcher.engine.dns import (
+    NO_PTR,
+    cache_info,
+    clear_cache,
+    reverse_dns,
+    reverse_dns_many,
+)
 
 
 class TestReverseDns:
     """Verify PTR lookups with caching."""
 
     def setup_method(self):
-        """Clear the LRU cache before each test."""
+        """Clear the DNS cache before each test."""
         clear_cache()
 
     @patch("socket.gethostbyaddr", return_value=("dns.google", [], []))
@@ -30,13 +38,13 @@ class TestReverseDns:
 
     @patch("socket.gethostbyaddr", return_value=("router.local", [], []))
     def test_caching(self, mock_gethostbyaddr):
-        """Repeated calls with the same IP hit the LRU cache."""
+        """Repeated calls with the same IP hit the cache."""
         reverse_dns("10.0.0.1")
         reverse_dns("10.0.0.1")
         mock_gethostbyaddr.assert_called_once()
 
     def test_clear_cache(self):
-        """clear_cache resets the LRU cache."""
+        """clear_cache resets the cache."""
         clear_cache()
         info = cache_info()
         assert info.currsize == 0
@@ -45,3 +53,38 @@ class TestReverseDns:
     def test_os_error(self, mock_gethostbyaddr):
         """OSError during lookup returns sentinel."""
         assert reverse_dns("172.16.0.1") == NO_PTR
+
+    @patch("socket.gethostbyaddr", side_effect=socket.herror)
+    def test_negative_result_expires_sooner(self, mock_gethostbyaddr):
+        """Failed lookups are retried once the short negative TTL lapses."""
+        with patch("pingwatcher.engine.dns.time.monotonic", return_value=1000.0):
+            assert reverse_dns("192.0.2.9") == NO_PTR
+        with patch(
+            "pingwatcher.engine.dns.time.monotonic",
+            return_value=1000.0 + dns.NEGATIVE_TTL + 1,
+        ):
+            assert reverse_dns("192.0.2.9") == NO_PTR
+        assert mock_gethostbyaddr.call_count == 2
+
+    @patch("socket.gethostbyaddr", return_value=("core.isp", [], []))
+    def test_positive_result_outlives_negative_ttl(self, mock_gethostbyaddr):
+        """Successful lookups stay cached past the negative TTL."""
+        with patch("pingwatcher.engine.dns.time.monotonic", return_value=1000.0):
+            reverse_dns("10.1.1.1")
+        with patch(
+            "pingwatcher.engine.dns.time.monotonic",
+            return_value=1000.0 + dns.NEGATIVE_TTL + 1,
+        ):
+            assert reverse_dns("10.1.1.1") == "core.isp"
+        mock_gethostbyaddr.assert_called_once()
+
+    def test_reverse_dns_many_resolves_concurrently(self):
+        """Bulk lookups dedupe IPs and return one name per address."""
+
+        def _fake(ip):
+            return (f"h-{ip}", [], [])
+
+        with patch("socket.gethostbyaddr", side_effect=_fake) as mock_gethostbyaddr:
+            result = asyncio.run(reverse_dns_many(["10.0.0.1", "10.0.0.2", "10.0.0.1", None]))
+        assert result == {"10.0.0.1": "h-10.0.0.1", "10.0.0.2": "h-10.0.0.2"}
+        assert mock_gethostbyaddr.call_count == 2
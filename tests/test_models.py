@@ -2,6 +2,9 @@
 
 from datetime import datetime
 
+from sqlalchemy import create_engine, event, inspect, text
+
+from pingwatcher.config import Settings
 from pingwatcher.db.models import (
     Alert,
     AlertHistory,
@@ -9,6 +12,9 @@ from pingwatcher.db.models import (
     Sample,
     Session,
     Target,
+    _engine_options,
+    _set_sqlite_pragmas,
+    init_db,
 )
 
 
@@ -155,6 +161,26 @@ class TestAlertModel:
         assert fetched.threshold == 10.0
         assert fetched.duration_samples == 3
 
+    def test_action_config_json_round_trip(self, db_session):
+        """action_config is stored as JSON and loaded back as a dict."""
+        db_session.add(Target(id="ta3", host="6.6.6.6"))
+        db_session.add(
+            Alert(
+                id="a3",
+                target_id="ta3",
+                metric="avg_rtt_ms",
+                operator=">",
+                threshold=100.0,
+                action_type="webhook",
+                action_config={"url": "http://example.com/hook"},
+            )
+        )
+        db_session.commit()
+        db_session.expire_all()
+
+        fetched = db_session.get(Alert, "a3")
+        assert fetched.action_config == {"url": "http://example.com/hook"}
+
     def test_alert_history(self, db_session):
         """AlertHistory rows link back to an Alert."""
         t = Target(id="ta2", host="5.5.5.5")
@@ -198,3 +224,152 @@ class TestSessionModel:
 
         fetched = db_session.query(Session).get("s1")
         assert fetched.name == "Morning check"
+
+
+class TestSqlitePragmas:
+    """Verify connection-level tuning for file-backed SQLite."""
+
+    def test_pragmas_applied_on_connect(self, tmp_path):
+        """New connections switch to WAL with relaxed fsync."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'pw.db'}")
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+        try:
+            with engine.connect() as conn:
+                assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+                # NORMAL == 1
+                assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+        finally:
+            engine.dispose()
+
+
+class TestInitDb:
+    """Verify schema bootstrapping on an existing database."""
+
+    def test_upgrades_sample_indexes(self, tmp_path, monkeypatch):
+        """A database from before the hop/time index gains it and drops the old one."""
+        from pingwatcher.db import models
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE TABLE samples (id INTEGER PRIMARY KEY, target_id VARCHAR, "
+                    "sampled_at DATETIME, hop_number INTEGER, ip VARCHAR, dns VARCHAR, "
+                    "rtt_ms FLOAT, is_timeout BOOLEAN)"
+                )
+            )
+            conn.execute(
+                text("CREATE INDEX idx_samples_target_hop ON samples (target_id, hop_number)")
+            )
+        monkeypatch.setattr(models, "get_engine", lambda: engine)
+        try:
+            init_db()
+            names = {ix["name"] for ix in inspect(engine).get_indexes("samples")}
+        finally:
+            engine.dispose()
+        assert "idx_samples_target_hop_time" in names
+        assert "idx_samples_target_hop" not in names
+
+    def test_active_alert_lookup_uses_partial_index(self, db_session):
+        """The get_active_alerts() query is planned against the partial index."""
+        query = db_session.query(Alert).filter(Alert.target_id == "t1", Alert.enabled)
+        sql = str(
+            query.statement.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True})
+        )
+        plan = db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+        assert any("idx_alerts_active_target" in str(row) for row in plan)
+
+    def test_converts_csv_routes_to_json(self, tmp_path, monkeypatch):
+        """Legacy TEXT route columns holding comma-separated IPs are rewritten as arrays."""
+        from pingwatcher.db import models
+        from pingwatcher.db.queries import get_route_changes
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'routes.db'}")
+        models.Base.metadata.create_all(bind=engine, tables=[models.Target.__table__])
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE TABLE route_changes (id INTEGER PRIMARY KEY, target_id VARCHAR, "
+                    "detected_at DATETIME, old_route TEXT, new_route TEXT)"
+                )
+            )
+            conn.execute(text("INSERT INTO targets (id, host) VALUES ('tr', 'example.org')"))
+            conn.execute(
+                text(
+                    "INSERT INTO route_changes (target_id, detected_at, old_route, new_route) "
+                    "VALUES ('tr', '2025-01-01 00:00:00', '10.0.0.1,10.0.0.2', '')"
+                )
+            )
+        monkeypatch.setattr(models, "get_engine", lambda: engine)
+        try:
+            init_db()
+            db = models.SessionLocal(bind=engine)
+            try:
+                changes = get_route_changes(db, "tr")
+            finally:
+                db.close()
+        finally:
+            engine.dispose()
+        assert changes[0]["old_route"] == ["10.0.0.1", "10.0.0.2"]
+        assert changes[0]["new_route"] == []
+
+    def test_json_route_columns_are_not_scanned(self, tmp_path, monkeypatch):
+        """A schema that already declares JSON routes skips the CSV rewrite."""
+        from pingwatcher.db import models
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+        statements = []
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        monkeypatch.setattr(models, "get_engine", lambda: engine)
+        try:
+            init_db()
+        finally:
+            engine.dispose()
+        assert not any(
+            "route_changes" in sql and sql.lstrip().startswith(("SELECT id", "UPDATE"))
+            for sql in statements
+        )
+
+
+class TestEngineOptions:
+    """Verify connection-pool sizing per backend."""
+
+    def test_file_sqlite_uses_sized_pool(self):
+        """File-backed SQLite gets the configured pool and a busy timeout."""
+        opts = _engine_options(Settings(database_url="sqlite:///pw.db", pool_size=12))
+        assert opts["pool_size"] == 12
+        assert opts["connect_args"]["timeout"] == 30
+
+    def test_memory_sqlite_keeps_default_pool(self):
+        """In-memory SQLite must not be given QueuePool arguments."""
+        opts = _engine_options(Settings(database_url="sqlite://"))
+        assert "pool_size" not in opts
+
+    def test_server_backend_pre_pings(self):
+        """Networked databases recycle and pre-ping pooled connections."""
+        opts = _engine_options(Settings(database_url="postgresql://u@h/db"))
+        assert opts["pool_pre_ping"] is True
+        assert "connect_args" not in opts
+
+
+class TestLazyEngine:
+    """Verify the engine is only created when a session needs it."""
+
+    def test_session_binds_to_app_engine_on_first_use(self, monkeypatch):
+        """An unbound SessionLocal session picks up get_engine() lazily."""
+        from pingwatcher.db import models
+
+        engine = create_engine("sqlite://")
+        monkeypatch.setattr(models, "get_engine", lambda: engine)
+        db = models.SessionLocal()
+        try:
+            assert db.bind is None
+            assert db.execute(text("SELECT 1")).scalar() == 1
+            assert db.bind is engine
+        finally:
+            db.close()
+            engine.dispose()
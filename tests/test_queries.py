@@ -1,11 +1,16 @@
 """Tests for :mod:`pingwatcher.db.queries`."""
 
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
+import pytest
+
+from pingwatcher.db import stats_cache
 from pingwatcher.db.models import Alert, Sample, SampleHourly, Target
 from pingwatcher.db.queries import (
+    TargetNotFound,
     aggregate_hourly_rollups,
-    backfill_dns_for_ip,
+    backfill_dns_bulk,
     create_target,
     delete_raw_samples_older_than,
     delete_target,
@@ -13,14 +18,17 @@ from pingwatcher.db.queries import (
     get_all_hop_stats,
     get_hop_stats,
     get_last_known_route,
+    get_last_known_routes,
     get_route_changes,
     get_summary,
     get_target,
     get_timeline_data,
     list_targets,
     record_alert_event,
+    record_alert_events,
     record_route_change,
     store_sample,
+    store_samples_bulk,
 )
 
 
@@ -108,6 +116,24 @@ class TestHopStats:
         assert all_stats[0]["hop"] == 1
         assert all_stats[2]["hop"] == 3
 
+    def test_all_hop_stats_matches_per_hop_stats(self, db_session):
+        """SQL-side aggregation agrees with get_hop_stats, timeouts included."""
+        _make_target(db_session)
+        _add_samples(db_session, "t1", hop_count=3, count=6)
+        now = datetime.utcnow()
+        store_sample(
+            db_session,
+            [
+                Sample(target_id="t1", sampled_at=now, hop_number=2, is_timeout=True),
+                Sample(target_id="t1", sampled_at=now, hop_number=3, rtt_ms=40.0),
+            ],
+        )
+
+        all_stats = get_all_hop_stats(db_session, "t1", focus_n=4)
+        assert all_stats == [get_hop_stats(db_session, "t1", h, focus_n=4) for h in (1, 2, 3)]
+        assert all_stats[1]["cur_ms"] is None
+        assert all_stats[1]["packet_loss_pct"] == 25.0
+
     def test_packet_loss_calculation(self, db_session):
         """Timeout samples should count towards packet loss."""
         _make_target(db_session)
@@ -152,6 +178,146 @@ class TestHopStats:
         stats = get_hop_stats(db_session, "t1", 1, focus_n=10)
         assert stats["cur_ms"] is None
 
+    def test_store_sample_accepts_dicts(self, db_session):
+        """Column dictionaries are inserted like ORM instances."""
+        _make_target(db_session)
+        now = datetime.utcnow()
+        store_sample(
+            db_session,
+            [
+                {"target_id": "t1", "sampled_at": now, "hop_number": 1, "rtt_ms": 4.0},
+                {
+                    "target_id": "t1",
+                    "sampled_at": now,
+                    "hop_number": 2,
+                    "ip": "10.0.0.2",
+                    "rtt_ms": None,
+                    "is_timeout": True,
+                },
+            ],
+        )
+
+        rows = db_session.query(Sample).order_by(Sample.hop_number).all()
+        assert [r.is_timeout for r in rows] == [False, True]
+        assert rows[1].ip == "10.0.0.2"
+
+    def test_store_samples_bulk_chunks_across_targets(self, db_session):
+        """Rows for several targets land in one call, split into batches."""
+        _make_target(db_session, "a")
+        _make_target(db_session, "b")
+        now = datetime.utcnow()
+        rows = [
+            {
+                "target_id": tid,
+                "sampled_at": now,
+                "hop_number": h,
+                "ip": None,
+                "dns": None,
+                "rtt_ms": 1.0,
+                "is_timeout": False,
+            }
+            for tid in ("a", "b")
+            for h in range(1, 4)
+        ]
+        with patch.object(db_session, "execute", wraps=db_session.execute) as spy:
+            store_samples_bulk(db_session, rows, batch_size=4)
+        assert spy.call_count == 2
+        assert db_session.query(Sample).count() == 6
+
+
+class TestHopStatsCache:
+    """In-memory hop windows behind get_all_hop_stats."""
+
+    @staticmethod
+    def _sql_stats(db, target_id, focus_n):
+        with patch("pingwatcher.db.queries._cached_hop_stats", return_value=None):
+            return get_all_hop_stats(db, target_id, focus_n=focus_n)
+
+    def test_cached_stats_match_sql(self, db_session):
+        """Seeded and incrementally updated windows agree with the SQL path."""
+        _make_target(db_session)
+        _add_samples(db_session, "t1", hop_count=3, count=6)
+        expected = self._sql_stats(db_session, "t1", 4)
+        assert get_all_hop_stats(db_session, "t1", focus_n=4) == expected
+
+        store_sample(
+            db_session,
+            [
+                Sample(target_id="t1", sampled_at=datetime.utcnow(), hop_number=2, is_timeout=True),
+                Sample(target_id="t1", sampled_at=datetime.utcnow(), hop_number=4, rtt_ms=7.25),
+            ],
+        )
+        with patch.object(db_session, "execute", wraps=db_session.execute) as spy:
+            cached = get_all_hop_stats(db_session, "t1", focus_n=4)
+        spy.assert_not_called()
+        assert cached == self._sql_stats(db_session, "t1", 4)
+        assert cached[1]["cur_ms"] is None
+        assert cached[3]["hop"] == 4
+
+    def test_deep_focus_falls_back_to_sql(self, db_session):
+        """A window deeper than the cache keeps is computed in SQL."""
+        _make_target(db_session)
+        _add_samples(db_session, "t1", hop_count=1, count=3)
+        get_all_hop_stats(db_session, "t1")
+        with patch.object(db_session, "execute", wraps=db_session.execute) as spy:
+            get_all_hop_stats(db_session, "t1", focus_n=stats_cache.MAX_FOCUS_N + 1)
+        assert spy.call_count == 1
+
+    def test_uneven_windows(self):
+        """Hops with different window lengths and all-timeout hops aggregate independently."""
+        rows = [
+            {"hop_number": 1, "ip": "10.0.0.1", "dns": None, "rtt_ms": 1.0, "is_timeout": False},
+            {"hop_number": 1, "ip": "10.0.0.1", "dns": None, "rtt_ms": None, "is_timeout": True},
+            {"hop_number": 1, "ip": "10.0.0.1", "dns": None, "rtt_ms": 3.0, "is_timeout": False},
+            {"hop_number": 2, "ip": None, "dns": None, "rtt_ms": None, "is_timeout": True},
+        ]
+        assert stats_cache.seed("t1", stats_cache.generation("t1"), rows)
+        hop1, hop2 = stats_cache.hop_stats("t1", 10)
+        assert (hop1["avg_ms"], hop1["min_ms"], hop1["max_ms"]) == (2.0, 1.0, 3.0)
+        assert (hop1["cur_ms"], hop1["packet_loss_pct"]) == (3.0, 33.3)
+        assert hop2["avg_ms"] is None and hop2["max_ms"] is None
+        assert hop2["packet_loss_pct"] == 100.0
+
+    def test_seed_rejected_after_concurrent_write(self):
+        """A snapshot taken before a write is not installed."""
+        seen = stats_cache.generation("t1")
+        row = {"target_id": "t1", "hop_number": 1, "ip": None, "dns": None}
+        stats_cache.record([{**row, "rtt_ms": 1.0, "is_timeout": False}])
+        assert not stats_cache.seed("t1", seen, [])
+        assert stats_cache.hop_stats("t1", 10) is None
+
+    def test_delete_target_invalidates(self, db_session):
+        """Deleting a target drops its windows, lock, and generation."""
+        _make_target(db_session)
+        _add_samples(db_session, "t1", hop_count=1, count=2)
+        get_all_hop_stats(db_session, "t1")
+        delete_target(db_session, "t1")
+        assert "t1" not in stats_cache._locks
+        assert "t1" not in stats_cache._generations
+        assert stats_cache.hop_stats("t1", 10) is None
+
+    def test_backfill_leaves_cache_to_caller(self, db_session):
+        """The SQL backfill does not touch cached windows before the commit."""
+        _make_target(db_session)
+        store_sample(
+            db_session,
+            [
+                Sample(
+                    target_id="t1",
+                    sampled_at=datetime.utcnow(),
+                    hop_number=1,
+                    ip="10.0.0.1",
+                    rtt_ms=1.0,
+                )
+            ],
+        )
+        get_all_hop_stats(db_session, "t1")
+        backfill_dns_bulk(db_session, {"10.0.0.1": "gw.local"})
+        assert stats_cache.hop_stats("t1", 10)[0]["dns"] is None
+        db_session.commit()
+        stats_cache.backfill_dns_many({"10.0.0.1": "gw.local"})
+        assert get_all_hop_stats(db_session, "t1")[0]["dns"] == "gw.local"
+
 
 class TestTimeline:
     """get_timeline_data."""
@@ -183,6 +349,49 @@ class TestTimeline:
         assert len(data) == 3
         assert data[0]["timestamp"] <= data[1]["timestamp"] <= data[2]["timestamp"]
 
+    def test_timeline_timestamps_match_isoformat(self, db_session):
+        """SQL-formatted timestamps equal datetime.isoformat(), zero fraction included."""
+        _make_target(db_session)
+        stamps = [datetime(2030, 1, 2, 3, 4, 5), datetime(2030, 1, 2, 3, 4, 8, 250000)]
+        store_sample(
+            db_session,
+            [Sample(target_id="t1", sampled_at=ts, hop_number=1, rtt_ms=1.0) for ts in stamps],
+        )
+
+        data = get_timeline_data(db_session, "t1", hop="1", start=stamps[0], end=stamps[1])
+        assert [p["timestamp"] for p in data] == [ts.isoformat() for ts in stamps]
+
+    def test_timeline_range_is_downsampled_to_limit(self, db_session):
+        """A bounded range with more samples than the limit is bucketed."""
+        _make_target(db_session)
+        start = datetime(2030, 1, 1)
+        store_sample(
+            db_session,
+            [
+                Sample(
+                    target_id="t1",
+                    sampled_at=start + timedelta(seconds=i),
+                    hop_number=1,
+                    rtt_ms=float(i),
+                    is_timeout=i >= 90,
+                )
+                for i in range(100)
+            ],
+        )
+
+        data = get_timeline_data(
+            db_session,
+            "t1",
+            hop="1",
+            start=start,
+            end=start + timedelta(seconds=100),
+            limit=10,
+        )
+        assert len(data) == 10
+        assert data[0]["timestamp"] == start.isoformat()
+        assert data[0]["rtt_ms"] == 4.5
+        assert [p["is_timeout"] for p in data] == [False] * 9 + [True]
+
     def test_timeline_empty(self, db_session):
         """Timeline returns empty list when no data exists."""
         _make_target(db_session)
@@ -211,6 +420,49 @@ class TestTimeline:
         data = get_timeline_data(db_session, "t1", hop="1", start=start, end=end)
         assert len(data) >= 1
 
+    def test_timeline_rollups_beyond_limit_keep_raw_tail(self, db_session):
+        """Rollups that alone exceed the limit are merged, leaving room for raw points."""
+        _make_target(db_session)
+        now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        start = now - timedelta(days=5)
+        db_session.add_all(
+            [
+                SampleHourly(
+                    target_id="t1",
+                    hop_number=1,
+                    bucket_start=start + timedelta(hours=h),
+                    sample_count=10,
+                    timeout_count=0 if h % 2 else 5,
+                    avg_rtt_ms=10.0 if h % 2 else 40.0,
+                )
+                for h in range(96)
+            ]
+        )
+        db_session.commit()
+        store_sample(
+            db_session,
+            [
+                Sample(
+                    target_id="t1",
+                    sampled_at=now - timedelta(minutes=i),
+                    hop_number=1,
+                    rtt_ms=1.0,
+                )
+                for i in range(1, 30)
+            ],
+        )
+
+        data = get_timeline_data(db_session, "t1", hop="1", start=start, end=now, limit=10)
+        assert len(data) <= 10
+        assert data[0]["timestamp"] == start.isoformat()
+        assert data[-1]["rtt_ms"] == 1.0
+        cutoff = (now - timedelta(hours=24)).isoformat()
+        rollup_points = [p for p in data if p["timestamp"] < cutoff]
+        assert len(rollup_points) > 2
+        # 5 samples at 40 ms plus 10 at 10 ms average to 20 ms; the edge
+        # slices may hold an unpaired hour, interior ones never do.
+        assert all(p["rtt_ms"] == 20.0 for p in rollup_points[1:-1])
+
 
 class TestSummary:
     """get_summary."""
@@ -225,6 +477,19 @@ class TestSummary:
         assert summaries[0]["host"] == "1.1.1.1"
         assert summaries[0]["avg_ms"] is not None
 
+    def test_summary_matches_final_hop_stats(self, db_session):
+        """Batched summary stats equal per-hop stats for the final hop."""
+        _make_target(db_session, "s1", "1.1.1.1")
+        _make_target(db_session, "s2", "9.9.9.9")
+        _add_samples(db_session, "s1", hop_count=3, count=6)
+
+        rows = {r["target_id"]: r for r in get_summary(db_session, focus_n=4)}
+        expected = get_hop_stats(db_session, "s1", 3, focus_n=4)
+        for key in ("ip", "dns", "avg_ms", "min_ms", "max_ms", "cur_ms", "packet_loss_pct"):
+            assert rows["s1"][key] == expected[key]
+        assert rows["s2"]["avg_ms"] is None
+        assert rows["s2"]["packet_loss_pct"] == 0.0
+
     def test_summary_no_targets(self, db_session):
         """Summary returns empty list when there are no active targets."""
         assert get_summary(db_session) == []
@@ -241,6 +506,38 @@ class TestRouteChanges:
         route = get_last_known_route(db_session, "t1")
         assert route == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
 
+    def test_cached_route_statement_rebinds_target(self, db_session):
+        """The lambda-cached statement picks up each call's target_id."""
+        _make_target(db_session, "a")
+        _make_target(db_session, "b")
+        _add_samples(db_session, "a", hop_count=1, count=1)
+        _add_samples(db_session, "b", hop_count=2, count=1)
+
+        assert get_last_known_route(db_session, "a") == ["10.0.0.1"]
+        assert get_last_known_route(db_session, "b") == ["10.0.0.1", "10.0.0.2"]
+
+    def test_get_last_known_routes_bulk(self, db_session):
+        """One query returns each target's newest route, hop-ordered."""
+        _make_target(db_session, "a")
+        _make_target(db_session, "b")
+        _make_target(db_session, "empty")
+        _add_samples(db_session, "a", hop_count=3, count=2)
+        now = datetime.utcnow()
+        store_sample(
+            db_session,
+            [
+                Sample(target_id="b", sampled_at=now - timedelta(seconds=9), hop_number=1, ip="x"),
+                Sample(target_id="b", sampled_at=now, hop_number=2, ip="10.9.9.2"),
+                Sample(target_id="b", sampled_at=now, hop_number=1, ip="10.9.9.1"),
+            ],
+        )
+
+        routes = get_last_known_routes(db_session)
+        assert routes == {
+            "a": get_last_known_route(db_session, "a"),
+            "b": ["10.9.9.1", "10.9.9.2"],
+        }
+
     def test_get_last_known_route_empty(self, db_session):
         """Returns None when no samples exist."""
         _make_target(db_session)
@@ -258,6 +555,57 @@ class TestRouteChanges:
         assert len(changes) == 1
         assert "10.0.0.3" in changes[0]["new_route"]
 
+    def test_record_route_change_uses_supplied_time(self, db_session):
+        """The detection time can be pinned to the sample timestamp."""
+        _make_target(db_session)
+        when = datetime(2025, 3, 1, 12, 0, 0)
+        change = record_route_change(db_session, "t1", ["10.0.0.1"], ["10.0.0.2"], now=when)
+        assert change.detected_at == when
+
+    def test_record_route_change_joins_caller_transaction(self, db_session):
+        """With commit=False the row commits with the caller's next commit."""
+        _make_target(db_session)
+        change = record_route_change(db_session, "t1", ["10.0.0.1"], ["10.0.0.2"], commit=False)
+        assert change in db_session.new
+        store_sample(
+            db_session, [Sample(target_id="t1", sampled_at=datetime.utcnow(), hop_number=1)]
+        )
+        assert change not in db_session.new
+        assert len(get_route_changes(db_session, "t1")) == 1
+
+
+class TestEnsureTargetExists:
+    """Single-query existence checks on the data helpers."""
+
+    def test_existing_target_without_data(self, db_session):
+        """Known targets with no rows return empty results."""
+        _make_target(db_session)
+        assert get_all_hop_stats(db_session, "t1", ensure_target_exists=True) == []
+        assert get_timeline_data(db_session, "t1", hop="last", ensure_target_exists=True) == []
+        assert get_timeline_data(db_session, "t1", hop="1", ensure_target_exists=True) == []
+        assert get_route_changes(db_session, "t1", ensure_target_exists=True) == []
+
+    def test_existing_target_with_data(self, db_session):
+        """The joined queries return the same rows as the plain ones."""
+        _make_target(db_session)
+        _add_samples(db_session, "t1", hop_count=3, count=2)
+        record_route_change(db_session, "t1", ["10.0.0.1"], ["10.0.0.2"])
+        assert get_all_hop_stats(db_session, "t1", ensure_target_exists=True) == get_all_hop_stats(
+            db_session, "t1"
+        )
+        assert len(get_route_changes(db_session, "t1", ensure_target_exists=True)) == 1
+
+    def test_missing_target_raises(self, db_session):
+        """Missing targets raise TargetNotFound."""
+        with pytest.raises(TargetNotFound):
+            get_all_hop_stats(db_session, "nope", ensure_target_exists=True)
+        with pytest.raises(TargetNotFound):
+            get_timeline_data(db_session, "nope", hop="last", ensure_target_exists=True)
+        with pytest.raises(TargetNotFound):
+            get_timeline_data(db_session, "nope", hop="2", ensure_target_exists=True)
+        with pytest.raises(TargetNotFound):
+            get_route_changes(db_session, "nope", ensure_target_exists=True)
+
 
 class TestAlertHelpers:
     """get_active_alerts / record_alert_event."""
@@ -294,30 +642,87 @@ class TestAlertHelpers:
         assert event.metric_value == 12.0
         assert event.alert_id == "ae1"
 
+    def test_record_alert_events_bulk(self, db_session):
+        """record_alert_events inserts every buffered row."""
+        from pingwatcher.db.models import AlertHistory
+
+        _make_target(db_session)
+        db_session.add(
+            Alert(
+                id="ae2", target_id="t1", metric="packet_loss_pct",
+                operator=">", threshold=5.0, action_type="log",
+            )
+        )
+        db_session.commit()
+
+        now = datetime.utcnow()
+        record_alert_events(
+            db_session,
+            [
+                {"alert_id": "ae2", "target_id": "t1", "triggered_at": now,
+                 "metric_value": float(i), "message": f"event {i}"}
+                for i in range(3)
+            ],
+        )
+        db_session.commit()
+        assert db_session.query(AlertHistory).filter_by(alert_id="ae2").count() == 3
+
 
 class TestMaintenanceHelpers:
     """Rollup, retention, and DNS backfill helpers."""
 
-    def test_backfill_dns_for_ip(self, db_session):
+    def test_backfill_dns_bulk(self, db_session):
+        """One UPDATE names every listed IP and leaves resolved rows alone."""
         _make_target(db_session)
         now = datetime.utcnow()
         store_sample(
             db_session,
             [
+                Sample(target_id="t1", sampled_at=now, hop_number=1, ip="10.0.0.1", rtt_ms=1.0),
+                Sample(target_id="t1", sampled_at=now, hop_number=2, ip="10.0.0.2", rtt_ms=2.0),
                 Sample(
                     target_id="t1",
                     sampled_at=now,
+                    hop_number=3,
+                    ip="10.0.0.3",
+                    dns="keep.local",
+                    rtt_ms=3.0,
+                ),
+            ],
+        )
+        changed = backfill_dns_bulk(
+            db_session,
+            {"10.0.0.1": "gw.local", "10.0.0.2": "core.isp", "10.0.0.3": "other.local"},
+        )
+        db_session.commit()
+        db_session.expire_all()
+        assert changed == 2
+        names = {s.ip: s.dns for s in db_session.query(Sample).all()}
+        assert names == {"10.0.0.1": "gw.local", "10.0.0.2": "core.isp", "10.0.0.3": "keep.local"}
+
+    def test_backfill_dns_bulk_skips_old_samples(self, db_session):
+        """Samples older than the backfill window keep their missing name."""
+        _make_target(db_session)
+        now = datetime.utcnow()
+        store_sample(
+            db_session,
+            [
+                Sample(
+                    target_id="t1",
+                    sampled_at=now - timedelta(hours=30),
                     hop_number=1,
                     ip="10.0.0.1",
-                    dns=None,
-                    rtt_ms=11.0,
-                    is_timeout=False,
-                )
+                    rtt_ms=1.0,
+                ),
+                Sample(target_id="t1", sampled_at=now, hop_number=1, ip="10.0.0.1", rtt_ms=1.0),
             ],
         )
-        changed = backfill_dns_for_ip(db_session, "10.0.0.1", "router.local")
+        changed = backfill_dns_bulk(db_session, {"10.0.0.1": "gw.local"}, within_hours=24)
         db_session.commit()
+        db_session.expire_all()
         assert changed == 1
+        rows = db_session.query(Sample).order_by(Sample.sampled_at).all()
+        assert [s.dns for s in rows] == [None, "gw.local"]
 
     def test_rollup_and_delete_old_samples(self, db_session):
         _make_target(db_session)
@@ -340,3 +745,23 @@ class TestMaintenanceHelpers:
         assert rolled >= 1
         deleted = delete_raw_samples_older_than(db_session, days=1)
         assert deleted >= 1
+
+
+class TestTargetExistsCache:
+    """pingwatcher.db.cache.target_exists."""
+
+    def test_cached_and_invalidated(self, db_session):
+        """Answers are cached and refreshed by create/delete helpers."""
+        from unittest.mock import patch
+
+        from pingwatcher.db.cache import target_exists
+
+        assert target_exists(db_session, "t1") is False
+        _make_target(db_session)
+        assert target_exists(db_session, "t1") is True
+
+        with patch.object(db_session, "query", side_effect=AssertionError("cache miss")):
+            assert target_exists(db_session, "t1") is True
+
+        delete_target(db_session, "t1")
+        assert target_exists(db_session, "t1") is False
@@ -1,9 +1,17 @@
 """Tests for :mod:`pingwatcher.engine.scheduler`."""
 
+import asyncio
+import json
 import socket
-from unittest.mock import MagicMock, patch
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
 
 from pingwatcher.engine.scheduler import (
+    _broadcast_tick,
+    _flush_broadcasts,
     _process_dns_enrichment,
     _run_maintenance,
     _select_probe_engine,
@@ -14,46 +22,218 @@ from pingwatcher.engine.scheduler import (
     ws_subscribers,
     ws_summary_subscribers,
 )
+from pingwatcher.engine.tracer import HopRec
 
 
 class TestStartStopMonitoring:
     """Verify scheduler job management."""
 
-    @patch("pingwatcher.engine.scheduler.scheduler")
-    def test_start_monitoring_adds_job(self, mock_scheduler):
-        """start_monitoring registers an interval job."""
+    def test_start_monitoring_schedules_target(self):
+        """start_monitoring queues the target one interval out."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
         start_monitoring("t1", "8.8.8.8", interval=5.0)
-        mock_scheduler.add_job.assert_called_once()
-        call_kwargs = mock_scheduler.add_job.call_args
-        assert call_kwargs.kwargs["id"] == "t1"
-        assert call_kwargs.kwargs["seconds"] == 5.0
-        assert call_kwargs.kwargs["coalesce"] is True
-        assert call_kwargs.kwargs["max_instances"] == 32
+        try:
+            monitor = scheduler_mod._monitored["t1"]
+            assert (monitor.host, monitor.interval) == ("8.8.8.8", 5.0)
+            due = [d for d, gen, tid in scheduler_mod._dispatch_heap if gen == monitor.generation]
+            assert len(due) == 1
+        finally:
+            stop_monitoring("t1")
+
+    def test_stop_monitoring_removes_target(self):
+        """stop_monitoring unschedules the target and drops its caches."""
+        from pingwatcher.engine import scheduler as scheduler_mod
 
-    @patch("pingwatcher.engine.scheduler.scheduler")
-    def test_stop_monitoring_removes_job(self, mock_scheduler):
-        """stop_monitoring removes the scheduled job."""
+        start_monitoring("t1", "8.8.8.8", interval=5.0)
         latest_results["t1"] = [{"hop": 1}]
         stop_monitoring("t1")
-        mock_scheduler.remove_job.assert_called_once_with("t1")
+        assert "t1" not in scheduler_mod._monitored
         assert "t1" not in latest_results
 
+    @patch("pingwatcher.engine.scheduler.get_settings")
     @patch("pingwatcher.engine.scheduler.scheduler")
-    def test_stop_monitoring_no_job(self, mock_scheduler):
-        """stop_monitoring does not raise when no job exists."""
-        mock_scheduler.remove_job.side_effect = Exception("not found")
+    def test_broadcast_job_runs_on_loop_executor(self, mock_scheduler, mock_settings):
+        """Coroutine jobs go to the asyncio executor; trace jobs do not."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        mock_scheduler.running = False
+        mock_settings.return_value = MagicMock(
+            enable_dns_enrichment_worker=False,
+            ws_broadcast_tick_seconds=0.2,
+            trace_dispatch_tick_seconds=0.2,
+            maintenance_interval_minutes=30,
+        )
+        with patch("pingwatcher.engine.scheduler.warm_route_cache"), patch(
+            "pingwatcher.engine.scheduler._start_alert_worker"
+        ):
+            scheduler_mod.start_scheduler()
+        jobs = {c.kwargs["id"]: c.kwargs for c in mock_scheduler.add_job.call_args_list}
+        assert jobs[scheduler_mod._BROADCAST_JOB_ID]["executor"] == scheduler_mod._LOOP_EXECUTOR
+        assert jobs[scheduler_mod._DISPATCH_JOB_ID]["executor"] == scheduler_mod._LOOP_EXECUTOR
+        assert jobs[scheduler_mod._MAINTENANCE_JOB_ID]["executor"] == scheduler_mod._LOOP_EXECUTOR
+
+    def test_stop_monitoring_no_job(self):
+        """stop_monitoring does not raise when the target is not monitored."""
         stop_monitoring("missing")  # Should not raise.
 
 
+class TestDispatch:
+    """Verify the heap-driven trace dispatcher."""
+
+    def _register(self, monkeypatch, target_id="d1", interval=5.0):
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        monkeypatch.setattr(scheduler_mod, "_monitored", {})
+        monkeypatch.setattr(scheduler_mod, "_dispatch_heap", [])
+        monkeypatch.setattr(scheduler_mod, "_queued", set())
+        monkeypatch.setattr(scheduler_mod, "_skipped_samples", {})
+        with patch("pingwatcher.engine.scheduler.time.monotonic", return_value=100.0):
+            start_monitoring(target_id, "8.8.8.8", interval=interval)
+        return scheduler_mod
+
+    def test_submits_only_due_targets(self, monkeypatch):
+        """Nothing runs before the first interval elapses; then it runs once."""
+        scheduler_mod = self._register(monkeypatch)
+        with patch.object(scheduler_mod, "_trace_pool") as pool:
+            scheduler_mod._dispatch_due(now=104.0)
+            pool.submit.assert_not_called()
+            scheduler_mod._dispatch_due(now=105.0)
+            pool.submit.assert_called_once_with(scheduler_mod._monitored["d1"].run)
+        run = scheduler_mod._monitored["d1"].run
+        assert (run.func, run.args) == (scheduler_mod._run_dispatched, ("d1", "8.8.8.8", 30, 3.0))
+        assert scheduler_mod._dispatch_heap[0][0] == 110.0
+
+    def test_coalesces_missed_ticks(self, monkeypatch):
+        """A target far behind runs once and is rescheduled from now."""
+        scheduler_mod = self._register(monkeypatch)
+        with patch.object(scheduler_mod, "_trace_pool") as pool:
+            scheduler_mod._dispatch_due(now=131.0)
+        assert pool.submit.call_count == 1
+        gen = scheduler_mod._monitored["d1"].generation
+        assert scheduler_mod._dispatch_heap == [(136.0, gen, "d1")]
+
+    def test_skips_target_still_queued(self, monkeypatch):
+        """A target whose last trace has not started yet is skipped and counted."""
+        scheduler_mod = self._register(monkeypatch)
+        with patch.object(scheduler_mod, "_trace_pool") as pool:
+            scheduler_mod._dispatch_due(now=105.0)
+            scheduler_mod._dispatch_due(now=110.0)
+        assert pool.submit.call_count == 1
+        metrics = scheduler_mod.scheduler_metrics()
+        assert metrics["skipped_samples"] == {"d1": 1}
+        assert metrics["queued_traces"] == 1
+
+    def test_stopped_and_replaced_entries_are_dropped(self, monkeypatch):
+        """Stale heap entries left by stop/restart never dispatch."""
+        scheduler_mod = self._register(monkeypatch)
+        old_gen = scheduler_mod._monitored["d1"].generation
+        with patch("pingwatcher.engine.scheduler.time.monotonic", return_value=100.0):
+            start_monitoring("d1", "1.1.1.1", interval=10.0)
+        with patch.object(scheduler_mod, "_trace_pool") as pool:
+            scheduler_mod._dispatch_due(now=105.0)
+            pool.submit.assert_not_called()
+            scheduler_mod._dispatch_due(now=110.0)
+            assert pool.submit.call_args.args[0].args[1] == "1.1.1.1"
+        assert all(gen != old_gen for _due, gen, _tid in scheduler_mod._dispatch_heap)
+
+        stop_monitoring("d1")
+        with patch.object(scheduler_mod, "_trace_pool") as pool:
+            scheduler_mod._dispatch_due(now=1000.0)
+        pool.submit.assert_not_called()
+        assert scheduler_mod._dispatch_heap == []
+
+
+class TestTracePoolLifecycle:
+    """Verify trace-pool failures are logged and shutdown drains the pool."""
+
+    @patch("pingwatcher.engine.scheduler._collect_sample", side_effect=RuntimeError("locked"))
+    def test_dispatched_failure_is_logged(self, _mock_collect, caplog):
+        """An exception escaping a dispatched trace reaches the log."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        with caplog.at_level("ERROR", logger="pingwatcher.engine.scheduler"):
+            scheduler_mod._run_dispatched("boom", "8.8.8.8", 30, 1.0)
+        assert "Sampling failed for target boom" in caplog.text
+
+    def test_shutdown_waits_for_running_traces(self, monkeypatch):
+        """shutdown_scheduler returns only after running traces finish."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        monkeypatch.setattr(scheduler_mod, "_trace_pool", scheduler_mod._new_trace_pool())
+        old_pool = scheduler_mod._trace_pool
+        started = threading.Event()
+        finished = []
+
+        def _slow_trace():
+            started.set()
+            time.sleep(0.05)
+            finished.append(True)
+
+        old_pool.submit(_slow_trace)
+        started.wait(1)
+        with patch.object(scheduler_mod, "_stop_alert_worker"), patch.object(
+            scheduler_mod, "scheduler"
+        ) as mock_scheduler:
+            mock_scheduler.running = False
+            scheduler_mod.shutdown_scheduler()
+        assert finished == [True]
+        assert scheduler_mod._trace_pool is not old_pool
+
+
+class TestLatestCaches:
+    """Verify the per-target latest-result caches stay bounded."""
+
+    def test_oldest_written_target_evicted(self):
+        """Past the cap, the target written longest ago is dropped."""
+        from pingwatcher.engine.scheduler import _BoundedDict
+
+        cache = _BoundedDict(2)
+        cache["a"] = [1]
+        cache["b"] = [2]
+        cache["a"] = [3]
+        cache["c"] = [4]
+        assert list(cache) == ["a", "c"]
+        assert cache["a"] == [3]
+
+
+class TestHopColumns:
+    """Verify the columnar hop wire layout."""
+
+    def test_transposes_hops(self):
+        """Each field becomes one array, in trace order."""
+        from pingwatcher.engine.scheduler import hop_columns
+
+        hops = [
+            HopRec(1, "10.0.0.1", "gw", 1.0, False),
+            HopRec(2, None, None, None, True),
+        ]
+        assert hop_columns(hops) == {
+            "hop": [1, 2],
+            "ip": ["10.0.0.1", None],
+            "dns": ["gw", None],
+            "rtt_ms": [1.0, None],
+            "is_timeout": [False, True],
+        }
+
+    def test_empty_trace(self):
+        """An empty trace yields empty columns."""
+        from pingwatcher.engine.scheduler import hop_columns
+
+        assert hop_columns([]) == {f: [] for f in ("hop", "ip", "dns", "rtt_ms", "is_timeout")}
+
+
 class TestNotifySubscribers:
     """Verify WebSocket notification dispatch."""
 
     def test_enqueues_payload(self):
-        """Subscribers receive the payload via their queues."""
+        """Subscribers receive the payload via their queues on flush."""
         queue = MagicMock()
         ws_subscribers["t1"] = {queue}
 
         _notify_subscribers("t1", [{"hop": 1, "ip": "10.0.0.1"}])
+        queue.put_nowait.assert_not_called()
+        _flush_broadcasts()
         queue.put_nowait.assert_called_once()
 
         # Cleanup.
@@ -63,14 +243,33 @@ class TestNotifySubscribers:
         """Queues that raise on put_nowait are discarded."""
         dead_queue = MagicMock()
         dead_queue.put_nowait.side_effect = RuntimeError("closed")
-        ws_subscribers["t2"] = {dead_queue}
+        live_queue = MagicMock()
+        ws_subscribers["t2"] = {dead_queue, live_queue}
 
         _notify_subscribers("t2", [{"hop": 1}])
-        assert dead_queue not in ws_subscribers.get("t2", set())
+        _flush_broadcasts()
+        assert ws_subscribers["t2"] == {live_queue}
+        live_queue.put_nowait.assert_called_once()
 
         # Cleanup.
         ws_subscribers.pop("t2", None)
 
+    def test_full_queue_drops_oldest(self):
+        """A full queue keeps its subscriber and loses its oldest frame."""
+        slow_queue = asyncio.Queue(maxsize=2)
+        slow_queue.put_nowait("first")
+        slow_queue.put_nowait("second")
+        ws_subscribers["t3"] = {slow_queue}
+
+        _notify_subscribers("t3", [{"hop": 1}])
+        _flush_broadcasts()
+        assert ws_subscribers["t3"] == {slow_queue}
+        assert slow_queue.get_nowait() == "second"
+        assert json.loads(slow_queue.get_nowait())["batch"][0]["target_id"] == "t3"
+
+        # Cleanup.
+        ws_subscribers.pop("t3", None)
+
     def test_no_subscribers(self):
         """No error when there are no subscribers for a target."""
         _notify_subscribers("t_none", [{"hop": 1}])  # Should not raise.
@@ -84,9 +283,46 @@ class TestNotifySubscribers:
             [{"hop": 1}],
             summary_row={"target_id": "t1", "host": "8.8.8.8"},
         )
+        _flush_broadcasts()
         queue.put_nowait.assert_called_once()
         ws_summary_subscribers.discard(queue)
 
+    def test_samples_coalesced_into_one_frame(self):
+        """Several samples between flushes reach each queue as one batch."""
+        queues = [MagicMock(), MagicMock()]
+        ws_subscribers["t3"] = set(queues)
+
+        from datetime import datetime
+
+        times = [datetime(2025, 1, 1, 12, 0, 0), datetime(2025, 1, 1, 12, 0, 2, 500000)]
+        _notify_subscribers("t3", [{"hop": 1}], sampled_at=times[0])
+        _notify_subscribers("t3", [{"hop": 1}], sampled_at=times[1])
+        _flush_broadcasts()
+
+        for queue in queues:
+            queue.put_nowait.assert_called_once()
+            frame = json.loads(queue.put_nowait.call_args.args[0])
+            assert [m["sampled_at"] for m in frame["batch"]] == [t.isoformat() for t in times]
+        # One serialised frame object is shared by every subscriber.
+        assert queues[0].put_nowait.call_args.args[0] is queues[1].put_nowait.call_args.args[0]
+        ws_subscribers.pop("t3", None)
+
+    def test_broadcast_tick_feeds_asyncio_queue(self):
+        """The scheduler job delivers on the loop into real asyncio queues."""
+
+        async def _run():
+            queue: asyncio.Queue = asyncio.Queue()
+            ws_subscribers["t4"] = {queue}
+            _notify_subscribers("t4", [{"hop": 1}])
+            await _broadcast_tick()
+            return json.loads(await asyncio.wait_for(queue.get(), 1))
+
+        try:
+            frame = asyncio.run(_run())
+        finally:
+            ws_subscribers.pop("t4", None)
+        assert frame["batch"][0]["type"] == "target_sample"
+
 
 class TestCollectSampleDnsFailure:
     """Verify repeated DNS failures stop monitoring."""
@@ -118,6 +354,75 @@ class TestCollectSampleDnsFailure:
         mock_stop.assert_called_once_with("target-1")
 
 
+class TestCollectSampleOverlap:
+    """Verify overlapping runs for one target are skipped."""
+
+    @patch("pingwatcher.engine.scheduler._select_probe_engine")
+    def test_skips_while_previous_run_inflight(self, mock_select_engine):
+        """A tick is dropped while the target's previous trace is running."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        scheduler_mod._inflight.add("busy")
+        try:
+            scheduler_mod._collect_sample("busy", "8.8.8.8", 30, 1.0)
+            scheduler_mod._collect_sample("busy", "8.8.8.8", 30, 1.0)
+            assert scheduler_mod.scheduler_metrics()["skipped_samples"]["busy"] == 2
+        finally:
+            scheduler_mod._inflight.discard("busy")
+            scheduler_mod._skipped_samples.pop("busy", None)
+        mock_select_engine.assert_not_called()
+
+    @patch("pingwatcher.engine.scheduler._select_probe_engine", side_effect=RuntimeError)
+    def test_inflight_cleared_after_failed_run(self, _mock_select_engine):
+        """The in-flight marker is released even when the trace fails."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        scheduler_mod._collect_sample("flaky", "8.8.8.8", 30, 1.0)
+        assert "flaky" not in scheduler_mod._inflight
+
+
+class TestCollectSampleSummaryGate:
+    """Verify the summary row is only built for connected clients."""
+
+    def _collect(self, target_id):
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        with patch(
+            "pingwatcher.engine.scheduler._select_probe_engine",
+            return_value=[HopRec(1, "10.0.0.1", "gw.local", 1.0, False)],
+        ), patch("pingwatcher.engine.scheduler.get_settings") as mock_settings, patch(
+            "pingwatcher.engine.scheduler._worker_sessions"
+        ), patch("pingwatcher.engine.scheduler.store_samples_bulk"), patch(
+            "pingwatcher.engine.scheduler.get_all_hop_stats", return_value=[]
+        ), patch("pingwatcher.engine.scheduler._enqueue_alert_evaluation"), patch(
+            "pingwatcher.engine.scheduler._notify_subscribers"
+        ), patch(
+            "pingwatcher.engine.scheduler.get_target_summary", return_value={}
+        ) as mock_summary:
+            mock_settings.return_value = MagicMock(default_focus=10, enable_ws_summary_push=True)
+            scheduler_mod._collect_sample(target_id, "8.8.8.8", 30, 1.0)
+        scheduler_mod._last_known_routes.pop(target_id, None)
+        scheduler_mod.latest_results.pop(target_id, None)
+        scheduler_mod.latest_hop_stats.pop(target_id, None)
+        scheduler_mod._dns_pending_ips.clear()
+        return mock_summary
+
+    def test_skipped_without_subscribers(self):
+        """No WebSocket client means no summary query."""
+        ws_summary_subscribers.clear()
+        ws_subscribers.pop("sg1", None)
+        self._collect("sg1").assert_not_called()
+
+    def test_built_for_summary_subscriber(self):
+        """A summary-feed client makes the trace build the summary row."""
+        subscriber = object()
+        ws_summary_subscribers.add(subscriber)
+        try:
+            self._collect("sg2").assert_called_once()
+        finally:
+            ws_summary_subscribers.discard(subscriber)
+
+
 class TestCollectSampleFallback:
     """Verify fallback to system traceroute when ICMP data is unusable."""
 
@@ -125,20 +430,19 @@ class TestCollectSampleFallback:
     @patch("pingwatcher.engine.scheduler.evaluate_alerts")
     @patch("pingwatcher.engine.scheduler.get_all_hop_stats", return_value=[])
     @patch("pingwatcher.engine.scheduler.get_target_summary", return_value=None)
-    @patch("pingwatcher.engine.scheduler.store_sample")
-    @patch("pingwatcher.engine.scheduler.get_last_known_route", return_value=None)
+    @patch("pingwatcher.engine.scheduler.store_samples_bulk")
     @patch("pingwatcher.engine.scheduler.SessionLocal")
     @patch(
         "pingwatcher.engine.scheduler.system_traceroute",
         return_value=[
-            {"hop": 1, "ip": "10.0.0.1", "dns": "gw.local", "rtt_ms": 1.2, "is_timeout": False}
+            HopRec(1, "10.0.0.1", "gw.local", 1.2, False)
         ],
     )
     @patch(
         "pingwatcher.engine.scheduler.icmp_traceroute",
         return_value=[
-            {"hop": 1, "ip": None, "dns": None, "rtt_ms": None, "is_timeout": True},
-            {"hop": 2, "ip": None, "dns": None, "rtt_ms": None, "is_timeout": True},
+            HopRec(1, None, None, None, True),
+            HopRec(2, None, None, None, True),
         ],
     )
     @patch("pingwatcher.engine.scheduler.get_settings")
@@ -148,8 +452,7 @@ class TestCollectSampleFallback:
         _mock_icmp,
         mock_system_traceroute,
         mock_session_local,
-        _mock_get_last_route,
-        mock_store_sample,
+        mock_store_samples,
         _mock_target_summary,
         _mock_get_all_hop_stats,
         _mock_evaluate_alerts,
@@ -166,20 +469,19 @@ class TestCollectSampleFallback:
         scheduler_mod._collect_sample("target-2", "8.8.8.8", 30, 1.0)
 
         mock_system_traceroute.assert_called_once_with("8.8.8.8", max_hops=30, timeout=1.0)
-        assert mock_store_sample.call_count == 1
+        assert mock_store_samples.call_count == 1
 
     @patch("pingwatcher.engine.scheduler._notify_subscribers")
     @patch("pingwatcher.engine.scheduler.evaluate_alerts")
     @patch("pingwatcher.engine.scheduler.get_all_hop_stats", return_value=[])
     @patch("pingwatcher.engine.scheduler.get_target_summary", return_value=None)
-    @patch("pingwatcher.engine.scheduler.store_sample")
-    @patch("pingwatcher.engine.scheduler.get_last_known_route", return_value=None)
+    @patch("pingwatcher.engine.scheduler.store_samples_bulk")
     @patch("pingwatcher.engine.scheduler.SessionLocal")
     @patch("pingwatcher.engine.scheduler.system_traceroute", return_value=[])
     @patch(
         "pingwatcher.engine.scheduler.icmp_traceroute",
         return_value=[
-            {"hop": 1, "ip": "10.0.0.1", "dns": "gw.local", "rtt_ms": 1.2, "is_timeout": False}
+            HopRec(1, "10.0.0.1", "gw.local", 1.2, False)
         ],
     )
     @patch("pingwatcher.engine.scheduler.get_settings")
@@ -189,8 +491,7 @@ class TestCollectSampleFallback:
         mock_icmp,
         mock_system_traceroute,
         mock_session_local,
-        _mock_get_last_route,
-        mock_store_sample,
+        mock_store_samples,
         _mock_target_summary,
         _mock_get_all_hop_stats,
         _mock_evaluate_alerts,
@@ -207,7 +508,7 @@ class TestCollectSampleFallback:
 
         mock_system_traceroute.assert_called_once_with("8.8.8.8", max_hops=30, timeout=1.0)
         mock_icmp.assert_called_once()
-        assert mock_store_sample.call_count == 1
+        assert mock_store_samples.call_count == 1
 
 
 class TestProbeEngineSelection:
@@ -229,19 +530,31 @@ class TestProbeEngineSelection:
         assert hops == [{"hop": 1}]
         mock_scapy.assert_called_once()
 
+    @patch("pingwatcher.engine.scheduler.scapy_icmp_traceroute", return_value=[{"hop": 1}])
+    @patch("pingwatcher.engine.scheduler.get_settings")
+    def test_uses_supplied_settings(self, mock_settings, mock_scapy):
+        """Settings passed by the caller are used without another lookup."""
+        cfg = MagicMock(probe_engine="scapy", scapy_enabled=True)
+        assert _select_probe_engine("8.8.8.8", 30, 1.0, cfg=cfg) == [{"hop": 1}]
+        mock_settings.assert_not_called()
+
 
 class TestBackgroundJobs:
     """Verify maintenance and DNS enrichment helpers."""
 
-    @patch("pingwatcher.engine.scheduler.backfill_dns_for_ip")
-    @patch("pingwatcher.engine.scheduler.SessionLocal")
-    @patch("pingwatcher.engine.scheduler.reverse_dns", return_value="router.local")
+    @patch("pingwatcher.engine.scheduler.backfill_dns_bulk")
+    @patch("pingwatcher.engine.scheduler._worker_sessions")
+    @patch(
+        "pingwatcher.engine.scheduler.reverse_dns_many",
+        new_callable=AsyncMock,
+        side_effect=lambda ips: {ip: "router.local" for ip in ips},
+    )
     @patch("pingwatcher.engine.scheduler.get_settings")
     def test_dns_enrichment_backfills_rows(
         self,
         mock_settings,
         _mock_reverse,
-        mock_session_local,
+        mock_worker_sessions,
         mock_backfill,
     ):
         from pingwatcher.engine import scheduler as scheduler_mod
@@ -253,18 +566,75 @@ class TestBackgroundJobs:
             dns_enrichment_batch_size=100,
         )
         db = MagicMock()
-        mock_session_local.return_value = db
-        _process_dns_enrichment()
-        mock_backfill.assert_called_once()
+        mock_worker_sessions.return_value = db
+        asyncio.run(_process_dns_enrichment())
+        mock_backfill.assert_called_once_with(db, {"10.0.0.1": "router.local"})
+        db.commit.assert_called_once()
+
+    @patch("pingwatcher.engine.scheduler.stats_cache")
+    @patch("pingwatcher.engine.scheduler.backfill_dns_bulk")
+    @patch("pingwatcher.engine.scheduler._worker_sessions")
+    def test_dns_backfill_updates_cache_after_commit(
+        self, mock_worker_sessions, mock_backfill, mock_cache
+    ):
+        """Cached windows only pick up names once the UPDATE is committed."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        calls = MagicMock()
+        db = mock_worker_sessions.return_value
+        calls.attach_mock(db.commit, "commit")
+        calls.attach_mock(mock_cache.backfill_dns_many, "backfill_dns_many")
+        scheduler_mod._backfill_dns({"10.0.0.1": "router.local"})
+        assert [c[0] for c in calls.mock_calls] == ["commit", "backfill_dns_many"]
+        mock_cache.backfill_dns_many.assert_called_once_with({"10.0.0.1": "router.local"})
+
+    @patch(
+        "pingwatcher.engine.scheduler.reverse_dns_many",
+        new_callable=AsyncMock,
+        side_effect=lambda ips: {ip: "----------" for ip in ips},
+    )
+    @patch("pingwatcher.engine.scheduler.get_settings")
+    def test_dns_enrichment_drains_one_batch(self, mock_settings, mock_reverse):
+        """Each run takes at most one batch off the pending set."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        scheduler_mod._dns_pending_ips.clear()
+        scheduler_mod._dns_pending_ips.update(f"10.0.0.{i}" for i in range(5))
+        mock_settings.return_value = MagicMock(
+            enable_dns_enrichment_worker=True,
+            dns_enrichment_batch_size=3,
+        )
+        asyncio.run(_process_dns_enrichment())
+        mock_reverse.assert_called_once()
+        assert len(mock_reverse.call_args.args[0]) == 3
+        assert len(scheduler_mod._dns_pending_ips) == 2
+        scheduler_mod._dns_pending_ips.clear()
+
+    def test_only_unresolved_hops_queued_for_dns(self):
+        """Hops with an IP but no name are queued; others are not."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        scheduler_mod._dns_pending_ips.clear()
+        scheduler_mod._queue_dns_enrichment(
+            scheduler_mod.hop_columns(
+                [
+                    HopRec(1, "10.0.0.1", "gw.local", 1.0, False),
+                    HopRec(2, "10.0.0.2", None, 2.0, False),
+                    HopRec(3, None, None, None, True),
+                ]
+            )
+        )
+        assert scheduler_mod._dns_pending_ips == {"10.0.0.2"}
+        scheduler_mod._dns_pending_ips.clear()
 
     @patch("pingwatcher.engine.scheduler.delete_raw_samples_older_than")
     @patch("pingwatcher.engine.scheduler.aggregate_hourly_rollups")
-    @patch("pingwatcher.engine.scheduler.SessionLocal")
+    @patch("pingwatcher.engine.scheduler._worker_sessions")
     @patch("pingwatcher.engine.scheduler.get_settings")
     def test_maintenance_runs_rollup_and_retention(
         self,
         mock_settings,
-        mock_session_local,
+        mock_worker_sessions,
         mock_rollups,
         mock_delete,
     ):
@@ -274,7 +644,214 @@ class TestBackgroundJobs:
             raw_retention_days=14,
         )
         db = MagicMock()
-        mock_session_local.return_value = db
+        mock_worker_sessions.return_value = db
         _run_maintenance()
         mock_rollups.assert_called_once_with(db, older_than_hours=24)
         mock_delete.assert_called_once_with(db, days=14)
+
+    @patch("pingwatcher.engine.scheduler._run_maintenance")
+    def test_maintenance_tick_runs_off_the_loop(self, mock_run):
+        """The coroutine job hands the blocking maintenance work to a thread."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        loop_thread = threading.get_ident()
+        threads = []
+        mock_run.side_effect = lambda: threads.append(threading.get_ident())
+        asyncio.run(scheduler_mod._maintenance_tick())
+        assert len(threads) == 1 and threads[0] != loop_thread
+
+
+class TestWarmRouteCache:
+    """Verify the startup route-cache warm-up."""
+
+    def test_loads_stored_routes(self, db_session):
+        """Targets with samples get their last route; others stay empty."""
+        from datetime import datetime
+
+        from pingwatcher.db.models import Target
+        from pingwatcher.db.queries import store_sample
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        db_session.add_all([Target(id="w1", host="a"), Target(id="w2", host="b")])
+        db_session.commit()
+        store_sample(
+            db_session,
+            [{"target_id": "w1", "sampled_at": datetime.utcnow(), "hop_number": 1, "ip": "1.1"}],
+        )
+        try:
+            with patch("pingwatcher.engine.scheduler.SessionLocal", return_value=db_session):
+                scheduler_mod.warm_route_cache()
+            assert scheduler_mod._last_known_routes["w1"] == ["1.1"]
+            assert "w2" not in scheduler_mod._last_known_routes
+        finally:
+            for tid in ("w1", "w2"):
+                scheduler_mod._last_known_routes.pop(tid, None)
+
+    @patch("pingwatcher.engine.scheduler.get_settings")
+    @patch("pingwatcher.engine.scheduler.scheduler")
+    def test_warmed_before_scheduler_starts(self, mock_scheduler, mock_settings):
+        """Routes are loaded before any job can fire."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        mock_scheduler.running = False
+        mock_settings.return_value = MagicMock(
+            enable_dns_enrichment_worker=False,
+            ws_broadcast_tick_seconds=0.2,
+            trace_dispatch_tick_seconds=0.2,
+            maintenance_interval_minutes=30,
+        )
+        order = []
+        mock_scheduler.start.side_effect = lambda: order.append("start")
+        with patch(
+            "pingwatcher.engine.scheduler.warm_route_cache",
+            side_effect=lambda: order.append("warm"),
+        ), patch("pingwatcher.engine.scheduler._start_alert_worker"):
+            scheduler_mod.start_scheduler()
+        assert order == ["warm", "start"]
+
+
+class TestAlertWorker:
+    """Verify alert evaluation runs off the trace thread."""
+
+    @patch("pingwatcher.engine.scheduler._worker_sessions")
+    @patch("pingwatcher.engine.scheduler.evaluate_alerts")
+    def test_worker_evaluates_queued_samples(self, mock_evaluate, mock_worker_sessions):
+        """Queued evaluations run on the alert thread with their own session."""
+        from datetime import datetime
+
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        db = MagicMock()
+        mock_worker_sessions.return_value = db
+        stats = [{"hop": 1}]
+        now = datetime(2025, 1, 1)
+
+        with patch.object(scheduler_mod, "_alert_queue", scheduler_mod.queue.Queue()):
+            scheduler_mod._start_alert_worker()
+            try:
+                scheduler_mod._enqueue_alert_evaluation("t1", 10, stats, now)
+                scheduler_mod._alert_queue.join()
+            finally:
+                scheduler_mod._stop_alert_worker()
+
+        mock_evaluate.assert_called_once_with(db, "t1", focus_n=10, all_stats=stats, now=now)
+        db.close.assert_called_once()
+        assert scheduler_mod._alert_thread is None
+
+    def test_stop_keeps_handle_while_thread_runs(self, caplog):
+        """A worker that outlives the join timeout is not forgotten."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        thread = MagicMock()
+        thread.is_alive.return_value = True
+        with patch.object(scheduler_mod, "_alert_thread", thread), patch.object(
+            scheduler_mod, "_alert_queue", scheduler_mod.queue.Queue()
+        ), caplog.at_level("WARNING", logger=scheduler_mod.logger.name):
+            scheduler_mod._stop_alert_worker(timeout=0.01)
+            assert scheduler_mod._alert_thread is thread
+            scheduler_mod._start_alert_worker()
+            assert scheduler_mod._alert_thread is thread
+        thread.join.assert_called_once_with(0.01)
+        assert "still running" in caplog.text
+
+    def test_full_queue_drops_evaluation(self):
+        """Back-pressure: a full queue skips the evaluation instead of blocking."""
+        from datetime import datetime
+
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        full = MagicMock()
+        full.put_nowait.side_effect = scheduler_mod.queue.Full
+        with patch.object(scheduler_mod, "_alert_queue", full):
+            scheduler_mod._enqueue_alert_evaluation("t1", 10, None, datetime(2025, 1, 1))
+        full.put_nowait.assert_called_once()
+
+
+class TestWorkerSessions:
+    """Verify trace jobs reuse one session per worker thread."""
+
+    def test_session_reused_per_thread(self):
+        """The same thread gets its session back; another thread does not."""
+        import threading
+
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        first = scheduler_mod._worker_sessions()
+        assert scheduler_mod._worker_sessions() is first
+        other = []
+        worker = threading.Thread(target=lambda: other.append(scheduler_mod._worker_sessions()))
+        worker.start()
+        worker.join()
+        assert other[0] is not first
+
+
+class TestSampleGroupCommit:
+    """Verify sample rows from concurrent traces share one write."""
+
+    @patch("pingwatcher.engine.scheduler.store_samples_bulk")
+    def test_flush_includes_rows_buffered_by_other_traces(self, mock_bulk):
+        """Rows queued by another target are written with this trace's rows."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        scheduler_mod._sample_buffer[:] = [{"target_id": "other", "hop_number": 1}]
+        db = MagicMock()
+
+        scheduler_mod._store_samples(db, [{"target_id": "mine", "hop_number": 1}])
+
+        mock_bulk.assert_called_once()
+        _db, rows = mock_bulk.call_args.args
+        assert [r["target_id"] for r in rows] == ["other", "mine"]
+        assert scheduler_mod._sample_buffer == []
+
+    def test_failed_group_write_retries_each_target(self):
+        """A bad row costs only its own trace; the others are still stored."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        def _bulk(_db, rows):
+            if any(r["target_id"] == "gone" for r in rows):
+                raise RuntimeError("FOREIGN KEY constraint failed")
+            stored.append([r["target_id"] for r in rows])
+
+        stored: list[list[str]] = []
+        scheduler_mod._sample_buffer[:] = [{"target_id": "gone", "hop_number": 1}]
+        db = MagicMock()
+        with patch("pingwatcher.engine.scheduler.store_samples_bulk", side_effect=_bulk):
+            scheduler_mod._store_samples(db, [{"target_id": "mine", "hop_number": 1}])
+            assert stored == [["mine"]]
+            assert db.rollback.call_count == 2
+
+            # The trace that contributed the bad row sees its error on flush.
+            with pytest.raises(RuntimeError, match="FOREIGN KEY"):
+                scheduler_mod._store_samples(db, [{"target_id": "gone", "hop_number": 2}])
+        assert scheduler_mod._sample_buffer == []
+        assert scheduler_mod._sample_flush_errors == {}
+
+    def test_error_reaches_trace_that_did_not_flush(self):
+        """Whichever thread flushes, the trace owning the bad row raises."""
+        from pingwatcher.engine import scheduler as scheduler_mod
+
+        def _bulk(_db, rows):
+            if any(r["target_id"] == "gone" for r in rows):
+                raise RuntimeError("FOREIGN KEY constraint failed")
+            stored.extend(r["target_id"] for r in rows)
+
+        stored: list[str] = []
+        errors: list[Exception] = []
+
+        def _other_trace():
+            try:
+                scheduler_mod._store_samples(MagicMock(), [{"target_id": "gone", "hop_number": 1}])
+            except RuntimeError as exc:
+                errors.append(exc)
+
+        with patch("pingwatcher.engine.scheduler.store_samples_bulk", side_effect=_bulk):
+            with scheduler_mod._sample_flush_lock:
+                worker = threading.Thread(target=_other_trace)
+                worker.start()
+                while not scheduler_mod._sample_buffer:
+                    time.sleep(0.001)
+            scheduler_mod._store_samples(MagicMock(), [{"target_id": "mine", "hop_number": 1}])
+            worker.join(5)
+        assert stored == ["mine"]
+        assert len(errors) == 1
+        assert scheduler_mod._sample_flush_errors == {}
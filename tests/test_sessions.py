@@ -2,9 +2,17 @@
 
 from datetime import datetime, timedelta
 
+import orjson
+
 from pingwatcher.db.models import Sample, Target
 from pingwatcher.db.queries import create_target, store_sample
-from pingwatcher.sessions.export import export_session_csv, export_session_json
+from pingwatcher.sessions.export import (
+    _query_samples,
+    export_session_csv,
+    export_session_json,
+    export_session_json_bytes,
+    iter_session_csv,
+)
 
 
 def _seed_session_data(db):
@@ -97,3 +105,29 @@ class TestExportJSON:
             db_session, "empty2", datetime(2000, 1, 1), datetime(2000, 1, 2)
         )
         assert data == []
+
+    def test_json_bytes_match_records(self, db_session):
+        """The orjson-encoded body decodes to the same records."""
+        tid, start, end = _seed_session_data(db_session)
+        body = export_session_json_bytes(db_session, tid, start, end)
+        assert orjson.loads(body) == export_session_json(db_session, tid, start, end)
+
+
+class TestStreamCSV:
+    """Verify streamed CSV export."""
+
+    def test_stream_matches_buffered(self, db_session):
+        """Joined stream chunks equal the buffered CSV export."""
+        tid, start, end = _seed_session_data(db_session)
+        chunks = list(iter_session_csv(db_session, tid, start, end))
+        assert chunks[0].startswith("sampled_at,")
+        assert "".join(chunks) == export_session_csv(db_session, tid, start, end)
+
+    def test_rows_are_plain_column_tuples(self, db_session):
+        """Exports read column tuples, not hydrated Sample objects."""
+        tid, start, end = _seed_session_data(db_session)
+        db_session.expunge_all()
+        rows = list(_query_samples(db_session, tid, start, end))
+        assert len(rows) == 20
+        assert tuple(rows[0])[1:] == (1, "10.0.0.1", None, 5.0, False)
+        assert not any(isinstance(obj, Sample) for obj in db_session.identity_map.values())
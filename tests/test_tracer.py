@@ -1,19 +1,26 @@
 """Tests for :mod:`pingwatcher.engine.tracer`.
 
-All subprocess calls are mocked so these tests run offline and without
-root privileges.
+All subprocess and socket I/O is mocked so these tests run offline and
+without root privileges.
 """
 
+import socket
+import struct
 import subprocess
 import sys
+import time
 import types
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from pingwatcher.engine.tracer import (
-    _build_ping_cmd,
-    _parse_ping_output,
+    HopRec,
+    _checksum,
+    _echo_request,
+    _gather_responses,
+    _parse_error_queue,
+    _parse_icmp_packet,
     _parse_traceroute_output,
     icmp_traceroute,
     resolve_target,
@@ -22,94 +29,132 @@ from pingwatcher.engine.tracer import (
 )
 
 
-class TestBuildPingCmd:
-    """Verify platform-specific ping command construction."""
+def _ipv4_header(src: str = "10.0.0.1") -> bytes:
+    """Return a minimal 20-byte IPv4 header carrying ICMP."""
+    addrs = socket.inet_aton(src) + b"\0" * 4
+    return struct.pack("!BBHHHBBH8s", 0x45, 0, 0, 0, 0, 64, 1, 0, addrs)
 
-    @patch("pingwatcher.engine.tracer._PLATFORM", "darwin")
-    def test_macos_command(self):
-        """macOS uses -m for TTL and -t for timeout."""
-        cmd = _build_ping_cmd("8.8.8.8", ttl=5, timeout=3.0)
-        assert cmd == ["ping", "-c", "1", "-m", "5", "-t", "3", "8.8.8.8"]
 
-    @patch("pingwatcher.engine.tracer._PLATFORM", "linux")
-    def test_linux_command(self):
-        """Linux uses -t for TTL and -W for timeout."""
-        cmd = _build_ping_cmd("8.8.8.8", ttl=5, timeout=3.0)
-        assert cmd == ["ping", "-c", "1", "-t", "5", "-W", "3", "8.8.8.8"]
+class TestIcmpPackets:
+    """Verify ICMP packet construction and decoding."""
 
+    def test_echo_request_checksum(self):
+        """An echo request with its checksum in place sums to zero."""
+        packet = _echo_request(0x1234, 7)
+        assert packet[:2] == b"\x08\x00"
+        assert struct.unpack("!HH", packet[4:8]) == (0x1234, 7)
+        assert _checksum(packet) == 0
 
-class TestParsePingOutput:
-    """Verify parsing of ping stdout/stderr across platforms."""
+    def test_echo_reply_with_and_without_ip_header(self):
+        """Replies decode the same whether or not the IP header is present."""
+        reply = struct.pack("!BBHHH", 0, 0, 0, 0x1234, 3)
+        assert _parse_icmp_packet(reply) == (0, 0x1234, 3)
+        assert _parse_icmp_packet(_ipv4_header() + reply) == (0, 0x1234, 3)
 
-    def test_ttl_exceeded_macos(self):
-        """macOS TTL Exceeded reply is parsed correctly."""
-        output = "92 bytes from 192.168.1.1: Time to live exceeded\n"
-        result = _parse_ping_output(output, "8.8.8.8")
-        assert result["ip"] == "192.168.1.1"
-        assert result["is_timeout"] is False
+    def test_time_exceeded_uses_quoted_probe(self):
+        """Time-exceeded errors are matched through the quoted echo request."""
+        quoted = _ipv4_header("192.168.1.10") + _echo_request(0x1234, 5)
+        error = struct.pack("!BBHI", 11, 0, 0, 0) + quoted
+        assert _parse_icmp_packet(_ipv4_header() + error) == (11, 0x1234, 5)
 
-    def test_ttl_exceeded_linux(self):
-        """Linux TTL Exceeded reply is parsed correctly."""
-        output = "From 10.0.0.1 icmp_seq=1 Time to live exceeded\n"
-        result = _parse_ping_output(output, "8.8.8.8")
-        assert result["ip"] == "10.0.0.1"
-        assert result["is_timeout"] is False
+    def test_unrelated_messages_ignored(self):
+        """Our own echo requests and truncated packets are not responses."""
+        assert _parse_icmp_packet(_echo_request(1, 1)) is None
+        assert _parse_icmp_packet(b"\x00\x00") is None
 
-    def test_echo_reply(self):
-        """Successful echo reply extracts IP and RTT."""
-        output = "64 bytes from 8.8.8.8: icmp_seq=1 ttl=118 time=12.3 ms\n"
-        result = _parse_ping_output(output, "8.8.8.8")
-        assert result["ip"] == "8.8.8.8"
-        assert result["rtt_ms"] == 12.3
-        assert result["is_timeout"] is False
-
-    def test_timeout(self):
-        """No response yields a timeout result."""
-        result = _parse_ping_output("", "8.8.8.8")
-        assert result["ip"] is None
-        assert result["is_timeout"] is True
+    def test_error_queue_entry(self):
+        """Linux error-queue entries yield the offender and the probe's seq."""
+        ee = struct.pack("=IBBBBII", 113, 2, 11, 0, 0, 0, 0)
+        offender = struct.pack("=HH4s8x", socket.AF_INET, 0, socket.inet_aton("10.0.0.1"))
+        ancdata = [(socket.IPPROTO_IP, 11, ee + offender)]
+        with patch("pingwatcher.engine.tracer._IP_RECVERR", 11):
+            parsed = _parse_error_queue(_echo_request(0x1234, 2), ancdata)
+        assert parsed == (11, 0x1234, 2, "10.0.0.1")
 
 
 class TestIcmpTraceroute:
-    """Verify the ping-per-hop traceroute strategy."""
+    """Verify the native ICMP traceroute strategy."""
 
     @patch("pingwatcher.engine.tracer.resolve_target", return_value="8.8.8.8")
-    @patch("pingwatcher.engine.tracer._send_probe")
-    def test_stops_at_target(self, mock_probe, mock_resolve):
+    @patch("pingwatcher.engine.tracer._open_icmp_socket", return_value=(MagicMock(), True))
+    @patch("pingwatcher.engine.tracer._gather_responses")
+    def test_stops_at_target(self, mock_gather, _mock_socket, mock_resolve):
         """Trace stops when the final hop IP matches the target."""
-        mock_probe.side_effect = [
-            {"hop": 1, "ip": "10.0.0.1", "dns": None, "rtt_ms": 1.0, "is_timeout": False},
-            {"hop": 2, "ip": "8.8.8.8", "dns": None, "rtt_ms": 12.0, "is_timeout": False},
+        mock_gather.return_value = {
+            1: ("10.0.0.1", 1.0),
+            2: ("8.8.8.8", 12.0),
+            3: ("8.8.8.8", 12.5),
+        }
+        hops = icmp_traceroute("8.8.8.8", max_hops=30, timeout=1.0, resolve_dns_name=False)
+        assert hops == [
+            HopRec(1, "10.0.0.1", None, 1.0, False),
+            HopRec(2, "8.8.8.8", None, 12.0, False),
         ]
-        hops = icmp_traceroute("8.8.8.8", max_hops=30, timeout=1.0, inter_packet_delay=0)
-        assert len(hops) == 2
-        assert hops[-1]["ip"] == "8.8.8.8"
 
     @patch("pingwatcher.engine.tracer.resolve_target", return_value="8.8.8.8")
-    @patch("pingwatcher.engine.tracer._send_probe")
-    def test_respects_max_hops(self, mock_probe, mock_resolve):
+    @patch("pingwatcher.engine.tracer._open_icmp_socket", return_value=(MagicMock(), True))
+    @patch("pingwatcher.engine.tracer._gather_responses", return_value={})
+    def test_respects_max_hops(self, mock_gather, _mock_socket, mock_resolve):
         """Trace does not exceed max_hops even when target is unreachable."""
-        mock_probe.return_value = {
-            "hop": 1, "ip": None, "dns": None, "rtt_ms": None, "is_timeout": True,
-        }
-        hops = icmp_traceroute("8.8.8.8", max_hops=3, timeout=1.0, inter_packet_delay=0)
+        hops = icmp_traceroute("8.8.8.8", max_hops=3, timeout=1.0)
         assert len(hops) == 3
 
     @patch("pingwatcher.engine.tracer.resolve_target", return_value="8.8.8.8")
-    @patch("pingwatcher.engine.tracer._send_probe")
-    def test_stops_after_consecutive_timeouts(self, mock_probe, mock_resolve):
-        """Trace stops early once timeout streak threshold is reached."""
-        mock_probe.return_value = {
-            "hop": 1, "ip": None, "dns": None, "rtt_ms": None, "is_timeout": True,
-        }
+    @patch("pingwatcher.engine.tracer._open_icmp_socket", return_value=(MagicMock(), True))
+    @patch("pingwatcher.engine.tracer._gather_responses")
+    def test_stops_after_consecutive_timeouts(self, mock_gather, _mock_socket, mock_resolve):
+        """Trace is cut once the timeout streak threshold is reached."""
+        mock_gather.return_value = {1: ("10.0.0.1", 1.0), 7: ("10.0.0.7", 7.0)}
         hops = icmp_traceroute(
             "8.8.8.8",
             max_hops=30,
             timeout=1.0,
-            inter_packet_delay=0,
             max_consecutive_timeouts=4,
+            resolve_dns_name=False,
         )
-        assert len(hops) == 4
+        assert len(hops) == 5
+        assert all(h.is_timeout for h in hops[1:])
+
+
+class TestGatherResponses:
+    """Verify the batched send/receive loop."""
+
+    @patch("pingwatcher.engine.tracer.selectors.DefaultSelector")
+    @patch("pingwatcher.engine.tracer._drain")
+    def test_stops_once_target_and_lower_hops_answer(self, mock_drain, mock_selector):
+        """Sending stops at the target's TTL; stray answers are ignored."""
+        mock_selector.return_value.__enter__.return_value.select.return_value = [True]
+        hops = {1: "10.0.0.1", 2: "10.0.0.2", 3: "8.8.8.8"}
+        answered = set()
+
+        def fake_drain(sock, _is_dgram):
+            for sent in sock.sendto.call_args_list:
+                seq = struct.unpack("!H", sent.args[0][6:8])[0]
+                yield 11, 0x9999, seq, "10.9.9.9"
+                if seq not in answered:
+                    answered.add(seq)
+                    yield 11, 0x1234, seq, hops.get(seq, "8.8.8.8")
+
+        mock_drain.side_effect = fake_drain
+        sock = MagicMock()
+        answers = _gather_responses(sock, False, 0x1234, "8.8.8.8", 30, 1.0, 0.01)
+
+        assert {ttl: ip for ttl, (ip, _rtt) in answers.items()} == {
+            1: "10.0.0.1",
+            2: "10.0.0.2",
+            3: "8.8.8.8",
+        }
+        sent_seqs = [struct.unpack("!H", c.args[0][6:8])[0] for c in sock.sendto.call_args_list]
+        assert sent_seqs == [1, 2, 3]
+        sock.setsockopt.assert_any_call(socket.IPPROTO_IP, socket.IP_TTL, 2)
+
+    @patch("pingwatcher.engine.tracer.selectors.DefaultSelector")
+    def test_all_probes_sent_before_timeout(self, mock_selector):
+        """Silent hops cost one shared timeout, not one each."""
+        mock_selector.return_value.__enter__.return_value.select.return_value = []
+        sock = MagicMock()
+        assert _gather_responses(sock, False, 1, "8.8.8.8", 5, 0.0, 0.0) == {}
+        assert sock.sendto.call_count == 5
 
 
 class TestParseTracerouteOutput:
@@ -126,8 +171,8 @@ class TestParseTracerouteOutput:
         )
         hops = _parse_traceroute_output(output)
         assert len(hops) >= 3
-        assert hops[0]["hop"] == 1
-        assert hops[0]["ip"] == "192.168.1.1"
+        assert hops[0].hop == 1
+        assert hops[0].ip == "192.168.1.1"
 
     def test_all_timeouts(self):
         """Lines with only * are treated as timeouts."""
@@ -138,7 +183,16 @@ class TestParseTracerouteOutput:
         )
         hops = _parse_traceroute_output(output)
         for h in hops:
-            assert h["is_timeout"] is True
+            assert h.is_timeout is True
+
+    def test_matches_do_not_span_lines(self):
+        """A hop number alone on a line never pairs with the next line."""
+        output = " 1\r\n 10.0.0.1  1.0 ms\r\n 2  10.0.0.2  2.5 ms\r\n 3  *\r\n"
+        hops = _parse_traceroute_output(output, resolve_dns_name=False)
+        assert [(h.hop, h.ip, h.rtt_ms) for h in hops] == [
+            (2, "10.0.0.2", 2.5),
+            (3, None, None),
+        ]
 
 
 class TestSystemTraceroute:
@@ -187,41 +241,108 @@ class TestResolveTarget:
 class TestScapyTraceroute:
     """Verify the Scapy batch traceroute path."""
 
-    @patch("pingwatcher.engine.tracer.resolve_target", return_value="8.8.8.8")
-    def test_maps_answers_by_ttl(self, _mock_resolve):
-        """Answered packets are converted to ordered hop rows."""
+    @staticmethod
+    def _fake_scapy(replies):
+        """Build a stand-in ``scapy.all`` that answers probes from *replies*.
+
+        *replies* maps a probe TTL to ``(src_ip, icmp_type)``; Time
+        Exceeded answers quote the probe, echo replies carry id/seq.
+        """
 
-        class _Pkt:
-            def __init__(self, ttl, src=None, sent_time=0.0, recv_time=0.0):
-                self.ttl = ttl
-                self.src = src
-                self.sent_time = sent_time
-                self.time = recv_time
+        class _Layer(types.SimpleNamespace):
+            pass
 
-        class _FakeIP:
+        class IP:
             def __init__(self, dst, ttl):
-                self.dst = dst
-                self.ttl = ttl
-
-            def __truediv__(self, _other):
-                return self
-
-        fake_scapy_all = types.SimpleNamespace(
-            IP=lambda dst, ttl: _FakeIP(dst, ttl),
-            ICMP=lambda: object(),
-            sr=lambda _pkts, timeout, retry, verbose: (
-                [
-                    (_Pkt(1, sent_time=1.0), _Pkt(1, src="10.0.0.1", recv_time=1.002)),
-                    (_Pkt(2, sent_time=1.0), _Pkt(2, src="8.8.8.8", recv_time=1.010)),
-                ],
-                [],
-            ),
+                self.dst, self.ttl = dst, ttl
+
+            def __truediv__(self, icmp):
+                return types.SimpleNamespace(ttl=self.ttl, id=icmp.id, seq=icmp.seq)
+
+        class ICMP(_Layer):
+            pass
+
+        class ICMPerror(_Layer):
+            pass
+
+        class _Reply:
+            def __init__(self, probe, src, icmp_type):
+                self.time = time.time() + 0.005
+                self._layers = {IP: _Layer(src=src), ICMP: _Layer(type=icmp_type)}
+                if icmp_type == 11:
+                    self._layers[ICMPerror] = _Layer(id=probe.id, seq=probe.seq)
+                else:
+                    self._layers[ICMP] = _Layer(type=icmp_type, id=probe.id, seq=probe.seq)
+
+            def haslayer(self, layer):
+                return layer in self._layers
+
+            def __getitem__(self, layer):
+                return self._layers[layer]
+
+        sniffers = []
+
+        class AsyncSniffer:
+            def __init__(self, prn, started_callback, **_kwargs):
+                self.prn, self.started_callback = prn, started_callback
+                self.exception = None
+                self.stopped = False
+                sniffers.append(self)
+
+            def start(self):
+                self.started_callback()
+
+            def stop(self):
+                self.stopped = True
+
+        class _L3Socket:
+            def send(self, probe):
+                if probe.ttl in replies:
+                    sniffers[-1].prn(_Reply(probe, *replies[probe.ttl]))
+
+            def close(self):
+                pass
+
+        fake_all = types.SimpleNamespace(
+            IP=IP,
+            ICMP=ICMP,
+            ICMPerror=ICMPerror,
+            AsyncSniffer=AsyncSniffer,
+            conf=types.SimpleNamespace(L3socket=_L3Socket),
         )
-        fake_scapy = types.SimpleNamespace(all=fake_scapy_all)
+        return fake_all, sniffers
 
-        with patch.dict(sys.modules, {"scapy": fake_scapy, "scapy.all": fake_scapy_all}):
-            hops = scapy_icmp_traceroute("8.8.8.8", max_hops=5, timeout=1.0)
+    @patch("pingwatcher.engine.tracer.resolve_target", return_value="8.8.8.8")
+    def test_maps_answers_by_ttl(self, _mock_resolve):
+        """Sniffed replies are correlated to probes and cut at the target."""
+        fake_all, sniffers = self._fake_scapy(
+            {1: ("10.0.0.1", 11), 2: ("8.8.8.8", 0), 3: ("8.8.8.8", 0)}
+        )
+        fake_scapy = types.SimpleNamespace(all=fake_all)
 
-        assert len(hops) == 2
-        assert hops[0]["ip"] == "10.0.0.1"
-        assert hops[1]["ip"] == "8.8.8.8"
+        start = time.monotonic()
+        with patch.dict(sys.modules, {"scapy": fake_scapy, "scapy.all": fake_all}):
+            hops = scapy_icmp_traceroute("8.8.8.8", max_hops=5, timeout=2.0)
+
+        assert [(h.hop, h.ip, h.is_timeout) for h in hops] == [
+            (1, "10.0.0.1", False),
+            (2, "8.8.8.8", False),
+        ]
+        assert all(h.rtt_ms is not None for h in hops)
+        assert sniffers[0].stopped
+        assert time.monotonic() - start < 1.0
+
+    @patch("pingwatcher.engine.tracer.resolve_target", return_value="8.8.8.8")
+    def test_missing_hops_time_out(self, _mock_resolve):
+        """Unanswered TTLs become timeouts once the wait expires."""
+        fake_all, _sniffers = self._fake_scapy({2: ("10.0.0.2", 11)})
+        fake_scapy = types.SimpleNamespace(all=fake_all)
+
+        with patch.dict(sys.modules, {"scapy": fake_scapy, "scapy.all": fake_all}):
+            hops = scapy_icmp_traceroute("8.8.8.8", max_hops=3, timeout=0.05)
+
+        assert [(h.ip, h.is_timeout) for h in hops] == [
+            (None, True),
+            ("10.0.0.2", False),
+            (None, True),
+        ]